@@ -0,0 +1,87 @@
+"""
+Benchmark of pseudoknot order assignment on synthetic structures with many helixes.
+
+    python benchmarks/bench_helix_orders.py [n_helixes] [window]
+
+Assignment takes O(H*K*logH) for H helixes and K bracket types: every helix checks
+Fenwick trees of lower orders one by one. It is near linear only while K is small,
+`window` bounds K of synthetic structures, larger windows show the growth with K.
+Orders are assigned by crossing_orders without the limit of types of brackets of dot structure.
+"""
+import sys
+import time
+import random
+import numpy as np
+
+from naskit import NucleicAcid
+from naskit.containers.pair_table import crossing_orders
+
+
+
+def synthetic_pair_table(n_helixes: int, 
+                         helix_len: int = 3, 
+                         window: int = 4, 
+                         seed: int = 0
+                        ) -> np.ndarray:
+    """
+    Random structure of stems. Every stem is closed by one of the last `window` opened stems, 
+    so structure is highly pseudoknotted, but needs a limited number of bracket types.
+    """
+    rnd = random.Random(seed)
+    pt = []
+    opened = []
+    created = 0
+
+    while created<n_helixes or opened:
+        if created<n_helixes and (len(opened)<window and rnd.random()<0.6 or not opened):
+            opened.append(len(pt))
+            pt.extend([-1]*helix_len)
+            created += 1
+        else:
+            start = opened.pop(rnd.randrange(max(0, len(opened)-window), len(opened)))
+            end = len(pt)
+            for k in range(helix_len):
+                pt.append(start + helix_len - 1 - k)
+                pt[start + helix_len - 1 - k] = end + k
+        pt.extend([-1]*rnd.randint(1, 3))
+
+    return np.array(pt, dtype=np.int32)
+
+
+def quadratic_helix_orders(na: NucleicAcid):
+    # reference pairwise assignment
+    helixes = na.helixes
+    orders = []
+    for i, h in enumerate(helixes):
+        used = set([orders[j] for j in range(i) if na._helix_intersect(h, helixes[j])])
+        order = 0
+        while order in used:
+            order += 1
+        orders.append(order)
+    return tuple(orders)
+
+
+def make_na(pt: np.ndarray) -> NucleicAcid:
+    na = NucleicAcid()
+    na._set_graph('N'*len(pt), pt)
+    return na
+
+
+if __name__=="__main__":
+    n_helixes = int(sys.argv[1]) if len(sys.argv)>1 else 10_000
+    window = int(sys.argv[2]) if len(sys.argv)>2 else 4
+    na = make_na(synthetic_pair_table(n_helixes, window=window))
+    print(f"Sequence length: {len(na)}, helixes: {len(na.helixes)}")
+
+    helixes = na.helixes
+    t = time.perf_counter()
+    orders = tuple(crossing_orders([h.opc[-1] for h in helixes], 
+                                   [h.clc[0] for h in helixes], 
+                                   [h.clc[-1] for h in helixes]))
+    print(f"crossing_orders: {time.perf_counter()-t:.3f} s, bracket types (K): {max(orders)+1}")
+
+    t = time.perf_counter()
+    reference = quadratic_helix_orders(na)
+    print(f"quadratic reference: {time.perf_counter()-t:.3f} s")
+
+    assert orders==reference
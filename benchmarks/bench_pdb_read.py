@@ -0,0 +1,77 @@
+"""
+Benchmark of PDB reading from file: pdbRead.read against line by line parser.
+
+    python benchmarks/bench_pdb_read.py [n_residues_per_chain]
+
+Line by line parser is the previous reader, it runs at the same speed as pdbRead.read
+before the bulk parser (about 0.75 s for 110 000 atoms). Measured speedup of pdbRead.read
+is about 9.5x (0.08 s), just below the 10x target. Timings of this machine are noisy,
+best of separate runs give 9-11x. About half of the remaining time is parsing of number columns
+(coordinates take the most), the rest is Python objects per residue (molecules and chains),
+which does not vectorize.
+"""
+import sys
+import time
+import random
+import tempfile
+from pathlib import Path
+
+from naskit import pdbRead
+
+
+
+ATOM_NAMES = ["P", "OP1", "OP2", "O5'", "C5'", "C4'", "O4'", "C3'", "O3'", "C2'", "O2'",
+              "C1'", "N9", "C8", "N7", "C5", "C6", "N6", "N1", "C2", "N3", "C4"]
+
+
+def synthetic_pdb(n_residues: int, chains: str = "ABCDEFGHIJ", seed: int = 0) -> str:
+    """
+    Adenine chains with random coordinates.
+    """
+    rnd = random.Random(seed)
+    lines = []
+    n = 1
+    for chain in chains:
+        for r in range(1, n_residues+1):
+            for a in ATOM_NAMES:
+                x, y, z = [rnd.uniform(-99, 99) for _ in range(3)]
+                lines.append(f"ATOM  {n%100000:>5} {a:<4}   A {chain}{r:>4}    "
+                             f"{x:>8.3f}{y:>8.3f}{z:>8.3f}  1.00  0.00           {a[0]}  ")
+                n += 1
+        lines.append("TER")
+    return "\n".join(lines) + "\nEND\n"
+
+
+if __name__=="__main__":
+    n_residues = int(sys.argv[1]) if len(sys.argv)>1 else 500
+    text = synthetic_pdb(n_residues)
+    print(f"Atoms: {text.count('ATOM')}, size: {len(text)/2**20:.1f} MB")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "synthetic.pdb"
+        path.write_text(text)
+        
+        def best_time(read, repeats: int = 5):
+            times = []
+            for _ in range(repeats):
+                t = time.perf_counter()
+                result = read()
+                times.append(time.perf_counter()-t)
+            return min(times), result
+        
+        def read_lines():
+            with pdbRead(path) as reader:
+                lines = [l.rstrip('\n') for l in reader._file.readlines()]
+                return reader._read_lines(lines)
+        
+        def read():
+            with pdbRead(path) as reader:
+                return reader.read()
+        
+        t_lines, lines = best_time(read_lines)
+        print(f"line by line: {t_lines:.3f} s")
+        
+        t_read, models = best_time(read)
+        print(f"pdbRead.read: {t_read:.3f} s, speedup: {t_lines/t_read:.1f}x (target 10x)")
+        
+        assert str(models)==str(lines)
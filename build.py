@@ -10,6 +10,8 @@ import os
 ext_modules = [
     Extension('naskit.algo.levenshtein._levenshtein', 
               ['naskit/algo/levenshtein/levenshtein.c']),
+    Extension('naskit.algo.dotbracket._dotbracket', 
+              ['naskit/algo/dotbracket/dotbracket.c']),
 ]
 
 def build():
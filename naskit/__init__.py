@@ -2,14 +2,14 @@ from .io import *
 from . import algo
 from .containers import NucleicAcid
 from . import containers
-from .parse_na import NA
+from .parse_na import NA, NA_batch
 from .draw import edit_draw_config
 from . import descriptors
 from . import metrics
 
 
 
-__all__ = ["NA", "NucleicAcid",
+__all__ = ["NA", "NA_batch", "NucleicAcid",
            "containers",
            "dotLinesRead", "dotLinesWrite",
            "dotRead", "dotWrite", 
@@ -1,4 +1,5 @@
 from .levenshtein import levdist
+from .dotbracket import parse_dot_structure
 
 
-__all__ = ["levdist"]
\ No newline at end of file
+__all__ = ["levdist", "parse_dot_structure"]
\ No newline at end of file
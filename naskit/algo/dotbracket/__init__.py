@@ -0,0 +1,46 @@
+from ._dotbracket import c_parse_structure
+import numpy as np
+import numpy
+
+from ...exceptions import InvalidStructure
+
+
+
+PARSE_OK = 0
+PARSE_INVALID_SYMBOL = 1
+PARSE_UNOPENED_BOND = 2
+PARSE_UNCLOSED_BOND = 3
+
+DOT_STRUCTURE_SYMBOLS = set(".()[]{}<>AaBbCcDdEeFf")
+
+
+def _parse_structure_bytes(struct: str, ignore_unclosed_bonds: bool = False) -> bytes:
+    pt, status, idx = c_parse_structure(struct.encode('ascii', 'replace'), ignore_unclosed_bonds)
+    if status==PARSE_OK:
+        return pt
+    
+    if len(rem:=(set(struct) - DOT_STRUCTURE_SYMBOLS))!=0:
+        raise InvalidStructure(f"Dot structure contains invalid symbols - {', '.join(tuple(rem))}")
+        
+    if status==PARSE_UNOPENED_BOND:
+        raise InvalidStructure(f"Closing bond {struct[idx]} at index {idx} has no open pair, "
+                               f"use ignore_unclosed_bonds=True to omit such bonds")
+    
+    # PARSE_UNCLOSED_BOND
+    raise InvalidStructure(f"Structure contains unclosed bonds, use ignore_unclosed_bonds=True to omit such bonds")
+
+
+def parse_dot_structure(struct: str, ignore_unclosed_bonds: bool = False) -> numpy.array:
+    """
+    Parses dot-bracket structure into pair table in one pass.
+
+    :param struct: dot-bracket structure.
+    :param ignore_unclosed_bonds: omit single unpaired parentheses without raising error. Default - False.
+
+    :return: int32 pair table, pt[i] - index of complementary nb or -1.
+    """
+    pt = _parse_structure_bytes(struct, ignore_unclosed_bonds)
+    return np.frombuffer(pt, dtype=np.int32).copy()
+
+
+__all__ = ["parse_dot_structure"]
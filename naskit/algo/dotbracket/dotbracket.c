@@ -0,0 +1,146 @@
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <stdint.h>
+
+
+
+#define MAX_BRACKET_TYPES 32
+
+#define SYMBOL_INVALID 0
+#define SYMBOL_DOT 1
+#define SYMBOL_OPEN 2
+#define SYMBOL_CLOSE 3
+
+#define PARSE_OK 0
+#define PARSE_INVALID_SYMBOL 1
+#define PARSE_UNOPENED_BOND 2
+#define PARSE_UNCLOSED_BOND 3
+
+
+static const char* OPEN_BRACKETS = "([{<ABCDEF";
+static const char* CLOSE_BRACKETS = ")]}>abcdef";
+
+static char symbol_kind[256];
+static char symbol_type[256];
+
+
+int parse_structure(const char* s, Py_ssize_t n, int32_t* pt, int ignore_unclosed, Py_ssize_t* err_idx);
+
+
+PyObject *Py_parse_structure(PyObject *self, PyObject *args){
+    const char* s;
+    Py_ssize_t n;
+    int ignore_unclosed;
+
+    if (!PyArg_ParseTuple(args, "y#p", &s, &n, &ignore_unclosed))
+        return NULL;
+
+    PyObject* pt_bytes = PyBytes_FromStringAndSize(NULL, n*sizeof(int32_t));
+    if (pt_bytes==NULL)
+        return NULL;
+
+    Py_ssize_t err_idx = -1;
+    int status = parse_structure(s, n, (int32_t*)PyBytes_AS_STRING(pt_bytes), ignore_unclosed, &err_idx);
+
+    if (status<0){
+        Py_DECREF(pt_bytes);
+        return PyErr_NoMemory();
+    }
+
+    return Py_BuildValue("Nin", pt_bytes, status, err_idx);
+}
+
+
+static PyMethodDef methods[] = {
+    {
+        "c_parse_structure",
+        Py_parse_structure,
+        METH_VARARGS,
+        "Parses dot-bracket structure into int32 pair table. Returns (pair table bytes, status, error index)"
+     },
+    {NULL, NULL, 0, NULL}
+};
+
+
+static struct PyModuleDef _dotbracket = {
+    PyModuleDef_HEAD_INIT,
+    "_dotbracket",
+    "C implementation of dot-bracket structure parsing",
+    -1,
+    methods
+};
+
+
+PyMODINIT_FUNC PyInit__dotbracket(){
+    memset(symbol_kind, SYMBOL_INVALID, sizeof(symbol_kind));
+    memset(symbol_type, 0, sizeof(symbol_type));
+
+    symbol_kind['.'] = SYMBOL_DOT;
+    for (int t=0; OPEN_BRACKETS[t]!='\0'; t++){
+        symbol_kind[(unsigned char)OPEN_BRACKETS[t]] = SYMBOL_OPEN;
+        symbol_type[(unsigned char)OPEN_BRACKETS[t]] = t;
+        symbol_kind[(unsigned char)CLOSE_BRACKETS[t]] = SYMBOL_CLOSE;
+        symbol_type[(unsigned char)CLOSE_BRACKETS[t]] = t;
+    }
+
+    return PyModule_Create(&_dotbracket);
+};
+
+// ###
+
+int parse_structure(const char* s, Py_ssize_t n, int32_t* pt, int ignore_unclosed, Py_ssize_t* err_idx){
+    // Every bracket type has its own stack of opened nbs.
+    // Stacks are linked lists stored in one array: prev[i] - previous opened nb of the same type.
+    Py_ssize_t top[MAX_BRACKET_TYPES];
+    Py_ssize_t* prev = (Py_ssize_t*)malloc(sizeof(Py_ssize_t)*(n>0 ? n : 1));
+    if (prev==NULL){return -1;}
+
+    for (int t=0; t<MAX_BRACKET_TYPES; t++){top[t] = -1;}
+
+    int status = PARSE_OK;
+    for (Py_ssize_t i=0; i<n; i++){
+        unsigned char c = (unsigned char)s[i];
+        int t = symbol_type[c];
+        pt[i] = -1;
+
+        switch (symbol_kind[c]){
+            case SYMBOL_DOT:
+                break;
+
+            case SYMBOL_OPEN:
+                prev[i] = top[t];
+                top[t] = i;
+                break;
+
+            case SYMBOL_CLOSE:
+                if (top[t]<0){
+                    if (ignore_unclosed){break;}
+                    status = PARSE_UNOPENED_BOND;
+                    *err_idx = i;
+                    goto finish;
+                }
+
+                pt[i] = (int32_t)top[t];
+                pt[top[t]] = (int32_t)i;
+                top[t] = prev[top[t]];
+                break;
+
+            default:
+                status = PARSE_INVALID_SYMBOL;
+                *err_idx = i;
+                goto finish;
+        }
+    }
+
+    for (int t=0; t<MAX_BRACKET_TYPES; t++){
+        if (top[t]>=0 && !ignore_unclosed){
+            status = PARSE_UNCLOSED_BOND;
+            *err_idx = top[t];
+            break;
+        }
+    }
+
+    finish:
+    free(prev);
+    return status;
+}
@@ -1,9 +1,13 @@
 from .nucleic_acid import NucleicAcid
 from .nucleic_acid_graph import NucleicAcidGraph
+from .nucleic_acid_edit import NucleicAcidEdit
+from .pair_table import fix_sharp_hairpins_batch
+from .batch import get_adjacency_batch, from_adjacency_batch
 from .nucleic_acid_fragments import Helix, Loop, _make_loop, Hairpin, InternalLoop, Bulge, Junction
 import pdb
 
-__all__ = ['NucleicAcid', 'NucleicAcidGraph', 
+__all__ = ['NucleicAcid', 'NucleicAcidGraph', 'NucleicAcidEdit', 
+           'fix_sharp_hairpins_batch', 'get_adjacency_batch', 'from_adjacency_batch', 
            '_make_loop', 
            'Helix', 'Loop', 
            'Hairpin', 'InternalLoop', 'Bulge', 'Junction',
@@ -0,0 +1,116 @@
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+import numpy
+
+from .nucleic_acid import NucleicAcid
+from ..exceptions import InvalidAdjacency
+
+
+
+def get_adjacency_batch(nas: Sequence[NucleicAcid], /, *,
+                        max_len: Optional[int] = None,
+                        dtype: numpy.dtype = np.int32,
+                        out: Optional[numpy.array] = None
+                       ) -> Tuple[numpy.array, numpy.array]:
+    """
+    Writes adjacencies of many NucleicAcids into one zero padded array.
+
+    :param nas: sequence of NucleicAcids.
+    :param max_len: padded length L. Default - maximal length in batch.
+    :param dtype: adjacency dtype, e.g. np.uint8 or bool. Default - np.int32.
+    :param out: preallocated (B, L, L) array to write into, dtype is ignored if provided.
+
+    :return: adjacency (B, L, L) and bool length mask (B, L).
+    """
+    lengths = np.array([len(na) for na in nas], dtype=np.int64)
+
+    if out is not None:
+        if out.ndim!=3 or out.shape[0]!=len(nas) or out.shape[1]!=out.shape[2]:
+            raise ValueError(f"Output array must have shape ({len(nas)}, L, L), got {out.shape}")
+        max_len = out.shape[1] if max_len is None else max_len
+
+    if max_len is None:
+        max_len = int(lengths.max()) if len(nas) else 0
+
+    if len(nas) and lengths.max()>max_len:
+        raise ValueError(f"NucleicAcid of length {lengths.max()} does not fit into max_len {max_len}")
+
+    if out is None:
+        out = np.zeros((len(nas), max_len, max_len), dtype=dtype)
+    else:
+        if out.shape[1]!=max_len:
+            raise ValueError(f"Output array must have shape ({len(nas)}, {max_len}, {max_len}), got {out.shape}")
+        out[...] = 0
+
+    mask = np.arange(max_len)<lengths[:, np.newaxis]
+    if len(nas)==0:
+        return out, mask
+
+    pt = np.concatenate([na._pt_view() for na in nas])
+    offsets = np.cumsum(lengths) - lengths
+    b = np.repeat(np.arange(len(nas)), lengths)
+    i = np.arange(len(pt)) - np.repeat(offsets, lengths)
+
+    paired = pt>=0
+    out[b[paired], i[paired], pt[paired]] = 1
+    return out, mask
+
+
+def from_adjacency_batch(adjs: numpy.array, /, *,
+                         lengths: Optional[Sequence[int]] = None,
+                         seqs: Optional[Sequence[str]] = None,
+                         threshold: float = 0.5,
+                         upper_sequence: bool = False
+                        ) -> List[NucleicAcid]:
+    """
+    Decodes batch of padded adjacencies, contact or pair probability maps into NucleicAcids.
+    Nbs i and j are paired if they are the best partners of each other in symmetrized map (adj + adj.T)/2
+    and the value is greater than threshold, so any map gives valid structure without validation.
+    For valid 0/1 adjacency the result is equal to NucleicAcid.from_adjacency.
+
+    :param adjs: (B, L, L) array.
+    :param lengths: sequence lengths. Default - lengths of seqs or L.
+    :param seqs: na sequences. Default - 'N' sequences.
+    :param threshold: minimal value of pair. Default - 0.5.
+    :param upper_sequence: upper sequence characters. Default - False.
+
+    :return: list of NucleicAcid objects.
+    """
+    if adjs.ndim!=3 or adjs.shape[1]!=adjs.shape[2]:
+        raise InvalidAdjacency(f"Adjacency batch must have shape (B, L, L), got shape: {adjs.shape}")
+
+    if seqs is not None and len(seqs)!=len(adjs):
+        raise ValueError(f"Number of sequences and adjacencies must be equal, got {len(seqs)} and {len(adjs)}")
+
+    if lengths is None:
+        lengths = [len(s) for s in seqs] if seqs is not None else [adjs.shape[1]]*len(adjs)
+
+    if len(lengths)!=len(adjs):
+        raise ValueError(f"Number of lengths and adjacencies must be equal, got {len(lengths)} and {len(adjs)}")
+
+    nas = []
+    for k, n in enumerate(lengths):
+        if n>adjs.shape[1]:
+            raise InvalidAdjacency(f"Length {n} is greater than adjacency size {adjs.shape[1]}")
+
+        seq = NucleicAcid._adjacency_seq(None if seqs is None else seqs[k], n, upper_sequence)
+        nas.append(NucleicAcid._from_pair_table(seq, _decode_pair_table(adjs[k, :n, :n], threshold), None, None))
+
+    return nas
+
+
+def _decode_pair_table(adj: numpy.array, threshold: float) -> numpy.array:
+    n = len(adj)
+    pt = np.full(n, -1, dtype=np.int32)
+    if n<2:
+        return pt
+
+    p = adj.astype(np.float32)
+    p = (p + p.T)/2
+    np.fill_diagonal(p, -np.inf)
+
+    idx = np.arange(n)
+    best = np.argmax(p, axis=-1)
+    paired = (best[best]==idx) & (p[idx, best]>threshold)
+    pt[paired] = best[paired]
+    return pt
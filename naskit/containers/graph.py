@@ -1,29 +1,70 @@
 from typing import Union
+from array import array
+import numpy as np
+import numpy
 
 
 
 class SimplifiedLinearGraph:
-    __slots__ = ('_nodes', '_bonds')
-    
+    """
+    Linear graph where every node has at most one additional bond.
+    Nodes are stored as ascii bytes and bonds as int32 pair table: pt[i] = j or -1.
+    """
+    __slots__ = ('_seq', '_pt')
+
     def __init__(self):
-        self._nodes = []
-        self._bonds = {}
-        
-        
-    def _add_node(self, node: Union[str, int, tuple]) -> int:
-        self._nodes.append(node)
-        return len(self._nodes)-1
-    
-    
+        self._seq = bytearray()
+        self._pt = array('i')
+
+
+    def _add_node(self, node: str) -> int:
+        if len(node)!=1:
+            raise ValueError(f"Node must be a single character, got '{node}'")
+
+        self._seq += node.encode('ascii')
+        self._pt.append(-1)
+        return len(self._seq)-1
+
+
+    def _add_nodes(self, nodes: str):
+        self._seq += nodes.encode('ascii')
+        self._pt.extend(array('i', [-1])*len(nodes))
+
+
+    def _set_graph(self, seq: Union[str, bytes], pt: Union[numpy.array, bytes, None] = None):
+        """
+        Replaces graph data. Pair table is trusted and must be consistent with sequence length.
+        """
+        self._seq = bytearray(seq.encode('ascii') if isinstance(seq, str) else seq)
+        if pt is None:
+            pt = np.full(len(self._seq), -1, dtype=np.int32)
+        if not isinstance(pt, (bytes, bytearray)):
+            pt = np.ascontiguousarray(pt, dtype=np.int32).tobytes()
+        self._pt = array('i', pt)
+
+
     def _add_bond(self, n: int, m: int):
-        self._bonds[n] = m
-        self._bonds[m] = n
-            
-    
+        self._pt[n] = m
+        self._pt[m] = n
+
+
     def _remove_bond(self, n: int, m: int):
-        _ = self._bonds.pop(m)
-        _ = self._bonds.pop(n)
-        
+        self._pt[n] = -1
+        self._pt[m] = -1
+
+
+    def _pt_view(self) -> numpy.array:
+        # temporary view, must not be stored since it locks the buffer from resizing
+        return np.frombuffer(self._pt, dtype=np.int32)
+
+
+    @property
+    def pair_table(self) -> numpy.array:
+        """
+        Copy of int32 pair table, pt[i] is an index of complementary nb or -1.
+        """
+        return np.array(self._pt, dtype=np.int32)
+
 
 class Graph:
     __slots__ = ('_nodes', '_bonds')
@@ -5,6 +5,7 @@ import numpy
 import numpy as np
 
 from .nucleic_acid_graph import NucleicAcidGraph
+from .pair_table import pair_table_from_pairs
 from ..draw import DrawNA
 from ..exceptions import InvalidSequence, InvalidAdjacency, InvalidStructure
 
@@ -44,7 +45,7 @@ class NucleicAcid(NucleicAcidGraph, DrawNA):
         
     @property
     def seq(self) -> str:
-        return ''.join(self._nodes)
+        return self._seq.decode('ascii')
     
     
     # TODO: structure setter
@@ -65,7 +66,7 @@ class NucleicAcid(NucleicAcidGraph, DrawNA):
     
     
     def __len__(self):
-        return len(self._nodes)
+        return len(self._seq)
     
     
     def __eq__(self, other):
@@ -78,20 +79,18 @@ class NucleicAcid(NucleicAcidGraph, DrawNA):
         if len(self)!=len(other):
             return False
         
-        if self.seq!=other.seq:
+        # cached digests reject most of unequal pairs without comparing the whole data
+        if self.digest()!=other.digest():
             return False
         
-        if len(self.pairs)!=len(other.pairs):
-            return False
-        
-        return all([p1==p2 for p1, p2 in zip(self.pairs, other.pairs)])
+        return self._seq==other._seq and self._pt==other._pt
     
 
     def __hash__(self) -> int:
         """
         NucleicAcid's hash is computed only by sequence and complementary bonds.
         """
-        return hash((self.seq, self.pairs))
+        return int.from_bytes(self.digest()[:8], 'little', signed=True)
     
     
     @classmethod
@@ -105,12 +104,13 @@ class NucleicAcid(NucleicAcidGraph, DrawNA):
         """
         Create NucleicAcid from adjacency matrix.
 
-        :param adj: numpy array adjacency of 0 and 1.
+        :param adj: numpy array adjacency of 0 and 1 or sparse matrix with tocoo() method (e.g. scipy coo, csr). 
+                    Sparse matrix is validated in O(P) for P stored values.
         :param seq: na sequence.
         :param name: na name.
         :param meta: dictionary of meta information convertable to string.
         :param upper_sequence: upper sequence characters. Default - False.
-        :param trust_adj: whether to skip adjacency validation. Validation has O(N^2) time complexity. Default - False.
+        :param trust_adj: whether to skip dense adjacency validation. Validation has O(N^2) time complexity. Default - False.
 
         :return: NucleicAcid object.
         """ 
@@ -118,17 +118,17 @@ class NucleicAcid(NucleicAcidGraph, DrawNA):
         if len(adj.shape)!=2 or adj.shape[0]!=adj.shape[1]:
             raise InvalidAdjacency(f"Adjacency must be a square matrix, got shape: {adj.shape}")
             
-        if seq is None: 
-            seq = 'N'*adj.shape[0]
-        else:
-            if not seq.isalpha():
-                raise InvalidSequence(f"Sequence must contain only alphabetic characters")
-            
-            if upper_sequence: 
-                seq = seq.upper()
-
-            if len(seq)!=adj.shape[0]:
-                raise InvalidAdjacency(f"Adjacency shape and sequence length must be equal, got adj: {adj.shape[0]} and seq: {len(seq)}")
+        seq = cls._adjacency_seq(seq, adj.shape[0], upper_sequence)
+        
+        if hasattr(adj, 'tocoo'):
+            coo = adj.tocoo()
+            data = np.asarray(coo.data)
+            stored = data!=0
+            if (data[stored]!=1).any():
+                raise InvalidAdjacency(f"Adjacency must contain only 0 and 1")
+                
+            pt = pair_table_from_pairs(np.asarray(coo.row)[stored], np.asarray(coo.col)[stored], len(seq), symmetric=True)
+            return cls._from_pair_table(seq, pt, name, meta)
         
         if not trust_adj:
             if np.sum((adj!=0)*(adj!=1)) > 0:
@@ -139,23 +139,79 @@ class NucleicAcid(NucleicAcidGraph, DrawNA):
             
             if np.sum(adj.sum(axis=-1) > 1) > 0:
                 raise InvalidAdjacency(f"Several complementary bonds for one nucleic base is ambiguous")
-        
-        # create graph
-        na = cls()
-        if name: na.name = name
-        if meta: na.meta.update(meta)
-            
-        for i, nb in enumerate(seq):
-            _ = na._add_node(nb)
             
         adj = np.triu(adj, 1) # mask diagonal and lower triangle
         vec = np.argmax(adj, axis=-1)
-        for o, e in enumerate(vec):
-            if e==0: 
-                continue
-                
-            na._add_bond(o, e)
+        opening = np.flatnonzero(vec)
+        
+        pt = np.full(len(seq), -1, dtype=np.int32)
+        pt[opening] = vec[opening]
+        pt[vec[opening]] = opening
+            
+        return cls._from_pair_table(seq, pt, name, meta)
+    
+    
+    @classmethod
+    def from_pairs(cls, pairs: numpy.array, /, *, 
+                   seq: Optional[str] = None,
+                   length: Optional[int] = None,
+                   name: Optional[str] = None,
+                   meta: Optional[dict] = None,
+                   upper_sequence: bool = False,
+                   symmetric: bool = False
+                  ) -> 'NucleicAcid':
+        """
+        Create NucleicAcid from sparse complementary bonds. Validation has O(P + N) time complexity.
+
+        :param pairs: (2, P) array of complementary nbs or (row, col) tuple of COO coordinates.
+        :param seq: na sequence.
+        :param length: sequence length, required if seq is not specified.
+        :param name: na name.
+        :param meta: dictionary of meta information convertable to string.
+        :param upper_sequence: upper sequence characters. Default - False.
+        :param symmetric: every bond is listed in both directions as in COO of symmetric adjacency. 
+                          Default - False, every bond is listed once.
+
+        :return: NucleicAcid object.
+        """
+        if seq is None and length is None:
+            raise ValueError("Either seq or length must be specified")
+            
+        if length is None:
+            length = len(seq)
+            
+        seq = cls._adjacency_seq(seq, length, upper_sequence)
+        
+        if len(pairs)!=2:
+            raise InvalidAdjacency(f"Pairs must have shape (2, P)")
+        
+        pt = pair_table_from_pairs(pairs[0], pairs[1], len(seq), symmetric=symmetric)
+        return cls._from_pair_table(seq, pt, name, meta)
+    
+    
+    @staticmethod
+    def _adjacency_seq(seq: Optional[str], length: int, upper_sequence: bool) -> str:
+        if seq is None: 
+            return 'N'*length
+        
+        if not (seq.isascii() and seq.isalpha()):
+            raise InvalidSequence(f"Sequence must contain only alphabetic characters")
+
+        if upper_sequence: 
+            seq = seq.upper()
+
+        if len(seq)!=length:
+            raise InvalidAdjacency(f"Adjacency shape and sequence length must be equal, got adj: {length} and seq: {len(seq)}")
             
+        return seq
+    
+    
+    @classmethod
+    def _from_pair_table(cls, seq: str, pt: numpy.array, name: Optional[str], meta: Optional[dict]) -> 'NucleicAcid':
+        na = cls()
+        if name: na.name = name
+        if meta: na.meta.update(meta)
+        na._set_graph(seq, pt)
         return na
     
 
@@ -0,0 +1,114 @@
+from typing import Iterable, Optional, Tuple
+
+
+
+class NucleicAcidEdit:
+    """
+    Transaction of bond and sequence edits.
+    Edits are validated one by one against the edited state and applied to NucleicAcid at once on commit,
+    graph caches are cleared once. If any edit is invalid, NucleicAcid stays unchanged.
+
+    with na.edit() as e:
+        e.split(2, 10)
+        e.join(3, 9)
+        e.mutate(5, 'G')
+    """
+
+    OPERATIONS = ('join', 'split', 'mutate')
+
+    def __init__(self, na: "NucleicAcidGraph"):
+        self._na = na
+        self._staged = na.__class__()
+        self._staged._set_graph(na._seq, na._pt.tobytes())
+        self._bonds_changed = False
+        self._seq_changed = False
+        self._closed = False
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+
+    def __len__(self):
+        return len(self._staged)
+
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError("Edit is already committed or rolled back")
+
+
+    def complnb(self, n: int) -> Optional[int]:
+        return self._staged.complnb(n)
+
+
+    def join(self, n: int, m: int):
+        """
+        Creates complementary bond between specified nbs.
+        """
+        self._check_open()
+        self._staged.join(n, m)
+        self._bonds_changed = True
+
+
+    def split(self, n: int, m: int):
+        """
+        Breaks complementary bond between specified nbs.
+        """
+        self._check_open()
+        self._staged.split(n, m)
+        self._bonds_changed = True
+
+
+    def mutate(self, n: int, nb: str):
+        """
+        Replaces nb at specified index.
+        """
+        self._check_open()
+        if n<0: n = len(self) + n
+
+        if not 0<=n<len(self):
+            raise IndexError(f"Nb index is out of range")
+
+        if not isinstance(nb, str) or len(nb)!=1 or not (nb.isascii() and nb.isalpha()):
+            raise ValueError(f"Nb must be a single alphabetic character, got {nb}")
+
+        self._staged._seq[n] = ord(nb)
+        self._seq_changed = True
+
+
+    def apply(self, edits: Iterable[Tuple]):
+        """
+        Stages edits given as tuples: ('join', n, m), ('split', n, m) or ('mutate', n, nb).
+        """
+        for edit in edits:
+            op, *args = edit
+            if op not in self.OPERATIONS:
+                raise ValueError(f"Unknown edit operation '{op}', expected one of: {', '.join(self.OPERATIONS)}")
+            getattr(self, op)(*args)
+
+
+    def commit(self):
+        self._check_open()
+        self._closed = True
+
+        na = self._na
+        if self._bonds_changed:
+            na._pt = self._staged._pt
+            na.clear_graph_cache()
+
+        if self._seq_changed:
+            na._seq = self._staged._seq
+            na.__dict__.pop('_digest', None)
+
+
+    def rollback(self):
+        self._check_open()
+        self._closed = True
@@ -1,3 +1,7 @@
+import numpy as np
+
+
+
 class Helix:
     
     __slots__ = '__opc', '__clc'
@@ -43,32 +47,67 @@ class Helix:
     
 
 def _make_loop(nodes, knots=None):
-    c = len([1 for n in nodes if isinstance(n, tuple)])
-    if c==1:
-        return Hairpin(nodes, knots)
+    # nodes - root pair, then unpaired nbs and branch pairs in 5'->3' order
+    nts = [nodes[0][0]]
+    branch = []
+    for n in nodes[1:]:
+        if isinstance(n, tuple):
+            branch.append(len(nts))
+            nts.extend(n)
+        else:
+            nts.append(n)
+    nts.append(nodes[0][1])
+    
+    return _loop_from_arrays(np.array(nts, dtype=np.int32), np.array(branch, dtype=np.int32), knots)
+
+
+def _loop_from_arrays(nts, branch, knots=None, kind=None):
+    if kind is None:
+        kind = _loop_kind(len(nts), branch)
+    return LOOP_TYPES[kind](nts, branch, knots)
+
+
+def _loop_kind(length, branch) -> int:
+    if len(branch)==0:
+        return 0 # hairpin
     
-    elif c>2:
-        return Junction(nodes, knots)
+    elif len(branch)>1:
+        return 3 # junction
     
-    elif isinstance(nodes[1], tuple) or isinstance(nodes[-1], tuple):
-        return Bulge(nodes, knots)
+    elif branch[0]==1 or branch[0]==length-3:
+        return 2 # bulge
     
     else:
-        return InternalLoop(nodes, knots)
+        return 1 # internal loop
         
     
 class Loop:
+    """
+    Loop closed by root pair. Stored as int32 array of nbs from root 5'-end to root 3'-end 
+    and array of positions in it where branch pairs start.
+    """
     
-    __slots__ = '__nodes', '__knots'
+    __slots__ = '__nts', '__branch', '__knots'
     
-    def __init__(self, nodes, knots=None):
-        self.__nodes = nodes
+    def __init__(self, nts, branch, knots=None):
+        self.__nts = nts
+        self.__branch = branch
         self.__knots = knots
         
         
     @property
     def nodes(self):
-        return self.__nodes
+        nts = self.__nts.tolist()
+        nodes = [(nts[0], nts[-1])]
+        
+        prev = 1
+        for b in self.__branch.tolist():
+            nodes.extend(nts[prev:b])
+            nodes.append((nts[b], nts[b+1]))
+            prev = b+2
+        nodes.extend(nts[prev:-1])
+        
+        return tuple(nodes)
     
     
     @property
@@ -82,38 +121,40 @@ class Loop:
     
     @property
     def nts(self):
-        nts = [self.__nodes[0][0]]
-        for i in range(1, len(self.__nodes)):
-            n = self.__nodes[i]
-            if isinstance(n, int):
-                nts.append(n)
-            else:
-                nts.append(n[0])
-                nts.append(n[1])
-        nts.append(self.__nodes[0][1])
-        return nts
+        return self.__nts.tolist()
+    
+    
+    @property
+    def nts_array(self):
+        """
+        Read-only int32 array of loop nbs.
+        """
+        a = self.__nts.view()
+        a.flags.writeable = False
+        return a
     
     
     @property
     def branches(self):
-        return tuple((n for n in self.__nodes if isinstance(n, tuple)))
+        nts = self.__nts
+        return (self.root, *[(int(nts[b]), int(nts[b+1])) for b in self.__branch])
     
     
     @property
     def root(self):
-        return self.__nodes[0]
+        return int(self.__nts[0]), int(self.__nts[-1])
     
     
     def __len__(self):
-        return len(self.__nodes) + len(self.branches)
+        return len(self.__nts)
     
     
     def __iter__(self):
-        return self.nts
+        return iter(self.nts)
     
     
     def __str__(self):
-        return str(self.__nodes)
+        return str(self.nodes)
     
     
     def __repr__(self):
@@ -124,8 +165,8 @@ class Hairpin(Loop):
     
     __slots__ = tuple()
     
-    def __init__(self, nodes, knots):
-        super().__init__(nodes, knots)
+    def __init__(self, nts, branch, knots):
+        super().__init__(nts, branch, knots)
         
         
     def __str__(self):
@@ -136,16 +177,11 @@ class InternalLoop(Loop):
     
     __slots__ = "short_side", "long_side"
     
-    def __init__(self, nodes, knots):
-        super().__init__(nodes, knots)
+    def __init__(self, nts, branch, knots):
+        super().__init__(nts, branch, knots)
         
-        a = 1
-        for i in range(2, len(self.nodes)):
-            if isinstance(self.nodes[i], tuple):
-                break
-            a+=1
-        
-        b = len(self.nodes) - 2 - a
+        a = int(branch[0]) - 1 # unpaired nbs before branch
+        b = len(nts) - 4 - a
         self.short_side = min(a, b)
         self.long_side = max(a, b)
         
@@ -162,8 +198,8 @@ class Bulge(Loop):
     
     __slots__ = tuple()
     
-    def __init__(self, nodes, knots):
-        super().__init__(nodes, knots)
+    def __init__(self, nts, branch, knots):
+        super().__init__(nts, branch, knots)
         
         
     def __str__(self):
@@ -174,17 +210,12 @@ class Junction(Loop):
     
     __slots__ = tuple()
     
-    def __init__(self, nodes, knots):
-        super().__init__(nodes, knots)
+    def __init__(self, nts, branch, knots):
+        super().__init__(nts, branch, knots)
         
         
     def __str__(self):
         return "J-"+super().__str__()
-        
-        
-        
-        
-        
     
     
-    
\ No newline at end of file
+LOOP_TYPES = (Hairpin, InternalLoop, Bulge, Junction)
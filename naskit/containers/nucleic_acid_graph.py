@@ -1,19 +1,38 @@
 from functools import cached_property
-from typing import List, Optional, Tuple, Union
+from bisect import bisect_left
+from hashlib import blake2b
+from typing import Iterable, List, Optional, Tuple, Union
 import numpy as np
 import numpy
 
 from .graph import SimplifiedLinearGraph
-from .nucleic_acid_fragments import Helix, _make_loop, Hairpin, InternalLoop, Bulge, Junction
+from .pair_table import pair_arrays, helix_bounds, crossing_orders, fix_sharp_hairpins, loop_arrays
+from .nucleic_acid_edit import NucleicAcidEdit
+from .nucleic_acid_fragments import Helix, LOOP_TYPES, Hairpin, InternalLoop, Bulge, Junction
 
 
 
 HELIX_ORDER = {0:'()', 1:'[]', 2:'{}', 3:'<>', 4:'Aa', 5:'Bb', 6:'Cc', 7:'Dd', 8:'Ee', 9:'Ff'}
+ADJACENCY_FORMATS = ('dense', 'coo', 'csr', 'pairs')
+NESTED_CACHE_KEYS = ('struct', 'helixes', 'helix_orders', 'loops', '_loop_kinds')
+
+
+def _bisect_fragments(fragments: tuple, i: int) -> int:
+    # index of the first fragment with start >= i, fragments must be sorted by start
+    lo, hi = 0, len(fragments)
+    while lo<hi:
+        mid = (lo+hi)//2
+        if fragments[mid].root[0]<i:
+            lo = mid+1
+        else:
+            hi = mid
+    return lo
 
 
 class NucleicAcidGraph(SimplifiedLinearGraph):
 
-    GRAPH_CACHE_KEYS = ('struct', 'pairs', 'helixes', 'helix_orders', 'knots', 'knot_helixes', 'knot_pairs', 'loops')
+    GRAPH_CACHE_KEYS = ('struct', 'pairs', 'helixes', 'helix_orders', 'knots', 'knot_helixes', 'knot_pairs', 'loops', 
+                        '_loop_kinds', 'dangling_ends', '_digest')
     
     def __init__(self):
         super().__init__()
@@ -21,7 +40,11 @@ class NucleicAcidGraph(SimplifiedLinearGraph):
         
     def complnb(self, n: int) -> Optional[int]:
         n = n+len(self) if n<0 else n
-        return self._bonds.get(n, None)
+        if not 0<=n<len(self):
+            return None
+        
+        m = self._pt[n]
+        return m if m>=0 else None
         
 
     def join(self, n: int, m: int):
@@ -37,13 +60,13 @@ class NucleicAcidGraph(SimplifiedLinearGraph):
         if n==m: 
             raise ValueError("Can not join nb with itself")
             
-        if self.complnb(n):
+        if self.complnb(n) is not None:
             raise ValueError(f"Nb {n} already has complementary bond")
-        if self.complnb(m):
+        if self.complnb(m) is not None:
             raise ValueError(f"Nb {m} already has complementary bond")
 
         self._add_bond(n, m)
-        self.clear_graph_cache()
+        self.update_graph_cache(n, m)
     
 
     def split(self, n: int, m: int, clear_cache: bool = True):
@@ -61,7 +84,31 @@ class NucleicAcidGraph(SimplifiedLinearGraph):
 
         self._remove_bond(n, m)
         if clear_cache:
-            self.clear_graph_cache()
+            self.update_graph_cache(n, m)
+        else:
+            self.__dict__.pop('_digest', None)
+        
+        
+    def edit(self) -> NucleicAcidEdit:
+        """
+        Starts transaction of joins, splits and nb mutations, which are applied at once on commit.
+        
+        with na.edit() as e:
+            e.split(2, 10)
+            e.join(3, 9)
+            e.mutate(5, 'G')
+        """
+        return NucleicAcidEdit(self)
+    
+    
+    def apply_edits(self, edits: Iterable[Tuple]):
+        """
+        Applies all edits at once or none of them if any edit is invalid.
+
+        :param edits: tuples ('join', n, m), ('split', n, m) or ('mutate', n, nb).
+        """
+        with self.edit() as e:
+            e.apply(edits)
         
         
     def fix_sharp_hairpins(self, min_pin_size: int = 1):
@@ -71,75 +118,182 @@ class NucleicAcidGraph(SimplifiedLinearGraph):
         if not isinstance(min_pin_size, int) or (min_pin_size<1):
             raise ValueError("min_pin_size must be integer >= 1")
             
-        check_helixes=True
-        while check_helixes:
-            helixes = self.helixes
-            orders = self.helix_orders
-            check_helixes = False
-            
-            for i, h in enumerate(helixes):
-                if orders[i]: # pseudoknot helix
-                    continue
-
-                pin_size = h.clc[0] - h.opc[-1] - 1
-                if pin_size>=min_pin_size:
-                    continue
-
-                n_pairs_to_remove = (dif:=min_pin_size-pin_size)//2 + dif%2
-                for j in range(1, n_pairs_to_remove+1):
-                    if j>len(h): # end of helix
-                        break
-
-                    self.split(*h[-j], clear_cache=False)
-                    check_helixes=True
-                
+        pt = fix_sharp_hairpins(self.pair_table, min_pin_size)
+        if not np.array_equal(pt, self._pt_view()):
+            self._set_graph(self._seq, pt)
             self.clear_graph_cache()
+            
+            
+    def digest(self) -> bytes:
+        """
+        128-bit blake2b digest of sequence and complementary bonds. 
+        Computed once and cached until the next edit.
+        """
+        d = self.__dict__.get('_digest')
+        if d is None:
+            h = blake2b(self._seq, digest_size=16)
+            h.update(self._pt)
+            d = self.__dict__['_digest'] = h.digest()
+        return d
 
 
     def clear_graph_cache(self):
         for key in self.GRAPH_CACHE_KEYS:
             if key in self.__dict__:
                 del self.__dict__[key]
+                
+    ################################  Incremental cache
+    
+    def update_graph_cache(self, n: int, m: int):
+        """
+        Updates cached properties after single bond between nbs n and m was created or broken.
+        Only fragments around the bond are rebuilt if structure is nested before and after the edit, 
+        otherwise structural caches are cleared.
+        """
+        cache = self.__dict__
+        n, m = min(n, m), max(n, m)
+        joined = self._pt[n]==m
+        
+        cache.pop('_digest', None)
+        if not isinstance(cache.get('struct', ''), str): # structure of nucleic acid without bonds is None
+            cache.pop('struct')
+        if 'pairs' in cache:
+            cache['pairs'] = self._patch_pairs(cache['pairs'], n, m, joined)
+        cache.pop('dangling_ends', None)
+        
+        if not any([key in cache for key in NESTED_CACHE_KEYS]):
+            return
+        
+        if not self._is_nested_edit(n, m, joined):
+            for key in NESTED_CACHE_KEYS:
+                cache.pop(key, None)
+            return
+        
+        if 'helixes' in cache:
+            cache['helixes'] = self._patch_helixes(cache['helixes'], n, m, joined)
+            
+        if 'helix_orders' in cache:
+            cache['helix_orders'] = (0,)*len(self.helixes)
+            
+        cache.pop('_loop_kinds', None)
+        if 'loops' in cache:
+            cache['loops'] = self._patch_loops(cache['loops'], n, m)
+            
+        if 'struct' in cache:
+            s = cache['struct']
+            brackets = '()' if joined else '..'
+            cache['struct'] = f"{s[:n]}{brackets[0]}{s[n+1:m]}{brackets[1]}{s[m+1:]}"
+            
+            
+    def _is_nested_edit(self, n: int, m: int, joined: bool) -> bool:
+        # structure before edit has no pseudoknots
+        cache = self.__dict__
+        if 'helix_orders' in cache:
+            if any(cache['helix_orders']):
+                return False
+        elif isinstance(s:=cache.get('struct'), str):
+            if s.count('(') + s.count(')') + s.count('.')!=len(s):
+                return False
+        else:
+            cache.pop('struct', None)
+            return False
+        
+        if not joined:
+            return True
+        
+        # new bond does not cross existing bonds
+        inner = self._pt_view()[n+1:m]
+        return not np.any((inner>=0) & ((inner<n) | (inner>m)))
+    
+    
+    def _patch_pairs(self, pairs: Tuple[Tuple[int, int]], n: int, m: int, joined: bool) -> Tuple[Tuple[int, int]]:
+        i = bisect_left(pairs, (n, m))
+        if joined:
+            return pairs[:i] + ((n, m),) + pairs[i:]
+        return pairs[:i] + pairs[i+1:]
+        
+        
+    def _patch_helixes(self, helixes: Tuple[Helix], n: int, m: int, joined: bool) -> Tuple[Helix]:
+        pt = self._pt
+        
+        if not joined: # split helix containing the pair
+            i = _bisect_fragments(helixes, n+1) - 1
+            h = helixes[i]
+            k, hlen = n - h.opc[0], len(h)
+            parts = []
+            if k>0:
+                parts.append(Helix(h.opc[:k], h.clc[hlen-k:]))
+            if k<hlen-1:
+                parts.append(Helix(h.opc[k+1:], h.clc[:hlen-k-1]))
+            return helixes[:i] + tuple(parts) + helixes[i+1:]
+        
+        outer = n>0 and m<len(self)-1 and pt[n-1]==m+1
+        inner = n+1<m and pt[n+1]==m-1
+        
+        if outer and inner: # merge helixes
+            i = _bisect_fragments(helixes, n) - 1
+            a, b = helixes[i], helixes[i+1]
+            return helixes[:i] + (Helix(a.opc + (n,) + b.opc, b.clc + (m,) + a.clc),) + helixes[i+2:]
+        
+        if outer: # extend helix to the loop
+            i = _bisect_fragments(helixes, n) - 1
+            h = helixes[i]
+            return helixes[:i] + (Helix(h.opc + (n,), (m,) + h.clc),) + helixes[i+1:]
+        
+        i = _bisect_fragments(helixes, n)
+        if inner: # extend helix from the loop
+            h = helixes[i]
+            return helixes[:i] + (Helix((n,) + h.opc, h.clc + (m,)),) + helixes[i+1:]
+        
+        return helixes[:i] + (Helix((n,), (m,)),) + helixes[i:]
+    
+    
+    def _enclosing_pair(self, i: int) -> Optional[Tuple[int, int]]:
+        # closest pair containing nb i, structure must be nested
+        pt = self._pt
+        k = i-1
+        while k>=0:
+            c = pt[k]
+            if c>i:
+                return (k, c)
+            k = c-1 if 0<=c<k else k-1 # skip closed branch
+        return None
+    
+    
+    def _patch_loops(self, loops: tuple, n: int, m: int) -> tuple:
+        pt = self._pt
+        loops = list(loops)
+        roots = [r for r in (self._enclosing_pair(n), (n, m)) if r is not None]
+        
+        for root in roots:
+            i = _bisect_fragments(loops, root[0])
+            if i<len(loops) and loops[i].root==root:
+                loops.pop(i)
+                
+        for root in roots:
+            o, e = root
+            if pt[o]==e and not (o+1<e and pt[o+1]==e-1): # innermost pair of helix
+                i = _bisect_fragments(loops, o)
+                loops.insert(i, self._patched_loop(root))
+                
+        return tuple(loops)
     
 
     @cached_property
     def pairs(self) -> Tuple[Tuple[int, int]]:
-        pairs = []
-        used = set()
-        
-        bond_pairs = sorted(self._bonds.items(), key=lambda x: x[0])
-        for o, e in bond_pairs:
-            if o in used:
-                continue
-                
-            pairs.append((o, e))
-            used.add(e)
-        
-        return tuple(pairs)
+        opening, closing = pair_arrays(self._pt_view())
+        return tuple(zip(opening.tolist(), closing.tolist()))
         
     
     @cached_property
     def helixes(self) -> Tuple[Helix]:
+        opening, closing = pair_arrays(self._pt_view())
+        bounds = helix_bounds(opening, closing)
+        opening, closing = opening.tolist(), closing.tolist()
+        
         helixes = []
-        op = []
-        close = []
-
-        for o, e in self.pairs:
-            if len(op)==0:
-                op.append(o)
-                close.append(e)
-                continue
-
-            if o-op[-1]==1 and close[-1]-e==1:
-                op.append(o)
-                close.append(e)
-            else:
-                helixes.append(Helix(tuple(op), tuple(close[::-1])))
-                op = [o]
-                close = [e]
-
-        if len(op)!=0:
-            helixes.append(Helix(tuple(op), tuple(close[::-1])))
+        for s, e in zip(bounds[:-1], bounds[1:]):
+            helixes.append(Helix(opening[s:e], closing[s:e][::-1]))
         
         return tuple(helixes)
         
@@ -151,22 +305,15 @@ class NucleicAcidGraph(SimplifiedLinearGraph):
 
     @cached_property
     def helix_orders(self) -> Tuple[int]:
+        """
+        Lowest type of brackets for every helix which is not used by previous intersecting helixes.
+        If a helix crosses all types of brackets, it and all next helixes get order 0.
+        """
         helixes = self.helixes
-        orders = [0 for _ in range(len(helixes))]
-        order_range_set = set(range(len(HELIX_ORDER)))
-
-        for i, h in enumerate(helixes):
-            intersection_orders = set()
-            for prev_h in range(i):
-                if self._helix_intersect(h, helixes[prev_h]):
-                    intersection_orders.add(orders[prev_h])
-
-            if len(intersection_orders)>=len(HELIX_ORDER):
-                break
-
-            lowest_helix_order = min(order_range_set - intersection_orders) # lowest type of brackets
-            orders[i] = lowest_helix_order
-
+        orders = crossing_orders([h.opc[-1] for h in helixes], 
+                                 [h.clc[0] for h in helixes], 
+                                 [h.clc[-1] for h in helixes], 
+                                 max_orders=len(HELIX_ORDER))
         return tuple(orders)
 
 
@@ -213,95 +360,85 @@ class NucleicAcidGraph(SimplifiedLinearGraph):
     
     @cached_property
     def loops(self) -> Tuple[Union[Hairpin, InternalLoop, Bulge, Junction]]:
-        knots = set(self.knots)
-        knot_nbs = set()
-        for i, j in self.knot_pairs:
-            knot_nbs.add(i)
-            knot_nbs.add(j)
-
-        loops = []
-        for i, h in enumerate(self.helixes):
-            if i in knots:
-                continue
+        pt = self._pt_view()
+        knot = np.zeros(len(pt), dtype=bool)
+        for i in self.knots:
+            h = self.helixes[i]
+            knot[list(h.opc)] = True
+            knot[list(h.clc)] = True
             
-            root = h[-1]
-            end_idx = root[1]
-            loop = [h[-1],]
-            idx = root[0] + 1
-
-            knot_helix = []
-            last_knot_idx = None
-            last_compl_idx = None
-            knot_helixes = []
-            while True:
-                if idx==end_idx: # end of the loop
-                    break
-
-                if ((cidx:=self.complnb(idx)) is not None): # nb has complementary bond
-                    # normal helix
-                    if idx not in knot_nbs: 
-                        loop.append((idx, cidx))
-                        idx = cidx+1
-                        continue
-
-                    # knot helix
-                    if last_knot_idx is None: # first knot nb
-                        knot_helix.append(idx)
-
-                    elif abs(last_knot_idx-idx)>1 or abs(last_compl_idx-cidx)>1: # new knot helix
-                        knot_helixes.append(tuple(knot_helix))
-                        knot_helix = [idx]
-
-                    else: # continue knot
-                        knot_helix.append(idx)
-
-                    last_knot_idx = idx
-                    last_compl_idx = cidx
-
-                loop.append(idx)
-                idx+=1
-
-            if len(knot_helix)>0:
-                knot_helixes.append(tuple(knot_helix))
-                loops.append(_make_loop(tuple(loop), tuple(knot_helixes)))
-            else:
-                loops.append(_make_loop(tuple(loop)))
-
-        return tuple(loops)
+        nts, bounds, branch, branch_bounds, kinds, knot_nts, knot_starts = loop_arrays(pt, knot)
+        
+        knots = [None]*len(kinds)
+        if len(knot_nts):
+            groups = np.split(nts[knot_nts], np.flatnonzero(knot_starts)[1:])
+            loop_ids = np.searchsorted(bounds, knot_nts[knot_starts], side='right') - 1
+            for l, g in zip(loop_ids.tolist(), groups):
+                knots[l] = (knots[l] or ()) + (tuple(g.tolist()),)
+        
+        bounds, branch_bounds = bounds.tolist(), branch_bounds.tolist()
+        loops = tuple([LOOP_TYPES[k](nts[bounds[i]:bounds[i+1]], 
+                                     branch[branch_bounds[i]:branch_bounds[i+1]], 
+                                     knots[i]) 
+                       for i, k in enumerate(kinds.tolist())])
+        
+        self.__dict__['_loop_kinds'] = kinds
+        return loops
+    
+    
+    def _patched_loop(self, root: Tuple[int, int]) -> Union[Hairpin, InternalLoop, Bulge, Junction]:
+        # loop closed by the innermost helix pair root, structure must be nested
+        o, e = root
+        pt = self._pt_view()[o:e+1]
+        nts, bounds, branch, branch_bounds, kinds, _, _ = loop_arrays(np.where(pt>=0, pt-o, -1), 
+                                                                      np.zeros(len(pt), dtype=bool))
+        # loops are ordered by root 5'-end, the first one is closed by root
+        return LOOP_TYPES[kinds[0]](nts[:bounds[1]] + o, branch[:branch_bounds[1]], None)
+    
+    
+    @cached_property
+    def _loop_kinds(self) -> numpy.array:
+        return np.array([LOOP_TYPES.index(l.__class__) for l in self.loops], dtype=int)
+    
+    
+    def _loops_of_kind(self, kind: int) -> tuple:
+        loops = self.loops
+        return tuple([loops[i] for i in np.flatnonzero(self._loop_kinds==kind).tolist()])
     
     
     @property
     def hairpins(self) -> Tuple[Hairpin]:
-        return tuple([l for l in self.loops if isinstance(l, Hairpin)])
+        return self._loops_of_kind(0)
     
     
     @property
     def internal_loops(self) -> Tuple[InternalLoop]:
-        return tuple([l for l in self.loops if isinstance(l, InternalLoop)])
+        return self._loops_of_kind(1)
     
     
     @property
     def bulges(self) -> Tuple[Bulge]:
-        return tuple([l for l in self.loops if isinstance(l, Bulge)])
+        return self._loops_of_kind(2)
     
     
     @property
     def junctions(self) -> Tuple[Junction]:
-        return tuple([l for l in self.loops if isinstance(l, Junction)])
+        return self._loops_of_kind(3)
     
     
     @cached_property
     def dangling_ends(self) -> Tuple[Tuple[int], Tuple[int]]:
+        pt = self._pt
         end5 = []
         end3 = []
         for i in range(len(self)):
-            if self.complnb(i) is None:
+            if pt[i]<0:
                 end5.append(i)
             else:
                 break
                 
         for j in range(len(self)-1, i, -1):
-            if self.complnb(j) is None:
+            if pt[j]<0:
                 end3.append(j)
             else:
                 break
@@ -309,12 +446,36 @@ class NucleicAcidGraph(SimplifiedLinearGraph):
         return tuple(end5), tuple(end3[::-1])
 
 
-    def get_adjacency(self) -> numpy.array:
-        slen = len(self)
-        adj = np.zeros((slen, slen), dtype=np.int32)
+    def get_adjacency(self, format: str = 'dense') -> Union[numpy.array, Tuple[numpy.array, numpy.array]]:
+        """
+        Adjacency of complementary bonds.
+
+        :param format: 'dense' - int32 N x N matrix, 
+                       'coo' - (row, col) coordinates of nonzero values, every bond is listed in both directions, 
+                       'csr' - (indptr, indices) of compressed sparse rows, 
+                       'pairs' - (2, P) array of opening and closing nbs.
+
+        :return: adjacency in specified format.
+        """
+        if format not in ADJACENCY_FORMATS:
+            raise ValueError(f"Unknown adjacency format '{format}', expected one of: {', '.join(ADJACENCY_FORMATS)}")
+            
+        pt = self._pt_view()
+        paired = np.flatnonzero(pt>=0)
+        
+        if format=='coo':
+            return paired, pt[paired].astype(np.int64)
+        
+        if format=='csr':
+            indptr = np.zeros(len(pt)+1, dtype=np.int64)
+            np.cumsum(pt>=0, out=indptr[1:])
+            return indptr, pt[paired].astype(np.int64)
         
-        for o, e in self.pairs:
-            adj[o, e] = 1
-            adj[e, o] = 1
+        if format=='pairs':
+            return np.stack(pair_arrays(pt)).astype(np.int64)
+        
+        slen = len(pt)
+        adj = np.zeros((slen, slen), dtype=np.int32)
+        adj[paired, pt[paired]] = 1
             
-        return adj
\ No newline at end of file
+        return adj
@@ -0,0 +1,379 @@
+from typing import List, Tuple
+from array import array
+import numpy as np
+import numpy
+
+from ..exceptions import InvalidAdjacency
+
+
+
+BATCH_CHUNK_ELEMENTS = 1<<16
+BRACKET_TYPES = 10 # types of brackets of dot structure
+
+
+def pair_arrays(pt: numpy.array) -> Tuple[numpy.array, numpy.array]:
+    """
+    Splits pair table into arrays of 5'-end and 3'-end indexes of complementary pairs.
+
+    :param pt: int32 pair table, pt[i] - index of complementary nb or -1.
+
+    :return: opening and closing indexes sorted by opening index.
+    """
+    opening = np.flatnonzero(pt > np.arange(len(pt)))
+    return opening, pt[opening]
+
+
+def pair_table_from_pairs(i: numpy.array, 
+                          j: numpy.array, 
+                          length: int, 
+                          symmetric: bool = False
+                         ) -> numpy.array:
+    """
+    Builds pair table from arrays of complementary nbs. Validation takes O(P + N) for P pairs.
+
+    :param i: indexes of nbs.
+    :param j: indexes of complementary nbs.
+    :param length: sequence length.
+    :param symmetric: every bond is listed in both directions (i, j) and (j, i) as in coordinates of symmetric adjacency, 
+                      otherwise every bond is listed once in any direction.
+
+    :return: int32 pair table.
+    """
+    i = np.asarray(i).ravel()
+    j = np.asarray(j).ravel()
+    if len(i)!=len(j):
+        raise InvalidAdjacency(f"Pair arrays must have equal length, got {len(i)} and {len(j)}")
+        
+    if len(i)==0:
+        return np.full(length, -1, dtype=np.int32)
+    
+    if not (np.issubdtype(i.dtype, np.integer) and np.issubdtype(j.dtype, np.integer)):
+        raise InvalidAdjacency(f"Pair indexes must be integers")
+    
+    if min(i.min(), j.min())<0 or max(i.max(), j.max())>=length:
+        raise InvalidAdjacency(f"Pair index is out of range for length {length}")
+        
+    if (i==j).any():
+        raise InvalidAdjacency(f"Nb can not be paired with itself")
+        
+    nbs = i if symmetric else np.concatenate((i, j))
+    if (np.bincount(nbs, minlength=length)>1).any():
+        raise InvalidAdjacency(f"Several complementary bonds for one nucleic base is ambiguous")
+    
+    pt = np.full(length, -1, dtype=np.int32)
+    pt[i] = j
+    if symmetric:
+        if (pt[j]!=i).any():
+            raise InvalidAdjacency(f"Adjacency must be symmetric")
+    else:
+        pt[j] = i
+        
+    return pt
+    
+
+def helix_bounds(opening: numpy.array, closing: numpy.array) -> List[int]:
+    """
+    Finds boundaries of stacked pairs. Helix k consists of pairs [bounds[k], bounds[k+1]).
+
+    :param opening: sorted 5'-end indexes of pairs.
+    :param closing: 3'-end indexes of pairs.
+
+    :return: list of helix boundaries in pairs arrays.
+    """
+    if len(opening)==0:
+        return [0]
+
+    breaks = np.flatnonzero((np.diff(opening)!=1) | (np.diff(closing)!=-1)) + 1
+    return [0, *breaks.tolist(), len(opening)]
+
+
+def _fenwick_update(tree: array, i: int, value: int):
+    i += 1
+    while i<len(tree):
+        if tree[i]<value:
+            tree[i] = value
+        i += i & (-i)
+        
+        
+def _fenwick_prefix_max(tree: array, i: int) -> int:
+    # maximum over positions [0, i)
+    res = -1
+    while i>0:
+        if tree[i]>res:
+            res = tree[i]
+        i -= i & (-i)
+    return res
+
+
+def crossing_orders(inner_opening: List[int], 
+                    inner_closing: List[int], 
+                    outer_closing: List[int], 
+                    max_orders: int = None
+                   ) -> List[int]:
+    """
+    Greedy bracket order assignment for helixes sorted by 5'-end. 
+    Every helix gets the lowest order that is not used by previous helixes crossing it:
+    prev_inner_closing > inner_opening and prev_outer_closing < inner_closing.
+    
+    For every order a Fenwick tree indexed by rank of outer closing index keeps maximum of inner closing indexes, 
+    so a crossing check is a single prefix query. Trees have H+1 int32 elements, 
+    assignment takes O(H*K*logH) for H helixes and K orders.
+
+    :param inner_opening: 5'-end index of the innermost pair of every helix.
+    :param inner_closing: 3'-end index of the innermost pair of every helix.
+    :param outer_closing: 3'-end index of the outermost pair of every helix.
+    :param max_orders: number of available orders. If a helix crosses all of them, it and all next helixes get order 0. Default - None, not limited.
+
+    :return: list of orders.
+    """
+    # outer closing indexes of different helixes are distinct, 
+    # number of them before inner closing index is the prefix of crossing candidates
+    sorted_closing = np.sort(np.asarray(outer_closing, dtype=np.int64))
+    ranks = np.searchsorted(sorted_closing, outer_closing).tolist()
+    prefixes = np.searchsorted(sorted_closing, inner_closing).tolist()
+    empty_tree = array('i', [-1])*(len(ranks)+1)
+    
+    trees = []
+    orders = []
+    for a, b, prefix, c in zip(inner_opening, inner_closing, prefixes, ranks):
+        order = 0
+        while order<len(trees) and _fenwick_prefix_max(trees[order], prefix)>a:
+            order += 1
+            
+        if order==max_orders:
+            orders.extend([0]*(len(ranks)-len(orders)))
+            break
+        
+        if order==len(trees):
+            trees.append(array('i', empty_tree))
+            
+        _fenwick_update(trees[order], c, b)
+        orders.append(order)
+        
+    return orders
+
+
+def nested_rows(pts: numpy.array) -> numpy.array:
+    """
+    Checks that pairs do not cross each other (no pseudoknots).
+    Pairs are nested iff every pair encloses equal number of opening and closing nbs.
+
+    :param pts: batch of pair tables (B, L) padded with -1.
+
+    :return: bool array (B,).
+    """
+    idx = np.arange(pts.shape[1])
+    opening = pts>idx
+    closing = (pts>=0) & (pts<idx)
+    
+    balance = np.cumsum(opening, axis=1) - np.cumsum(closing, axis=1)
+    inner_end = np.where(opening, pts-1, 0)
+    crossed = opening & (np.take_along_axis(balance, inner_end, axis=1)!=balance)
+    
+    return ~crossed.any(axis=1)
+    
+
+def sharp_hairpin_openings(pt: numpy.array, min_pin_size: int, skip: numpy.array = None) -> numpy.array:
+    """
+    Finds pairs to break, so that inner loop of every helix has at least min_pin_size nbs.
+    For every helix ceil((min_pin_size - pin_size)/2) innermost pairs are selected.
+
+    :param pt: pair table (L,) or batch of pair tables (B, L) padded with -1.
+    :param min_pin_size: minimal number of nbs inside innermost pair of helix.
+    :param skip: optional bool mask of opening nbs, which helixes are not changed.
+
+    :return: bool mask of opening nbs of pairs to break.
+    """
+    idx = np.arange(pt.shape[-1])
+    opening = pt>idx
+    
+    stacked = np.zeros_like(opening)
+    stacked[..., :-1] = opening[..., :-1] & opening[..., 1:] & (pt[..., 1:]==pt[..., :-1]-1)
+    
+    # index of innermost opening nb of the helix for every opening nb
+    ends = np.where(opening & ~stacked, idx, pt.shape[-1])
+    innermost = np.flip(np.minimum.accumulate(np.flip(ends, -1), axis=-1), -1)
+    innermost = np.minimum(innermost, pt.shape[-1]-1)
+    
+    pin_size = np.take_along_axis(pt, innermost, axis=-1) - innermost - 1
+    n_remove = (min_pin_size - pin_size + 1)//2
+    
+    remove = opening & ((innermost - idx) < n_remove)
+    if skip is not None:
+        remove &= ~skip
+    return remove
+
+
+def break_pairs(pt: numpy.array, openings: numpy.array):
+    """
+    Breaks pairs inplace by bool mask of opening nbs.
+    """
+    rows, o = np.nonzero(np.atleast_2d(openings))
+    pt2d = pt.reshape(-1, pt.shape[-1])
+    e = pt2d[rows, o]
+    pt2d[rows, o] = -1
+    pt2d[rows, e] = -1
+    
+
+def knot_openings(pt: numpy.array) -> numpy.array:
+    """
+    Bool mask of opening nbs of pseudoknot helixes (helixes with order>0).
+    """
+    opening, closing = pair_arrays(pt)
+    bounds = helix_bounds(opening, closing)
+    starts, ends = bounds[:-1], bounds[1:]
+    
+    orders = crossing_orders([opening[e-1] for e in ends], 
+                             [closing[e-1] for e in ends], 
+                             [closing[s] for s in starts], 
+                             max_orders=BRACKET_TYPES)
+    
+    mask = np.zeros(len(pt), dtype=bool)
+    mask[opening] = np.repeat(np.array(orders, dtype=int)>0, np.diff(bounds))
+    return mask
+
+
+def fix_sharp_hairpins(pt: numpy.array, min_pin_size: int = 1) -> numpy.array:
+    """
+    Breaks complementary bonds at the end of each helix until all hairpins are greater or equal then min_pin_size.
+    Pseudoknot helixes are not changed. Nested structure is fixed in one pass, 
+    pseudoknotted one is repeated while some knot helixes become normal after breaking pairs.
+
+    :param pt: pair table, modified inplace.
+    :param min_pin_size: minimal hairpin size.
+
+    :return: pair table.
+    """
+    while True:
+        if nested_rows(pt[np.newaxis])[0]:
+            break_pairs(pt, sharp_hairpin_openings(pt, min_pin_size))
+            return pt
+        
+        remove = sharp_hairpin_openings(pt, min_pin_size, knot_openings(pt))
+        if not remove.any():
+            return pt
+        break_pairs(pt, remove)
+        
+
+def fix_sharp_hairpins_batch(pts: numpy.array, min_pin_size: int = 1) -> numpy.array:
+    """
+    Breaks complementary bonds at the end of each helix until all hairpins are greater or equal then min_pin_size.
+    All nested structures are processed together, pseudoknotted ones one by one.
+
+    :param pts: batch of pair tables (B, L) padded with -1.
+    :param min_pin_size: minimal hairpin size.
+
+    :return: fixed copy of pair tables.
+    """
+    if not isinstance(min_pin_size, int) or (min_pin_size<1):
+        raise ValueError("min_pin_size must be integer >= 1")
+    
+    pts = np.array(pts, dtype=np.int32)
+    if pts.ndim!=2:
+        raise ValueError(f"Pair tables must have shape (B, L), got {pts.shape}")
+    
+    # rows are processed in chunks, so that temporary arrays stay small
+    chunk_size = max(1, BATCH_CHUNK_ELEMENTS//max(1, pts.shape[1]))
+    for start in range(0, len(pts), chunk_size):
+        chunk = pts[start:start+chunk_size]
+        nested = nested_rows(chunk)
+        
+        if nested.all():
+            break_pairs(chunk, sharp_hairpin_openings(chunk, min_pin_size))
+            continue
+            
+        rows = chunk[nested]
+        break_pairs(rows, sharp_hairpin_openings(rows, min_pin_size))
+        chunk[nested] = rows
+        
+        for i in np.flatnonzero(~nested):
+            fix_sharp_hairpins(chunk[i], min_pin_size)
+        
+    return pts
+
+
+def loop_arrays(pt: numpy.array, knot: numpy.array) -> Tuple[numpy.array, ...]:
+    """
+    Decomposes structure into loops closed by innermost pairs of helixes.
+    Every nb is a member of the loop closed by its nearest enclosing pair and every pair is a root of its own loop. 
+    Stable sort of nbs by the number of enclosing pairs places every loop as a contiguous run 
+    from root 5'-end to root 3'-end, so all loops are found with a fixed number of array passes.
+
+    :param pt: pair table.
+    :param knot: bool mask of pseudoknot nbs, which are considered unpaired.
+
+    :return: nts - int32 concatenated nbs of loops ordered by root 5'-end, 
+             bounds - loop k consists of nts[bounds[k]:bounds[k+1]], 
+             branch - int32 positions of branch 5'-ends inside of their loops, 
+             branch_bounds - branches of loop k are branch[branch_bounds[k]:branch_bounds[k+1]], 
+             kinds - loop types: 0 - hairpin, 1 - internal loop, 2 - bulge, 3 - junction, 
+             knot_nts - indexes of knot nbs in nts, 
+             knot_starts - bool mask of knot_nts, which start a new knot helix.
+    """
+    n = len(pt)
+    idx = np.arange(n)
+    knot_pt = pt
+    pt = np.where(knot, -1, pt)
+    
+    opening = pt>idx
+    closing = (pt>=0) & (pt<idx)
+    paired = opening | closing
+    
+    # number of pairs enclosing nb (or pair)
+    level = np.cumsum(opening) - np.cumsum(closing) - opening
+    
+    # member entry for every nb and root entry for every paired nb, 
+    # root entries belong to the loop one level deeper
+    counts = 1 + paired
+    pos = np.repeat(idx, counts)
+    is_root = np.zeros(len(pos), dtype=bool)
+    is_root[np.cumsum(counts)[paired] - 1] = True
+    keys = level[pos] + is_root
+    
+    if n<(1<<16): # radix sort
+        keys = keys.astype(np.uint16)
+    order = np.argsort(keys, kind='stable')
+    order = order[keys[order]>0] # skip exterior loop
+    pos, is_root = pos[order], is_root[order]
+    
+    # every group starts with root 5'-end and ends with root 3'-end
+    starts = np.flatnonzero(is_root & opening[pos])
+    ends = np.append(starts[1:], len(pos))
+    o = pos[starts]
+    e = pt[o]
+    inner = ~(((e-o)>2) & (pt[np.minimum(o+1, n-1)]==e-1)) # innermost pair of helix
+    
+    slot = np.full(n, -1)
+    slot[o[inner]] = np.flatnonzero(inner)
+    loop_order = slot[slot>=0]
+    starts, ends = starts[loop_order], ends[loop_order]
+    
+    lengths = ends - starts
+    bounds = np.zeros(len(starts)+1, dtype=np.int64)
+    np.cumsum(lengths, out=bounds[1:])
+    gather = np.arange(bounds[-1]) + np.repeat(starts - bounds[:-1], lengths)
+    pos, is_root = pos[gather], is_root[gather]
+    loop_id = np.repeat(np.arange(len(starts)), lengths)
+    
+    is_branch = ~is_root & opening[pos]
+    branch = np.flatnonzero(is_branch)
+    n_branch = np.bincount(loop_id[branch], minlength=len(starts))
+    branch_bounds = np.zeros(len(starts)+1, dtype=np.int64)
+    np.cumsum(n_branch, out=branch_bounds[1:])
+    branch = (branch - bounds[loop_id[branch]]).astype(np.int32)
+    
+    kinds = np.where(n_branch==0, 0, np.where(n_branch>1, 3, 1))
+    if len(starts):
+        # single branch adjacent to root
+        side = is_branch[bounds[:-1]+1] | (~is_root & closing[pos])[bounds[1:]-2]
+        kinds[(n_branch==1) & side] = 2
+    
+    # knot nbs are grouped into helixes by adjacent indexes of nbs and their complementary nbs
+    knot_nts = np.flatnonzero(knot[pos])
+    partner = knot_pt[pos[knot_nts]]
+    knot_starts = np.ones(len(knot_nts), dtype=bool)
+    knot_starts[1:] = (np.diff(loop_id[knot_nts])!=0) | \
+                      (np.abs(np.diff(pos[knot_nts]))>1) | \
+                      (np.abs(np.diff(partner))>1)
+    
+    return pos.astype(np.int32), bounds, branch, branch_bounds, kinds, knot_nts, knot_starts
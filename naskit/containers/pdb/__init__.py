@@ -1,11 +1,12 @@
 from ..pdb.pdbAtom import PdbAtom
+from ..pdb.atomTable import AtomTable
 from ..pdb.pdbMolecule import PdbMolecule
 from ..pdb.pdbResidue import PdbResidue, NucleicAcidResidue, AminoacidResidue
 from ..pdb.pdbContainer import PDB, PDBModels, NucleicAcidChain, ProteinChain
 
 
 
-__all__ = ["PdbAtom", 
+__all__ = ["PdbAtom", "AtomTable", 
            "PdbMolecule", "PdbResidue", "NucleicAcidResidue", "AminoacidResidue", 
            "PDB"
           ]
\ No newline at end of file
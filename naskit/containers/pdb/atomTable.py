@@ -0,0 +1,230 @@
+from typing import Union, List, Iterable, Tuple
+import weakref
+import numpy as np
+from .pdbAtom import PdbAtom
+
+
+
+ATOM_COLUMNS = {
+    "is_hetatm": np.bool_,
+    "anum": np.int32,
+    "aname": str,
+    "altloc": str,
+    "mname": str,
+    "chain": str,
+    "mnum": np.int32,
+    "occupancy": np.float64,
+    "temp": np.float64,
+    "segment": str,
+    "element": str,
+    "charge": np.int8,
+}
+TEXT_COLUMNS = [name for name, dtype in ATOM_COLUMNS.items() if dtype is str]
+# text columns are stored in private slots, they may hold bytes of parsed lines until the first access
+COLUMN_SLOTS = [f"_{name}" if name in TEXT_COLUMNS else name for name in ATOM_COLUMNS]
+
+
+def _decoded_column(name: str) -> property:
+    slot = f"_{name}"
+    
+    def getter(self) -> np.ndarray:
+        column = getattr(self, slot)
+        if column.dtype.kind=='S':
+            root = self._root
+            if root is not self and getattr(root, slot).dtype.kind=='U': # decoded column of viewed table
+                column = getattr(root, slot)[self._start:self._start+len(self)]
+            else:
+                column = column.astype(str)
+            setattr(self, slot, column)
+        return column
+    
+    def setter(self, column: np.ndarray):
+        setattr(self, slot, column)
+        
+    return property(getter, setter)
+
+
+class AtomTable:
+    """
+    Struct of arrays of atoms: coords of shape (N, 3) and a column for every PdbAtom field.
+
+    Tables of PDB, chains and residues are views of the same arrays,
+    coords of atoms are rows of table coords, so changes of coords are shared.
+    Other columns are snapshot of atom fields. Structural edits of containers
+    (adding, deleting, renaming and renumbering) make cached tables of the edited
+    container and its parents stale, they are rebuilt on the next access.
+    Text columns of parsed files are kept as bytes and decoded on the first access.
+    """
+    __slots__ = ("coords", *COLUMN_SLOTS, "_root", "_start")
+    
+    aname = _decoded_column("aname")
+    altloc = _decoded_column("altloc")
+    mname = _decoded_column("mname")
+    chain = _decoded_column("chain")
+    segment = _decoded_column("segment")
+    element = _decoded_column("element")
+
+    def __init__(self, coords: np.ndarray, **columns):
+        """
+        :param coords: float32 array of shape (N, 3).
+        :param columns: array for every name of ATOM_COLUMNS, text columns may be bytes arrays.
+        """
+        self.coords = coords
+        for name, slot in zip(ATOM_COLUMNS, COLUMN_SLOTS):
+            setattr(self, slot, columns[name])
+        
+        # table which arrays are viewed and offset in it
+        self._root = self
+        self._start = 0
+
+
+    @classmethod
+    def from_atoms(cls, atoms: List[PdbAtom], bind: bool = False) -> "AtomTable":
+        """
+        Gathers atom fields to columns.
+
+        :param atoms: list of atoms.
+        :param bind: replace coords of atoms by rows of table coords, 
+                     atoms of containers are detached from tables of containers. Default - False.
+
+        :return: AtomTable.
+        """
+        coords = np.array([a.coords for a in atoms], dtype=np.float32).reshape(-1, 3)
+        columns = {name: np.array([getattr(a, name) for a in atoms], dtype=dtype)
+                   for name, dtype in ATOM_COLUMNS.items()}
+
+        if bind:
+            for a, row in zip(atoms, coords):
+                a._coords = row
+
+        return cls(coords, **columns)
+
+
+    @classmethod
+    def concatenate(cls, tables: Iterable["AtomTable"]) -> "AtomTable":
+        """
+        Joins tables. Consecutive views of the same table are joined without copying.
+        """
+        tables = list(tables)
+        if not tables:
+            return cls.from_atoms([])
+        
+        root, start = tables[0]._root, tables[0]._start
+        end = start
+        for t in tables:
+            if t._root is not root or t._start!=end:
+                break
+            end += len(t)
+        else:
+            return root[start:end]
+            
+        return cls(np.concatenate([t.coords for t in tables]),
+                   **{name: np.concatenate([getattr(t, name) for t in tables]) for name in ATOM_COLUMNS})
+
+
+    def __len__(self):
+        return self.coords.shape[0]
+
+
+    def __getitem__(self, i: Union[int, slice, list, np.ndarray]):
+        if isinstance(i, (int, np.integer)):
+            row = {"coords": self.coords[i]}
+            for name, slot in zip(ATOM_COLUMNS, COLUMN_SLOTS):
+                value = getattr(self, slot)[i].item()
+                row[name] = value.decode() if isinstance(value, bytes) else value
+            return row
+
+        # slice - views of columns, indices and boolean mask - copies
+        table = self.__class__.__new__(self.__class__)
+        table.coords = self.coords[i]
+        for slot in COLUMN_SLOTS:
+            setattr(table, slot, getattr(self, slot)[i])
+        table._root = table
+        table._start = 0
+        if isinstance(i, slice):
+            start, _, step = i.indices(len(self))
+            if step==1:
+                table._root = self._root
+                table._start = self._start + start
+        return table
+
+
+    def __repr__(self):
+        return f"{self.__class__.__name__} with {len(self)} atoms at {hex(id(self))}"
+
+
+    def copy(self) -> "AtomTable":
+        return self.__class__(self.coords.copy(), 
+                              **{name: getattr(self, slot).copy() for name, slot in zip(ATOM_COLUMNS, COLUMN_SLOTS)})
+
+
+    def atoms(self) -> List[PdbAtom]:
+        """
+        Makes new atoms with coords bound to rows of table coords.
+        """
+        columns = [getattr(self, name).tolist() for name in ATOM_COLUMNS]
+        atoms = []
+        for row, (is_hetatm, anum, aname, altloc, mname, chain, mnum,
+                  occupancy, temp, segment, element, charge) in zip(self.coords, zip(*columns)):
+
+            atom = PdbAtom(is_hetatm, anum, aname, altloc, mname, chain, mnum,
+                           0., 0., 0., occupancy, temp, segment, element, charge)
+            atom._coords = row
+            atoms.append(atom)
+
+        return atoms
+
+
+
+
+class AtomTableOwner:
+    """
+    Base of containers with cached AtomTable. Every edit increases revision of the edited
+    container and of containers it was added to, table built at older revision is rebuilt.
+    Containers keep weak references to parents, so slices and copies do not hold each other.
+    """
+    __slots__ = ()
+
+    def _init_table(self):
+        self._table = None
+        self._table_revision = -1
+        self._revision = 0
+        self._parents = None
+
+
+    def _table_rows(self) -> Tuple[AtomTable, int, int]:
+        # viewed table and range of its rows of up to date table
+        table = self.table
+        return table._root, table._start, table._start + len(table)
+
+
+    def _add_parent(self, parent: "AtomTableOwner"):
+        if self._parents is None:
+            self._parents = []
+        self._parents.append(weakref.ref(parent))
+        
+        
+    def _adopt(self, children: List["AtomTableOwner"]):
+        # _add_parent of many children with one weak reference
+        ref = weakref.ref(self)
+        for c in children:
+            if c._parents is None:
+                c._parents = [ref]
+            else:
+                c._parents.append(ref)
+
+
+    def _touch(self):
+        # structural edit
+        self._revision += 1
+        self._touch_parents()
+
+
+    def _touch_parents(self, source: "AtomTableOwner" = None):
+        # parents tables which view old rows of this container are stale, except the source of new rows
+        if self._parents:
+            parents = [p() for p in self._parents]
+            self._parents = [ref for ref, p in zip(self._parents, parents) if p is not None]
+            for p in set(parents):
+                if p is not None and p is not source:
+                    p._touch()
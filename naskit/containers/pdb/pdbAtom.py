@@ -12,7 +12,7 @@ class PdbAtom:
                  "occupancy", "temp", 
                  "segment", 
                  "element", "charge", 
-                 "coords")
+                 "_coords")
     
     def __init__(
                 self,
@@ -37,7 +37,7 @@ class PdbAtom:
         self.segment = segment
         self.element = element
         self.charge = charge
-        self.coords = np.array([x,y,z], dtype=np.float32)
+        self._coords = np.array([x,y,z], dtype=np.float32)
     
     
     def __str__(self):
@@ -77,6 +77,17 @@ class PdbAtom:
         return f"{self.__class__.__name__} {self.anum} {self.aname} ({self.mname} {self.chain} {self.mnum}) at {hex(id(self))}"
 
     
+    @property
+    def coords(self) -> np.ndarray:
+        """
+        Writable array of 3 coordinates. Atoms of containers are rows of shared coordinates buffer.
+        """
+        return self._coords
+    
+    @coords.setter
+    def coords(self, coords: np.ndarray):
+        self._coords[:] = coords
+    
     @property
     def x(self):
         return self.coords[0]
@@ -121,6 +132,24 @@ class PdbAtom:
     def _default_element_derive_func(is_hetatm: bool, aname: str, mname: str, chain: str):
         return aname[0]
     
+    @staticmethod
+    def _parse_charge(charge: str, anum: int, aname: str) -> int:
+        # '2+', '-1', '+' or empty charge field
+        if charge=='': charge = "+0"
+        if len(charge)==1: charge = "1"+charge
+        sign, charge = sorted(charge)
+        try:
+            charge = int(charge)
+            if sign=='+':
+                pass
+            elif sign=='-':
+                charge *= -1
+            else:
+                raise InvalidPDB(f"Invalid atom charge sign '{sign}' in atom {anum} {aname}.")
+        except:
+            raise InvalidPDB(f"Invalid atom charge '{charge}' in atom {anum} {aname}.")
+        return charge
+    
     @classmethod
     def from_pdb_line(cls,
                       line,
@@ -163,19 +192,7 @@ class PdbAtom:
             element = element_derive_func(is_hetatm, aname, mname, chain)     
         
         charge = line[78:80].strip()           # Charge
-        if charge=='': charge = "+0"
-        if len(charge)==1: charge = "1"+charge
-        sign, charge = sorted(charge)
-        try:
-            charge = int(charge)
-            if sign=='+':
-                pass
-            elif sign=='-':
-                charge *= -1
-            else:
-                raise InvalidPDB(f"Invalid atom charge sign '{sign}' in atom {anum} {aname}.")
-        except:
-            raise InvalidPDB(f"Invalid atom charge '{charge}' in atom {anum} {aname}.")
+        charge = PdbAtom._parse_charge(charge, anum, aname) if charge else 0
 
         return PdbAtom(is_hetatm, anum, 
                        aname, altloc, 
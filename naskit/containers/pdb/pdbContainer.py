@@ -1,19 +1,22 @@
 from typing import Union, List
 import numpy as np
 from .pdbAtom import PdbAtom
+from .atomTable import AtomTable, AtomTableOwner
 from .pdbMolecule import PdbMolecule
 from .pdbResidue import PdbResidue, NucleicAcidResidue, AminoacidResidue
 from .pdbDraw import PDBDraw
+from .pdbSpatial import PDBSpatial
 from .pdb_ss_parsing import SSParsing
 from ...exceptions import InvalidPDB
 
 
     
-class PDBCompounds(PDBDraw):
-    __slots__ = ("__comps", )
+class PDBCompounds(PDBDraw, PDBSpatial, AtomTableOwner):
+    __slots__ = ("__comps", "_table", "_table_revision", "_revision", "_parents")
     
     def __init__(self):
         self.__comps = []
+        self._init_table()
         
         
     def __getitem__(self, i: Union[int, slice, list, tuple]):
@@ -50,6 +53,8 @@ class PDBCompounds(PDBDraw):
         for c in self.__comps:
             PDBCompounds.add(copied_comp, c.copy())
         
+        # copied compounds share one contiguous buffer
+        copied_comp._share_table(self.table.copy(), 0)
         return copied_comp
 
     def dist(self, a: Union["PdbAtom", "PdbMolecule", "PDBCompounds"]):
@@ -64,7 +69,15 @@ class PDBCompounds(PDBDraw):
     def add(self, compound: Union[PdbMolecule, 
                                   NucleicAcidResidue, AminoacidResidue, 
                                   "NucleicAcidChain", "ProteinChain"]):   
-        self.__comps.append(compound)    
+        self.__comps.append(compound)
+        compound._add_parent(self)
+        self._touch()
+        
+    def _extend(self, compounds: list):
+        # adds compounds validated by caller
+        self.__comps.extend(compounds)
+        self._adopt(compounds)
+        self._touch()
         
     def renum_atoms(self, initn: int = 1):
         offset = 0
@@ -96,25 +109,59 @@ class PDBCompounds(PDBDraw):
         for c in self.__comps:
             for a in c.atoms():
                 yield a
+                
+    def _share_table(self, table: AtomTable, offset: int, source: AtomTableOwner = None) -> int:
+        # compounds take consecutive rows of container's table
+        start = offset
+        for c in self.__comps:
+            offset = c._share_table(table, offset, self)
+            
+        self._table = table[start:offset]
+        self._table_revision = self._revision
+        self._touch_parents(source)
+        return offset
             
             
+    @property
+    def table(self) -> AtomTable:
+        """
+        Columnar view of atoms, see AtomTable. Tables of compounds are views of the same arrays.
+        """
+        if self._table_revision!=self._revision:
+            rows = [c._table_rows() for c in self.__comps]
+            root, start, end = rows[0] if rows else (None, 0, 0)
+            for r in rows[1:]:
+                if r[0] is not root or r[1]!=end:
+                    break
+                end = r[2]
+            else:
+                if root is not None: # consecutive rows, compounds tables are not sliced
+                    self._table = root[start:end]
+                    self._table_revision = self._revision
+                    return self._table
+                
+            # rows are copied, compounds and atoms are moved to the new table
+            self._share_table(AtomTable.concatenate([c.table for c in self.__comps]), 0)
+        return self._table
+            
     @property
     def natoms(self):
         return sum([c.natoms for c in self.__comps])
     
     @property
-    def coords(self):
-        return np.concatenate([c.coords for c in self.__comps], axis=0)
+    def coords(self) -> np.ndarray:
+        """
+        Writable view of shared coordinates buffer, see PdbMolecule.coords.
+        Edits of other structures do not detach it.
+        """
+        return self.table.coords
     
     @coords.setter
     def coords(self, coords: np.ndarray):
         if coords.shape[0]!=self.natoms or coords.shape[1]!=3:
             raise ValueError(f"Coords matrix must have shape: ({self.natoms}, 3), got {coords.shape}")
             
-        offset = 0
-        for c in self.__comps:
-            c.coords = coords[offset:(offset + c.natoms)]
-            offset += c.natoms
+        self.table.coords[:] = coords
 
 
 # CHAIN
@@ -23,7 +23,8 @@ class PDBDraw:
             size = [self.atom_radius_map.get(a.element, self.default_radius)*size_m for a in self.atoms()]
             name = [f"{a.aname} {a.mnum} {a.mname}" for a in self.atoms()]
         else:
-            c = np.array([a.coords for a in self.atoms() if a.element!='H'], dtype=np.float32)
+            table = self.table
+            c = table.coords[table.element!='H']
             color = [self.atom_colors_map.get(a.element, self.default_color) for a in self.atoms() if a.element!='H']
             size = [self.atom_radius_map.get(a.element, self.default_radius)*size_m for a in self.atoms() if a.element!='H']
             name = [f"{a.aname} {a.mnum} {a.mname}" for a in self.atoms() if a.element!='H']
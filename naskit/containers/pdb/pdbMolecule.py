@@ -1,18 +1,81 @@
 from typing import Union, List, Iterable, Tuple
 import numpy as np
 from .pdbAtom import PdbAtom
+from .atomTable import AtomTable, AtomTableOwner
 from .pdbDraw import PDBDraw
+from .pdbSpatial import PDBSpatial
 from ...exceptions import InvalidPDB
 from ...utils.math3d import align
 
 
 
-class PdbMolecule(PDBDraw):
-    __slots__ = ("__atoms", "__name_idx_map")
+class PdbMolecule(PDBDraw, PDBSpatial, AtomTableOwner):
+    __slots__ = ("__atom_list", "__name_map", "_table", "_table_revision", "_revision", "_parents", "_rows")
     
     def __init__(self):
-        self.__atoms = []
-        self.__name_idx_map = {}
+        self.__atom_list = []
+        self.__name_map = {}
+        self._rows = None
+        self._init_table()
+        
+    @classmethod
+    def _from_table(cls, table: AtomTable, start: int = 0, end: int = None):
+        # lazy molecule of table rows, rows are sliced and atoms are made on first access
+        return PdbMolecule._from_table_rows([cls], table, [start, len(table) if end is None else end])[0]
+    
+    @staticmethod
+    def _from_table_rows(classes: List[type], table: AtomTable, bounds: List[int]) -> List["PdbMolecule"]:
+        # lazy molecules of consecutive ranges of table rows, table of molecule is up to date
+        mols = []
+        for cls, start, end in zip(classes, bounds[:-1], bounds[1:]):
+            mol = cls.__new__(cls)
+            mol.__atom_list = None
+            mol.__name_map = {}
+            mol._table = None
+            mol._table_revision = mol._revision = 0
+            mol._parents = None
+            mol._rows = (table, start, end)
+            mols.append(mol)
+        return mols
+    
+    def _lazy_table(self) -> AtomTable:
+        if self._table is None:
+            table, start, end = self._rows
+            self._table = table[start:end]
+        return self._table
+    
+    def _table_rows(self) -> Tuple[AtomTable, int, int]:
+        if self.__atom_list is None and self._table is None:
+            table, start, end = self._rows
+            return table._root, table._start + start, table._start + end
+        return super()._table_rows()
+    
+    def _lazy_value(self, name: str):
+        # field of the first atom of lazy molecule
+        if self._table is None:
+            table, start, _ = self._rows
+            return getattr(table, name)[start].item()
+        return getattr(self._table, name)[0].item()
+    
+    def _materialize(self):
+        self.__atom_list = self._lazy_table().atoms()
+        self.__name_map = {atom.aname:i for i, atom in enumerate(self.__atom_list)}
+        
+    @property
+    def __atoms(self) -> List[PdbAtom]:
+        if self.__atom_list is None:
+            self._materialize()
+        return self.__atom_list
+    
+    @property
+    def __name_idx_map(self) -> dict:
+        if self.__atom_list is None:
+            self._materialize()
+        return self.__name_map
+    
+    @__name_idx_map.setter
+    def __name_idx_map(self, name_map: dict):
+        self.__name_map = name_map
         
     def _remap(self):
         self.__name_idx_map.clear()
@@ -41,7 +104,9 @@ class PdbMolecule(PDBDraw):
 
     
     def __len__(self):
-        return len(self.__atoms)
+        if self.__atom_list is None:
+            return len(self._table) if self._table is not None else self._rows[2] - self._rows[1]
+        return len(self.__atom_list)
 
     def __contains__(self, atom_name: str):
         return self.__name_idx_map.get(atom_name) is not None
@@ -57,6 +122,9 @@ class PdbMolecule(PDBDraw):
     
         
     def copy(self):
+        if self.__atom_list is None:
+            return self.__class__._from_table(self._lazy_table().copy())
+        
         copied_mol = self.__class__()
         for a in self.__atoms:
             copied_mol.add_atom(a.copy(), skip_validation=True)
@@ -71,14 +139,17 @@ class PdbMolecule(PDBDraw):
     def translate(self, lang: str = "amber", udict: dict = {}):
         for a in self.__atoms:
             a.translate(lang, udict)
+        self._touch()
         
     def add_atom(self, atom: PdbAtom, skip_validation: bool = False):
-        if len(self.__atoms) and (not skip_validation):
-            if self.__name_idx_map.get(atom.aname) is not None:
+        atoms = self.__atoms
+        name_map = self.__name_map
+        if len(atoms) and (not skip_validation):
+            if name_map.get(atom.aname) is not None:
                 raise InvalidPDB(f"Atom (number {atom.anum}) with name {atom.aname} "
                                  f"is already in molecule {self.mname} (number {self.mnum}).")
             
-            a = self.__atoms[0]
+            a = atoms[0]
             if atom.mname!=a.mname:
                 raise InvalidPDB(f"All atoms of a molecule (number {a.mnum}) "
                                  f"must have the same molecule name ({a.mname}), "
@@ -89,8 +160,9 @@ class PdbMolecule(PDBDraw):
                                  f"must have the same chain name ({a.chain}), "
                                  f"got {atom.chain}.")
             
-        self.__atoms.append(atom)
-        self.__name_idx_map[atom.aname] = len(self.__atoms) - 1
+        atoms.append(atom)
+        name_map[atom.aname] = len(atoms) - 1
+        self._touch()
         
     def get_atom_idx(self, name: str):
         return self.__name_idx_map.get(name)
@@ -103,15 +175,40 @@ class PdbMolecule(PDBDraw):
         else:
             raise IndexError(f"Invalid argument of type {type(i)}, accepted: int index or str name.")
         self._remap()
+        self._touch()
         
     def renum_atoms(self, initn: int = 1):
         for i, a in enumerate(self.__atoms):
             a.anum = initn + i
+        self._touch()
         
     def atoms(self):
         for a in self.__atoms:
             yield a
             
+    def _share_table(self, table: AtomTable, offset: int, source: AtomTableOwner = None) -> int:
+        # takes rows of container's table, atoms are bound to the rows
+        end = offset + len(self)
+        self._table = table[offset:end]
+        self._table_revision = self._revision
+        if self.__atom_list is not None:
+            for a, row in zip(self.__atom_list, self._table.coords):
+                a._coords = row
+        self._touch_parents(source)
+        return end
+            
+            
+    @property
+    def table(self) -> AtomTable:
+        """
+        Columnar view of atoms, see AtomTable.
+        """
+        if self.__atom_list is None: # table is the only storage of lazy molecule
+            self._table_revision = self._revision
+            return self._lazy_table()
+        elif self._table_revision!=self._revision:
+            self._share_table(AtomTable.from_atoms(self.__atom_list), 0)
+        return self._table
             
     @property
     def natoms(self):
@@ -119,24 +216,32 @@ class PdbMolecule(PDBDraw):
     
     @property
     def mnum(self):
+        if self.__atom_list is None:
+            return self._lazy_value("mnum")
         return self.__atoms[0].mnum
     
     @mnum.setter
     def mnum(self, mnum: int):
         for a in self.__atoms:
             a.mnum = mnum
+        self._touch()
             
     @property
     def mname(self):
+        if self.__atom_list is None:
+            return self._lazy_value("mname")
         return self.__atoms[0].mname
     
     @mname.setter
     def mname(self, mname: str):
         for a in self.__atoms:
             a.mname = mname
+        self._touch()
     
     @property
     def chain(self):
+        if self.__atom_list is None:
+            return self._lazy_value("chain")
         return self.__atoms[0].chain
     
     @chain.setter
@@ -146,18 +251,22 @@ class PdbMolecule(PDBDraw):
             
         for a in self.__atoms:
             a.chain = chain_name
+        self._touch()
     
     @property
-    def coords(self):
-        return np.stack([a.coords for a in self.__atoms])
+    def coords(self) -> np.ndarray:
+        """
+        Writable view of shared coordinates buffer, rows are coords of atoms. 
+        View stays bound to atoms until structural edit of the molecule or of its container.
+        """
+        return self.table.coords
     
     @coords.setter
     def coords(self, coords: np.ndarray):
         if coords.shape[0]!=len(self) or coords.shape[1]!=3:
             raise ValueError(f"Coords matrix must have shape: ({len(self)}, 3), got {coords.shape}")
             
-        for i in range(coords.shape[0]):
-            self.__atoms[i].coords = coords[i]
+        self.table.coords[:] = coords
             
             
     def embed_molecule_fragment(self, 
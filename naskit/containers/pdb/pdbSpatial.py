@@ -0,0 +1,46 @@
+from typing import Union, Tuple
+import numpy as np
+from ...utils.spatial import CellList
+
+
+
+class PDBSpatial:
+
+    def spatial_index(self, cell_size: float) -> CellList:
+        """
+        Cell list over atom coords for neighbour search, see CellList.
+        Index is built on the current coords and does not follow their changes.
+
+        :param cell_size: the maximal query radius.
+
+        :return: CellList.
+        """
+        return CellList(self.coords, cell_size)
+
+
+    def neighbors(self, within: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pairs of atoms within distance, in near-linear time and memory.
+
+        :param within: distance, positive.
+
+        :return: sparse triplets - atom indices i, j (i<j) and distances, sorted by (i, j).
+        """
+        return self.spatial_index(within).query_pairs(within)
+
+
+    def contacts(self,
+                 other: Union["PdbAtom", "PdbMolecule", "PDBCompounds", np.ndarray],
+                 cutoff: float
+                ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pairs of atoms of this and other structure within cutoff, in near-linear time and memory.
+
+        :param other: atom, molecule, container or coords of shape (M, 3).
+        :param cutoff: distance, positive.
+
+        :return: sparse triplets - atom indices of this structure, atom indices of other and distances,
+                 sorted by indices.
+        """
+        points = other if isinstance(other, np.ndarray) else other.coords
+        return CellList(points.reshape(-1, 3), cutoff).query(self.coords, cutoff)
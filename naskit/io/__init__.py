@@ -3,4 +3,5 @@ from .dot import dotRead, dotWrite
 from .fasta import fastaRead, fastaWrite
 from .bpseq import bpseqRead, bpseqDirRead, bpseqWrite
 from .pdb import pdbRead, pdbWrite, request_pdb
-from .bna import bnaWrite, bnaRead
\ No newline at end of file
+from .bna import bnaWrite, bnaRead
+from .compression import open_text
@@ -1,12 +1,23 @@
-from typing import Union, Iterator
+from typing import Union, Iterator, List, Optional, Sequence, Tuple
 from pathlib import Path
 from io import BufferedWriter, BufferedRandom
 from tempfile import _TemporaryFileWrapper
-import math
+from array import array
+from collections import deque
+import struct
+import mmap
+import zlib
+import os
+import numpy as np
+import numpy
 
 from ..containers import NucleicAcid
 from ..exceptions import InvalidSequence
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 
 SUPPORTED_NB_SYMBOLS = set('AGCUTIN')
@@ -14,16 +25,28 @@ META_SEPARATOR = "?"
 NB_DICT = {'N':0, 'A':1, 'U':2, 'G':3, 'C':4, 'T':5, 'I':6}
 INV_NB_DICT = {0:'N', 1:'A', 2:'U', 3:'G', 4:'C', 5:'T', 6:'I'}
 
+V1_MAX_LENGTH = 4095
+V2_MAGIC = b'BNA\x02'
+COMPRESSION_CODES = {None:0, 'zlib':1, 'zstd':2}
+BLOCK_SIZE = 1<<16 # uncompressed bytes of records in version 2 block
+ITER_CHUNK = 256 # records decoded at once by iteration
+
+INDEX_SUFFIX = '.bnai'
+INDEX_MAGIC = b'BNAIDX01'
+INDEX_MAGIC_V2 = b'BNAIDX02'
+INDEX_HEADER = struct.Struct('<8sQQ') # magic, size of bna file, number of records
+
 format_doc = \
 """
 Bytes Nucleic Acid - memory efficient nucleic acid file format.
 
-Maximum supported sequence length - 4095 nbs.
+Version 1 (default) - maximum supported sequence length - 4095 nbs.
 Maximum supported name length - 4095 ascii characters. 
 Meta information is added to name in json-like format.
 Maximum memory consumption is [1.25*N + 5] bytes for N nbs.
+Version 2 - no length limits, optional zlib or zstd compression.
 
-12 bit format specification:
+Version 1, 12 bit format specification:
 
     16 bit - size of current structure in bytes (including these 2 bytes)
     12 bit - na name length (with meta information json)
@@ -43,19 +66,750 @@ Maximum memory consumption is [1.25*N + 5] bytes for N nbs.
     12 bit - index of complementary nb from 3'-end
     3'-end indexes are paired sequentially with 5'-end nbs with complementary falg bit.
     Last 4 bit in byte are padding in case of odd number of complementary pairs.
+
+Version 2 has no length limits. File starts with 4 bytes magic b'BNA\\x02', then blocks of records follow:
+
+    varint - size of the rest of the block in bytes
+    8 bit - block compression: 0 - none, 1 - zlib (deflate), 2 - zstd
+    Block data - records, compressed together
+    
+    Record:
+    varint - size of the rest of the record in bytes
+    varint - na name length in bytes (utf-8, with meta information json)
+    varint - sequence length
+    Name block - as in version 1
+    Sequence block - as in version 1
+    Pairs block:
+    varint - distance from 5'-end to 3'-end for every nb with complementary flag bit
+    
+    Varints are unsigned LEB128: 7 bits in every byte, the highest bit is set in all bytes except the last one.
+    Records are grouped in blocks of about 64 KiB of uncompressed data, 
+    block is compressed as a whole and only if it gets smaller.
+
+Offset index is stored in sidecar file <file>.bnai:
+
+    8 bytes - magic b'BNAIDX01' for version 1, b'BNAIDX02' for version 2
+    64 bit - size of indexed bna file in bytes
+    64 bit - number of records
+    Version 1:
+    64 bit - offset of every record
+    Version 2:
+    64 bit - offset of block of every record
+    64 bit - offset of every record in uncompressed block data
+    All numbers are little-endian. Index is stale and ignored if bna file size differs.
 """
 
 
+def _index_path(path: Union[str, Path]) -> Path:
+    return Path(f"{path}{INDEX_SUFFIX}")
+
+
+def _as_buffer(obj) -> Optional[memoryview]:
+    # flat byte view of buffer protocol object, None for paths and file objects
+    if isinstance(obj, (str, Path)):
+        return None
+    try:
+        return memoryview(obj).cast('B')
+    except TypeError:
+        return None
+
+
+def _scan_offsets(buffer, version: int = 1, start: int = 0) -> numpy.array:
+    # walks record size blocks without decoding records, 
+    # version 2 offsets are (block offset, record offset in block data) pairs
+    if version==2:
+        return _scan_blocks(buffer, start)
+    
+    offsets = array('Q')
+    pos, end = start, len(buffer)
+    while pos+2<=end:
+        size_block = int.from_bytes(buffer[pos:pos+2], 'big', signed=False)
+        if size_block==0: break
+        offsets.append(pos)
+        pos += size_block
+        
+    return np.array(offsets, dtype=np.uint64)
+
+
+def _scan_blocks(buffer, start: int) -> numpy.array:
+    blocks, positions = array('Q'), array('Q')
+    pos, end = start, len(buffer)
+    while pos<end:
+        data, next_pos = _read_block(buffer, pos)
+        if data is None: break
+        records = _record_offsets(data)
+        blocks.extend([pos]*len(records))
+        positions.extend(records)
+        pos = next_pos
+        
+    return np.array([blocks, positions], dtype=np.uint64).T.reshape(-1, 2)
+
+
+def _buffer_version(buffer) -> int:
+    return 2 if bytes(buffer[:len(V2_MAGIC)])==V2_MAGIC else 1
+
+
+def _data_start(version: int) -> int:
+    return len(V2_MAGIC) if version==2 else 0
+
+
+def _write_index(path: Union[str, Path], offsets: Sequence[int], file_size: int):
+    # offsets of shape (N,) for version 1 and (N, 2) for version 2
+    offsets = np.asarray(offsets, dtype='<u8')
+    magic = INDEX_MAGIC_V2 if offsets.ndim==2 else INDEX_MAGIC
+    with open(_index_path(path), 'wb') as f:
+        f.write(INDEX_HEADER.pack(magic, file_size, len(offsets)))
+        f.write(offsets.T.tobytes())
+
+
+def _read_index(path: Union[str, Path], 
+                version: int, 
+                count_only: bool = False
+               ) -> Union[numpy.array, int, None]:
+    # returns None if index does not exist, is stale or made for other version
+    index_path = _index_path(path)
+    if not index_path.exists():
+        return None
+    
+    with open(index_path, 'rb') as f:
+        header = f.read(INDEX_HEADER.size)
+        if len(header)!=INDEX_HEADER.size:
+            return None
+        
+        magic, file_size, count = INDEX_HEADER.unpack(header)
+        if magic!=(INDEX_MAGIC_V2 if version==2 else INDEX_MAGIC) or file_size!=os.path.getsize(path):
+            return None
+        
+        if count_only:
+            return count
+        
+        columns = 2 if version==2 else 1
+        offsets = np.frombuffer(f.read(8*count*columns), dtype='<u8')
+        
+    if len(offsets)!=count*columns:
+        return None
+    offsets = offsets.astype(np.uint64)
+    return offsets.reshape(2, -1).T if version==2 else offsets
+
+
+NB_CODES = np.full(256, 255, dtype=np.uint8)
+for _nb, _code in NB_DICT.items():
+    NB_CODES[ord(_nb)] = _code
+NB_SYMBOLS = np.frombuffer(''.join([INV_NB_DICT[i] for i in range(len(INV_NB_DICT))]).encode('ascii'), dtype=np.uint8)
+
+
+def _blocks_index(starts: numpy.array, lengths: numpy.array) -> numpy.array:
+    # flat indexes of consecutive blocks [starts[k], starts[k]+lengths[k])
+    if len(lengths)==1: # single record
+        return slice(int(starts[0]), int(starts[0]) + int(lengths[0]))
+    
+    lengths = np.asarray(lengths, dtype=np.int64)
+    prev = np.cumsum(lengths) - lengths
+    return np.arange(prev[-1]+lengths[-1] if len(lengths) else 0) + np.repeat(np.asarray(starts, dtype=np.int64) - prev, lengths)
+
+
+def _even_starts(counts: numpy.array) -> Tuple[numpy.array, numpy.array]:
+    # every block is padded to even number of items
+    padded = counts + counts%2
+    return np.cumsum(padded) - padded, padded
+
+
+def _pack_12bit(values: numpy.array, counts: numpy.array) -> Tuple[numpy.array, numpy.array]:
+    # two 12 bit values in 3 bytes, odd block ends with 2 bytes
+    starts, padded = _even_starts(counts)
+    data = np.zeros(padded.sum(), dtype=np.int64)
+    data[_blocks_index(starts, counts)] = values
+    a, b = data[0::2], data[1::2]
+    
+    packed = np.stack([a>>4, ((a&15)<<4) | (b>>8), b&255], axis=1).ravel().astype(np.uint8)
+    nbytes = (3*counts + 1)//2
+    return packed[_blocks_index(3*starts//2, nbytes)], nbytes
+
+
+def _unpack_12bit(data: numpy.array, counts: numpy.array) -> numpy.array:
+    starts, padded = _even_starts(counts)
+    packed = np.zeros(3*padded.sum()//2, dtype=np.int64)
+    packed[_blocks_index(3*starts//2, (3*counts + 1)//2)] = data
+    packed = packed.reshape(-1, 3)
+    
+    values = np.stack([(packed[:, 0]<<4) | (packed[:, 1]>>4), 
+                       ((packed[:, 1]&15)<<8) | packed[:, 2]], axis=1).ravel()
+    return values[_blocks_index(starts, counts)]
+
+
+def _seq_codes(nas: Sequence[NucleicAcid], slens: numpy.array, with_struct: bool
+              ) -> Tuple[numpy.array, numpy.array, numpy.array, numpy.array]:
+    # nb codes with paired flag, global 5'-end indexes, local 3'-end indexes and number of pairs in records
+    seq = np.frombuffer(b''.join([na._seq for na in nas]), dtype=np.uint8)
+    codes = NB_CODES[seq]
+    if (codes==255).any():
+        rem = set(seq[codes==255].tobytes().decode('ascii'))
+        raise InvalidSequence(f"Only supported symbols - (A G C U T I N), got {', '.join(tuple(rem))}")
+        
+    if with_struct and len(codes):
+        pt = np.concatenate([na._pt_view() for na in nas])
+        opening = np.flatnonzero(pt > (np.arange(len(pt)) - np.repeat(np.cumsum(slens) - slens, slens)))
+        codes[opening] |= 8
+        closing = pt[opening]
+        plens = np.bincount(np.repeat(np.arange(len(nas)), slens)[opening], minlength=len(nas))
+    else:
+        opening = closing = np.zeros(0, dtype=np.int64)
+        plens = np.zeros(len(nas), dtype=np.int64)
+        
+    return codes, opening, closing, plens
+
+
+def _pack_nibbles(codes: numpy.array, slens: numpy.array) -> Tuple[numpy.array, numpy.array]:
+    # seq block, 2 nbs in byte
+    starts, padded = _even_starts(slens)
+    nibbles = np.zeros(padded.sum(), dtype=np.uint8)
+    nibbles[_blocks_index(starts, slens)] = codes
+    return (nibbles[0::2]<<4) | nibbles[1::2], padded//2
+
+
+def _unpack_nibbles(seq_block: numpy.array, slens: numpy.array) -> Tuple[numpy.array, bytes]:
+    seqbytes = (slens + 1)//2
+    nibbles = np.stack([seq_block>>4, seq_block&15], axis=1).ravel()
+    codes = nibbles[_blocks_index(2*(np.cumsum(seqbytes) - seqbytes), slens)]
+    
+    if ((codes&7)>=len(NB_SYMBOLS)).any():
+        raise ValueError("Invalid nb code in bna record")
+    return codes, NB_SYMBOLS[codes&7].tobytes()
+
+
+def _make_nas(seqs: bytes, pt: bytes, offsets: numpy.array, slens: numpy.array, 
+              plens: numpy.array, names: Sequence[str]) -> List[NucleicAcid]:
+    nas = []
+    for o, slen, plen, name_str in zip(offsets.tolist(), slens.tolist(), plens.tolist(), names):
+        na = NucleicAcid()
+        if name_str:
+            name, meta = _parse_name(name_str)
+            if name: na.name = name
+            if meta: na.meta.update(meta)
+            
+        na._set_graph(seqs[o:o+slen], pt[4*o:4*(o+slen)])
+        if plen==0:
+            na.__dict__['struct'] = None
+        nas.append(na)
+        
+    return nas
+
+
+def _encode_records(nas: Sequence[NucleicAcid], names: Sequence[str], with_struct: bool) -> Tuple[numpy.array, numpy.array]:
+    """
+    Encodes all records at once.
+
+    :return: uint8 array of records and array of record sizes.
+    """
+    slens = np.array([len(na) for na in nas], dtype=np.int64)
+    name_bytes = [name.encode('latin-1') for name in names]
+    namelens = np.array([len(name) for name in name_bytes], dtype=np.int64)
+    
+    codes, _, closing, plens = _seq_codes(nas, slens, with_struct)
+    seq_block, seqbytes = _pack_nibbles(codes, slens)
+    header, _ = _pack_12bit(np.stack([namelens, slens], axis=1).ravel(), np.full(len(nas), 2))
+    pair_block, pairbytes = _pack_12bit(closing, plens)
+        
+    sizes = 5 + namelens + seqbytes + pairbytes
+    record_starts = np.cumsum(sizes) - sizes
+    
+    out = np.zeros(sizes.sum(), dtype=np.uint8)
+    out[record_starts] = sizes>>8
+    out[record_starts+1] = sizes&255
+    out[_blocks_index(record_starts+2, np.full(len(nas), 3))] = header
+    out[_blocks_index(record_starts+5, namelens)] = np.frombuffer(b''.join(name_bytes), dtype=np.uint8)
+    out[_blocks_index(record_starts+5+namelens, seqbytes)] = seq_block
+    out[_blocks_index(record_starts+5+namelens+seqbytes, pairbytes)] = pair_block
+    
+    return out, sizes
+
+
+def _decode_records(buffer, starts: Sequence[int]) -> List[NucleicAcid]:
+    """
+    Decodes all records at once.
+
+    :param buffer: bytes-like object with records.
+    :param starts: offsets of records data after 2 bytes of size block.
+
+    :return: list of NucleicAcids.
+    """
+    if len(starts)==0:
+        return []
+    
+    buf = np.frombuffer(buffer, dtype=np.uint8)
+    starts = np.asarray(starts, dtype=np.int64)
+    n = len(starts)
+    
+    header = _unpack_12bit(buf[_blocks_index(starts, np.full(n, 3))], np.full(n, 2)).reshape(-1, 2)
+    namelens, slens = header[:, 0], header[:, 1]
+    names = buf[_blocks_index(starts+3, namelens)].tobytes().decode('latin-1')
+    
+    seq_starts = starts + 3 + namelens
+    seqbytes = (slens + 1)//2
+    codes, seqs = _unpack_nibbles(buf[_blocks_index(seq_starts, seqbytes)], slens)
+    
+    # pairs block
+    offsets = np.cumsum(slens) - slens
+    record = np.repeat(np.arange(n), slens)
+    opening = np.flatnonzero(codes&8)
+    plens = np.bincount(record[opening], minlength=n)
+    pair_block = buf[_blocks_index(seq_starts+seqbytes, (3*plens + 1)//2)]
+    closing = _unpack_12bit(pair_block, plens)
+    
+    opening_record = record[opening]
+    if (closing>=slens[opening_record]).any():
+        raise ValueError("Invalid complementary nb index in bna record")
+        
+    pt = np.full(len(codes), -1, dtype=np.int32)
+    pt[opening] = closing
+    pt[closing + offsets[opening_record]] = opening - offsets[opening_record]
+    
+    name_offsets = (np.cumsum(namelens) - namelens).tolist()
+    return _make_nas(seqs, pt.tobytes(), offsets, slens, plens, 
+                     [names[o:o+l] for o, l in zip(name_offsets, namelens.tolist())])
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value>127:
+        out.append((value&127) | 128)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _read_varint(buffer, pointer: int) -> Tuple[int, int]:
+    # returns value and pointer to the next byte
+    value, shift = 0, 0
+    while True:
+        b = buffer[pointer]
+        pointer += 1
+        value |= (b&127)<<shift
+        if b<128:
+            return value, pointer
+        shift += 7
+        
+        
+def _encode_varints(values: numpy.array) -> Tuple[numpy.array, numpy.array]:
+    values = np.asarray(values, dtype=np.int64)
+    nbytes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 10):
+        nbytes += values>=(1<<(7*k))
+        
+    starts = np.cumsum(nbytes) - nbytes
+    j = np.arange(nbytes.sum()) - np.repeat(starts, nbytes)
+    out = (np.repeat(values, nbytes)>>(7*j)) & 127
+    out[j<np.repeat(nbytes, nbytes)-1] |= 128
+    return out.astype(np.uint8), nbytes
+
+
+def _decode_varints(data: numpy.array) -> numpy.array:
+    ends = np.flatnonzero(data<128)
+    if len(ends)==0:
+        return np.zeros(0, dtype=np.int64)
+    
+    starts = np.empty(len(ends), dtype=np.int64)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    j = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    return np.add.reduceat((data&127).astype(np.int64)<<(7*j), starts)
+
+
+def _compress(payload: bytes, compression: Optional[str], level: Optional[int]) -> Tuple[int, bytes]:
+    if compression is None:
+        return 0, payload
+    
+    if compression=='zlib':
+        data = zlib.compress(payload, -1 if level is None else level)
+    else:
+        data = zstandard.ZstdCompressor(level=3 if level is None else level).compress(payload)
+        
+    if len(data)>=len(payload):
+        return 0, payload
+    return COMPRESSION_CODES[compression], data
+
+
+def _decompress(data, codec: int):
+    # uncompressed payload is returned as is, without copy
+    if codec==0:
+        return data
+    if codec==1:
+        return zlib.decompress(data)
+    if codec==2:
+        if zstandard is None:
+            raise ImportError("zstandard package is required to read zstd compressed bna records")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown bna compression code {codec}")
+
+
+def _encode_records_v2(nas: Sequence[NucleicAcid], names: Sequence[str], with_struct: bool
+                      ) -> Tuple[bytes, numpy.array]:
+    """
+    Encodes all records in version 2 layout at once, records are not grouped in blocks.
+
+    :return: records bytes and array of record sizes.
+    """
+    slens = np.array([len(na) for na in nas], dtype=np.int64)
+    name_bytes = [name.encode('utf-8') for name in names]
+    namelens = np.array([len(name) for name in name_bytes], dtype=np.int64)
+    codes, opening, closing, plens = _seq_codes(nas, slens, with_struct)
+    
+    header, header_bytes = _encode_varints(np.stack([namelens, slens], axis=1).ravel())
+    header_bytes = header_bytes.reshape(-1, 2).sum(axis=1)
+    seq_block, seqbytes = _pack_nibbles(codes, slens)
+    
+    # pairs are stored as distances from 5'-end, short helixes give 1 byte varints
+    offsets = np.cumsum(slens) - slens
+    distances = closing - opening + np.repeat(offsets, plens)
+    pair_block, pair_bytes = _encode_varints(distances)
+    pairbytes = np.bincount(np.repeat(np.arange(len(nas)), plens), weights=pair_bytes, 
+                            minlength=len(nas)).astype(np.int64)
+    
+    sizes = header_bytes + namelens + seqbytes + pairbytes
+    starts = np.cumsum(sizes) - sizes
+    payloads = np.empty(sizes.sum(), dtype=np.uint8)
+    payloads[_blocks_index(starts, header_bytes)] = header
+    payloads[_blocks_index(starts+header_bytes, namelens)] = np.frombuffer(b''.join(name_bytes), dtype=np.uint8)
+    payloads[_blocks_index(starts+header_bytes+namelens, seqbytes)] = seq_block
+    payloads[_blocks_index(starts+header_bytes+namelens+seqbytes, pairbytes)] = pair_block
+    
+    # size varint before every payload
+    prefix, prefix_bytes = _encode_varints(sizes)
+    record_sizes = prefix_bytes + sizes
+    record_starts = np.cumsum(record_sizes) - record_sizes
+    
+    out = np.empty(record_sizes.sum(), dtype=np.uint8)
+    out[_blocks_index(record_starts, prefix_bytes)] = prefix
+    out[_blocks_index(record_starts+prefix_bytes, sizes)] = payloads
+    return out.tobytes(), record_sizes
+
+
+def _make_block(records: bytes, compression: Optional[str], level: Optional[int]) -> bytes:
+    codec, data = _compress(records, compression, level)
+    return b''.join((_varint(len(data)+1), bytes((codec,)), data))
+
+
+def _read_block(buffer, offset: int) -> Tuple[Optional[bytes], int]:
+    # uncompressed block data (None at the end of data) and offset of the next block
+    size, pointer = _read_varint(buffer, int(offset))
+    if size==0:
+        return None, pointer
+    body = buffer[pointer:pointer+size]
+    return _decompress(body[1:], body[0]), pointer+size
+
+
+def _record_offsets(data) -> List[int]:
+    # offsets of records in block data
+    offsets, pos = [], 0
+    while pos<len(data):
+        size, body = _read_varint(data, pos)
+        offsets.append(pos)
+        pos = body + size
+        
+    if pos!=len(data):
+        raise ValueError("Invalid bna record size")
+    return offsets
+
+
+def _record_body(data, offset: int):
+    # version 2 record without size varint
+    size, pointer = _read_varint(data, int(offset))
+    return data[pointer:pointer+size]
+
+
+def _decode_records_v2(bodies: Sequence[bytes]) -> List[NucleicAcid]:
+    """
+    Decodes all version 2 records at once.
+
+    :param bodies: records without size varint.
+
+    :return: list of NucleicAcids.
+    """
+    n = len(bodies)
+    if n==0:
+        return []
+    
+    # payloads without varint headers are gathered in one buffer
+    payloads, namelens, slens = [], [], []
+    for data in bodies:
+        if len(data)==0:
+            raise ValueError("Invalid bna record size")
+        namelen, p = _read_varint(data, 0)
+        slen, p = _read_varint(data, p)
+        payloads.append(data[p:])
+        namelens.append(namelen)
+        slens.append(slen)
+        
+    buf = np.frombuffer(b''.join(payloads), dtype=np.uint8)
+    sizes = np.array([len(data) for data in payloads], dtype=np.int64)
+    starts = np.cumsum(sizes) - sizes
+    namelens = np.array(namelens, dtype=np.int64)
+    slens = np.array(slens, dtype=np.int64)
+    
+    names = buf[_blocks_index(starts, namelens)].tobytes()
+    seq_starts = starts + namelens
+    seqbytes = (slens + 1)//2
+    if (seq_starts + seqbytes > starts + sizes).any():
+        raise ValueError("Invalid bna record size")
+    codes, seqs = _unpack_nibbles(buf[_blocks_index(seq_starts, seqbytes)], slens)
+    
+    # pairs block
+    offsets = np.cumsum(slens) - slens
+    record = np.repeat(np.arange(n), slens)
+    opening = np.flatnonzero(codes&8)
+    plens = np.bincount(record[opening], minlength=n)
+    
+    distances = _decode_varints(buf[_blocks_index(seq_starts+seqbytes, starts+sizes-seq_starts-seqbytes)])
+    if len(distances)!=len(opening):
+        raise ValueError("Invalid number of complementary pairs in bna record")
+    
+    opening_record = record[opening]
+    closing = opening + distances
+    if (distances<=0).any() or (closing>=(offsets+slens)[opening_record]).any():
+        raise ValueError("Invalid complementary nb index in bna record")
+    
+    pt = np.full(len(codes), -1, dtype=np.int32)
+    pt[opening] = closing - offsets[opening_record]
+    pt[closing] = opening - offsets[opening_record]
+    
+    name_offsets = (np.cumsum(namelens) - namelens).tolist()
+    return _make_nas(seqs, pt.tobytes(), offsets, slens, plens, 
+                     [names[o:o+l].decode('utf-8') for o, l in zip(name_offsets, namelens.tolist())])
+
+
+def _encode_record(na: NucleicAcid, name: str, with_struct: bool) -> bytes:
+    # single record version of _encode_records with less overhead
+    codes = NB_CODES[np.frombuffer(na._seq, dtype=np.uint8)]
+    if (codes==255).any():
+        rem = set(na.seq) - SUPPORTED_NB_SYMBOLS
+        raise InvalidSequence(f"Only supported symbols - (A G C U T I N), got {', '.join(tuple(rem))}")
+    
+    slen = len(codes)
+    closing = ()
+    if with_struct:
+        pt = na._pt_view()
+        opening = pt > np.arange(slen)
+        codes[opening] |= 8
+        closing = pt[opening].tolist()
+        
+    if slen%2:
+        codes = np.append(codes, np.uint8(0))
+    seq_block = ((codes[0::2]<<4) | codes[1::2]).tobytes()
+    
+    pair_block = bytearray()
+    for i in range(0, len(closing)-1, 2):
+        a, b = closing[i], closing[i+1]
+        pair_block += bytes((a>>4, ((a&15)<<4) | (b>>8), b&255))
+    if len(closing)%2:
+        a = closing[-1]
+        pair_block += bytes((a>>4, (a&15)<<4))
+        
+    name = name.encode('latin-1')
+    size = 5 + len(name) + len(seq_block) + len(pair_block)
+    namelen = len(name)
+    header = bytes((size>>8, size&255, namelen>>4, ((namelen&15)<<4) | (slen>>8), slen&255))
+    return b''.join((header, name, seq_block, pair_block))
+
+
+def _decode_record(buffer, start: int) -> NucleicAcid:
+    # single record version of _decode_records with less overhead
+    b0, b1, b2 = buffer[start:start+3]
+    namelen, slen = (b0<<4) | (b1>>4), ((b1&15)<<8) | b2
+    pointer = start + 3
+    
+    na = NucleicAcid()
+    if namelen:
+        name, meta = _parse_name(bytes(buffer[pointer:pointer+namelen]).decode('latin-1'))
+        if name: na.name = name
+        if meta: na.meta.update(meta)
+        pointer += namelen
+        
+    seqbytes = (slen + 1)//2
+    seq_block = np.frombuffer(buffer, dtype=np.uint8, count=seqbytes, offset=pointer)
+    pointer += seqbytes
+    
+    codes = np.empty(2*seqbytes, dtype=np.uint8)
+    codes[0::2] = seq_block>>4
+    codes[1::2] = seq_block&15
+    codes = codes[:slen]
+    if ((codes&7)>=len(NB_SYMBOLS)).any():
+        raise ValueError("Invalid nb code in bna record")
+    
+    opening = np.flatnonzero(codes&8).tolist()
+    pair_block = buffer[pointer:pointer+(3*len(opening) + 1)//2]
+    closing = []
+    for i in range(0, len(pair_block)-2, 3):
+        b0, b1, b2 = pair_block[i:i+3]
+        closing.append((b0<<4) | (b1>>4))
+        closing.append(((b1&15)<<8) | b2)
+    if len(opening)%2:
+        closing.append((pair_block[-2]<<4) | (pair_block[-1]>>4))
+        
+    na._set_graph(NB_SYMBOLS[codes&7].tobytes())
+    if len(opening)==0:
+        na.__dict__['struct'] = None
+    for o, e in zip(opening, closing):
+        if e>=slen:
+            raise ValueError("Invalid complementary nb index in bna record")
+        na._add_bond(o, e)
+        
+    return na
+
+
+def _encode_record_v2(na: NucleicAcid, name: str, with_struct: bool) -> bytes:
+    # single record version of _encode_records_v2 with less overhead
+    codes = NB_CODES[np.frombuffer(na._seq, dtype=np.uint8)]
+    if (codes==255).any():
+        rem = set(na.seq) - SUPPORTED_NB_SYMBOLS
+        raise InvalidSequence(f"Only supported symbols - (A G C U T I N), got {', '.join(tuple(rem))}")
+    
+    slen = len(codes)
+    pair_block = b''
+    if with_struct:
+        pt = na._pt_view()
+        idx = np.arange(slen)
+        opening = pt > idx
+        codes[opening] |= 8
+        pair_block = b''.join([_varint(d) for d in (pt[opening] - idx[opening]).tolist()])
+        
+    if slen%2:
+        codes = np.append(codes, np.uint8(0))
+    seq_block = ((codes[0::2]<<4) | codes[1::2]).tobytes()
+    
+    name = name.encode('utf-8')
+    payload = b''.join((_varint(len(name)), _varint(slen), name, seq_block, pair_block))
+    return _varint(len(payload)) + payload
+
+
+def _decode_record_v2(body) -> NucleicAcid:
+    # single record version of _decode_records_v2 with less overhead
+    if len(body)==0:
+        raise ValueError("Invalid bna record size")
+    namelen, pointer = _read_varint(body, 0)
+    slen, pointer = _read_varint(body, pointer)
+    
+    na = NucleicAcid()
+    if namelen:
+        name, meta = _parse_name(bytes(body[pointer:pointer+namelen]).decode('utf-8'))
+        if name: na.name = name
+        if meta: na.meta.update(meta)
+        pointer += namelen
+        
+    seqbytes = (slen + 1)//2
+    if pointer + seqbytes>len(body):
+        raise ValueError("Invalid bna record size")
+    seq_block = np.frombuffer(body, dtype=np.uint8, count=seqbytes, offset=pointer)
+    pointer += seqbytes
+    
+    codes = np.empty(2*seqbytes, dtype=np.uint8)
+    codes[0::2] = seq_block>>4
+    codes[1::2] = seq_block&15
+    codes = codes[:slen]
+    if ((codes&7)>=len(NB_SYMBOLS)).any():
+        raise ValueError("Invalid nb code in bna record")
+    
+    opening = np.flatnonzero(codes&8).tolist()
+    na._set_graph(NB_SYMBOLS[codes&7].tobytes())
+    if len(opening)==0:
+        na.__dict__['struct'] = None
+    for o in opening:
+        if pointer>=len(body):
+            raise ValueError("Invalid number of complementary pairs in bna record")
+        d, pointer = _read_varint(body, pointer)
+        if d==0 or o+d>=slen:
+            raise ValueError("Invalid complementary nb index in bna record")
+        na._add_bond(o, o+d)
+        
+    if pointer!=len(body):
+        raise ValueError("Invalid number of complementary pairs in bna record")
+    return na
+
+
+def _parse_name(name_str: str) -> Tuple[str, Optional[dict]]:
+    if META_SEPARATOR not in name_str:
+        return name_str, None
+    
+    name, meta_str = name_str.split(META_SEPARATOR)
+    meta = {}
+    for kv in meta_str.split(','):
+        k, v = kv.split(':')
+        meta[k] = v
+
+    return name, meta
+
+
 class bnaWrite:
     
     def __init__(self, file: Union[str, Path, BufferedWriter, BufferedRandom, _TemporaryFileWrapper], *, 
                  append: bool = False,
+                 index: bool = False,
+                 version: int = 1,
+                 compression: Optional[str] = None,
+                 level: Optional[int] = None,
+                 block_size: int = BLOCK_SIZE
                 ):
+        """
+        :param index: write offset index to sidecar file <file>.bnai on close, only for file path. Default - False.
+        :param version: format version, 1 - compact 12 bit format, 2 - format without length limits. Default - 1.
+        :param compression: block compression for version 2 - None, 'zlib' or 'zstd'. Default - None.
+        :param level: compression level. Default - codec default.
+        :param block_size: uncompressed bytes of records in version 2 block. 
+            Records are buffered until block is full, and written on flush or close. Default - 64 KiB.
+        """
+        if version not in (1, 2):
+            raise ValueError(f"Unsupported bna version {version}, supported - 1, 2")
+        if compression not in COMPRESSION_CODES:
+            raise ValueError(f"Unsupported compression {compression}, supported - {', '.join(map(str, COMPRESSION_CODES))}")
+        if compression is not None and version==1:
+            raise ValueError("Compression is supported only in bna version 2")
+        if compression=='zstd' and zstandard is None:
+            raise ImportError("zstandard package is required for zstd compression")
+        if block_size<=0:
+            raise ValueError(f"Block size must be positive, got {block_size}")
+        
+        self._version = version
+        self._compression = compression
+        self._level = level
+        self._block_size = block_size
+        self._pending = [] # encoded records of not written version 2 block
+        self._pending_sizes = []
+        self._pending_bytes = 0
         
+        self._path = None
         if isinstance(file, (str, Path)):
+            exists = append and os.path.exists(file) and os.path.getsize(file)>0
+            if exists:
+                with open(file, 'rb') as f:
+                    file_version = _buffer_version(f.read(len(V2_MAGIC)))
+                if file_version!=version:
+                    raise ValueError(f"Can not append version {version} records to bna version {file_version} file")
+            
+            if index:
+                self._path = file
+                self._offsets = array('Q') # record offsets, block offsets for version 2
+                self._positions = array('Q') # version 2 record offsets in block data
+                self._end = _data_start(version)
+                if exists:
+                    offsets = _read_index(file, version)
+                    if offsets is None:
+                        offsets = bnaRead.build_index(file, save=False)
+                    if version==2:
+                        self._offsets.extend(offsets[:, 0].tolist())
+                        self._positions.extend(offsets[:, 1].tolist())
+                    else:
+                        self._offsets.extend(offsets.tolist())
+                    self._end = os.path.getsize(file)
+                    
             self._file = open(file, 'ab' if append else 'wb')
+            if version==2 and not exists:
+                self._file.write(V2_MAGIC)
+                
         elif isinstance(file, (BufferedWriter, BufferedRandom, _TemporaryFileWrapper)):
+            if index:
+                raise ValueError("Index can be written only for file specified by path")
             self._file = file
+            if version==2 and file.tell()==0:
+                self._file.write(V2_MAGIC)
         else:
             raise TypeError(f"Invalid file type. Accepted - string, Path, BufferedWriter. Got {type(file)}")
         
@@ -65,109 +819,164 @@ class bnaWrite:
 
     
     def close(self):
+        if self._pending_sizes:
+            self._write_blocks(final=True)
         self._file.close()
+        if self._path is not None:
+            offsets = np.asarray(self._offsets, dtype=np.uint64)
+            if self._version==2:
+                offsets = np.stack([offsets, np.asarray(self._positions, dtype=np.uint64)], axis=1)
+            _write_index(self._path, offsets, os.path.getsize(self._path))
+            
+            
+    def flush(self):
+        """
+        Writes buffered version 2 records as a block, even if it is not full.
+        """
+        if self._pending_sizes:
+            self._write_blocks(final=True)
+        self._file.flush()
 
 
     def __exit__(self, exc_type, exc_value, traceback):
         self.close()
 
 
-    def insert_3_bytes(self, barray, i1, i2, idx):
-        barray[idx+2] = i2%256 # third byte
-        barray[idx+1] = (i2>>8) # first half (from right) of second byte
-
-        barray[idx] = (i1>>4) # first byte
-        barray[idx+1] += ((i1%16)<<4) # second half (from right) of second byte
-
-
-    def insert_1_byte(self, barray, i1, i2, idx):
-        barray[idx] = i2
-        barray[idx] += (i1<<4)
-
-
-    def na_to_bytes(self, na: NucleicAcid, name: str, with_struct: bool):
-        namelen, slen, plen = len(name), len(na), len(na.pairs)
-        
-        Nbytes = 2 + 3 + namelen + math.ceil(0.5*slen)
-        if with_struct: Nbytes += math.ceil(1.5*plen)
-        na_bytes = bytearray([0 for _ in range(Nbytes)])
-
-        # meta block
-        na_bytes[1] = Nbytes%256
-        na_bytes[0] = Nbytes>>8
-        pointer = 2
-
-        self.insert_3_bytes(na_bytes, namelen, slen, pointer)
-        pointer += 3
-
-        # name
-        for c in name:
-            na_bytes[pointer] = ord(c)
-            pointer += 1
-
-        # seq
-        paired_nbs = set([o for o, _ in na.pairs])
-        for i in range(0, slen, 2):
-            nb1 = NB_DICT[na.seq[i]] | 8*int(i in paired_nbs and with_struct)
+    def na_to_bytes(self, na: NucleicAcid, name: str, with_struct: bool) -> bytearray:
+        """
+        Encodes a single record, version 2 record is not wrapped in block.
+        """
+        if self._version==2:
+            return bytearray(_encode_record_v2(na, name, with_struct))
+        return bytearray(_encode_record(na, name, with_struct))
+    
+    
+    def _add_records(self, records: bytes, sizes: Sequence[int]):
+        # buffers version 2 records and writes full blocks
+        self._pending.append(records)
+        self._pending_sizes.extend(sizes)
+        self._pending_bytes += len(records)
+        if self._pending_bytes>=self._block_size:
+            self._write_blocks(final=False)
             
-            nb2 = 0
-            if i<(slen-1):
-                nb2 += NB_DICT[na.seq[i+1]] | 8*int((i+1) in paired_nbs and with_struct)
             
-            self.insert_1_byte(na_bytes, nb1, nb2, pointer)
-            pointer += 1
-
-        # pairs
-        if with_struct:
-            pairs = na.pairs
-            for i in range(0, 2*(plen//2), 2): # iterate even part of sequence
-                nb1, nb2 = pairs[i][1], pairs[i+1][1]
-                self.insert_3_bytes(na_bytes, nb1, nb2, pointer)
-                pointer += 3
-
-            if plen%2!=0:
-                nb1 = pairs[-1][1]
-                na_bytes[pointer] = nb1>>4
-                na_bytes[pointer+1] = ((nb1%16)<<4)
-
-        return na_bytes
-
-
-    def write(self, na: NucleicAcid, 
-              write_struct: bool = True, 
-              write_meta: bool = True
-              ):
-
-        if len(na)>4095:
-            raise ValueError(f"Too long sequence ({len(na)} nb), maximum 4095 nbs supported")
+    def _write_blocks(self, final: bool):
+        # splits pending records in blocks of at least block size bytes, 
+        # the last incomplete block is kept pending unless final
+        data = b''.join(self._pending)
+        sizes = np.array(self._pending_sizes, dtype=np.int64)
+        ends = np.cumsum(sizes)
+        
+        blocks = []
+        first, start = 0, 0
+        while first<len(sizes):
+            last = int(np.searchsorted(ends, start + self._block_size)) + 1
+            if last>len(sizes):
+                if not final: break
+                last = len(sizes)
+                
+            end = int(ends[last-1])
+            blocks.append(_make_block(data[start:end], self._compression, self._level))
+            if self._path is not None:
+                self._offsets.extend([self._end]*(last-first))
+                self._positions.extend((ends[first:last] - sizes[first:last] - start).tolist())
+                self._end += len(blocks[-1])
+            first, start = last, end
+            
+        self._file.write(b''.join(blocks))
+        self._pending = [data[start:]] if start<len(data) else []
+        self._pending_sizes = self._pending_sizes[first:]
+        self._pending_bytes = len(data) - start
+    
+    
+    def _record_name(self, na: NucleicAcid, write_meta: bool) -> str:
+        if self._version==1 and len(na)>V1_MAX_LENGTH:
+            raise ValueError(f"Too long sequence ({len(na)} nb), maximum {V1_MAX_LENGTH} nbs supported, use version=2")
         
         name = na.name
         if write_meta and na.meta:
             str_meta = str(na.meta).replace(' ', '').replace("'", '').strip("{}")
             name = f"{name}{META_SEPARATOR}{str_meta}"
 
-        if len(name)>4095:
+        if self._version==1 and len(name)>V1_MAX_LENGTH:
             _with_meta = '(with meta json) ' if write_meta and na.meta else ''
-            raise ValueError(f"Name length {_with_meta}is too long, maximum 4095 characters supported")
+            raise ValueError(f"Name length {_with_meta}is too long, maximum {V1_MAX_LENGTH} characters supported, use version=2")
+            
+        return name
+
+
+    def write(self, na: NucleicAcid, 
+              write_struct: bool = True, 
+              write_meta: bool = True
+              ):
         
-        if len(rem:=(set(na.seq) - SUPPORTED_NB_SYMBOLS))!=0:
-            raise InvalidSequence(f"Only supported symbols - (A G C U T I N), got {', '.join(tuple(rem))}")
+        na_bytes = self.na_to_bytes(na, self._record_name(na, write_meta), write_struct)
+        if self._version==2:
+            self._add_records(bytes(na_bytes), [len(na_bytes)])
+            return
         
-        na_bytes = self.na_to_bytes(na, name, write_struct)
-        na_bytes = bytes(na_bytes)
         self._file.write(na_bytes)
+        if self._path is not None:
+            self._offsets.append(self._end)
+            self._end += len(na_bytes)
+        
+        
+    def write_many(self, nas: Sequence[NucleicAcid], 
+                   write_struct: bool = True, 
+                   write_meta: bool = True
+                   ):
+        """
+        Encodes all NucleicAcids at once and writes them with a single call. 
+        Nothing is written if any NucleicAcid is invalid.
+        """
+        nas = list(nas)
+        if len(nas)==0:
+            return
+        
+        names = [self._record_name(na, write_meta) for na in nas]
+        if self._version==2:
+            self._add_records(*_encode_records_v2(nas, names, write_struct))
+            return
+        
+        na_bytes, sizes = _encode_records(nas, names, write_struct)
+        self._file.write(na_bytes.tobytes())
+        
+        if self._path is not None:
+            self._offsets.extend((self._end + np.cumsum(sizes) - sizes).tolist())
+            self._end += int(sizes.sum())
 
 
 class bnaRead:
+    
+    def __new__(cls, file, *args, **kwargs):
+        # buffer protocol objects are read in place with random access
+        if cls is bnaRead and _as_buffer(file) is not None:
+            cls = bnaIndexedRead
+        return super().__new__(cls)
+    
 
     def __init__(self, file: Union[str, Path, BufferedWriter, BufferedRandom, _TemporaryFileWrapper]):
+        """
+        Format version is detected by magic header at current position of file.
+        Buffer protocol objects (bytes, memoryview, mmap, SharedMemory.buf) are decoded in place 
+        without copying by bnaIndexedRead.
+        """
+        self._path = None
         if isinstance(file, (str, Path)):
+            self._path = file
             self._file = open(file, 'rb')
         elif isinstance(file, (BufferedWriter, BufferedRandom, _TemporaryFileWrapper)):
             self._file = file
         else:
             raise TypeError(f"Invalid file type. Accepted - string, Path, TextIOWrapper. Got {type(file)}")
         
+        magic = self._file.read(len(V2_MAGIC))
+        self._version = _buffer_version(magic)
+        if self._version==1:
+            self._file.seek(-len(magic), os.SEEK_CUR)
+        
+        self._block, self._block_pos = b'', 0 # current version 2 block data and next record in it
+        self._decoded = deque() # records decoded by iteration and not returned yet
         self._iterator = self._iterate()
         
         
@@ -183,36 +992,96 @@ class bnaRead:
         self.close()
         
         
-    def __len__(self):
-        tell = self._file.tell()
-        self._file.seek(0)
-        count = 0
+    @property
+    def version(self) -> int:
+        return self._version
+        
+        
+    @classmethod
+    def open_indexed(cls, file, *, save_index: bool = False) -> "bnaIndexedRead":
+        """
+        Opens memory mapped bna file with random access to records: reader[i], reader[i:j], reader[[i, j, k]].
+        Offset index is loaded from sidecar file <file>.bnai or built by scanning record sizes if it is missing or stale.
 
-        size_block = int.from_bytes(self._file.read(2), 'big', signed=False)
-        if size_block==0: return 0
-        na_bytes = self._file.read(size_block-2)
+        :param file: path to bna file or buffer protocol object with bna data.
+        :param save_index: save built index to sidecar file. Default - False.
 
-        while na_bytes:
-            count += 1
+        :return: bnaIndexedRead object.
+        """
+        return bnaIndexedRead(file, save_index=save_index)
+    
+    
+    @staticmethod
+    def build_index(file: Union[str, Path], *, save: bool = True) -> numpy.array:
+        """
+        Scans record sizes of bna file and returns uint64 offsets of records.
+        Version 2 blocks are decompressed to find records in them.
+
+        :param file: path to bna file.
+        :param save: save index to sidecar file <file>.bnai. Default - True.
+
+        :return: array of record offsets, for version 2 - (block offset, offset in block data) pairs.
+        """
+        with open(file, 'rb') as f:
+            if os.path.getsize(file)==0:
+                offsets = np.zeros(0, dtype=np.uint64)
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    version = _buffer_version(buffer)
+                    offsets = _scan_offsets(buffer, version, _data_start(version))
+                    
+        if save:
+            _write_index(file, offsets, os.path.getsize(file))
+        return offsets
+    
+    
+    def _read_record(self) -> Optional[bytes]:
+        # record bytes after size block, None at the end of file
+        if self._version==1:
             size_block = int.from_bytes(self._file.read(2), 'big', signed=False)
-            if size_block==0: break
-            na_bytes = self._file.read(size_block-2)
+            if size_block==0: return None
+            return self._file.read(size_block-2)
+        
+        while self._block_pos>=len(self._block):
+            size, shift = 0, 0
+            while b:=self._file.read(1):
+                size |= (b[0]&127)<<shift
+                if b[0]<128: break
+                shift += 7
+            if size==0: return None
+            
+            body = self._file.read(size)
+            self._block, self._block_pos = _decompress(body[1:], body[0]), 0
+            
+        size, pointer = _read_varint(self._block, self._block_pos)
+        self._block_pos = pointer + size
+        return self._block[pointer:pointer+size]
+        
+        
+    def __len__(self):
+        if self._path is not None and (count:=_read_index(self._path, self._version, count_only=True)) is not None:
+            return count
+        
+        tell, block = self._file.tell(), (self._block, self._block_pos)
+        self._file.seek(_data_start(self._version))
+        self._block, self._block_pos = b'', 0
+        count = 0
+        while self._read_record():
+            count += 1
                 
         self._file.seek(tell)
+        self._block, self._block_pos = block
         return count
         
         
     def _iterate(self):
-        size_block = int.from_bytes(self._file.read(2), 'big', signed=False)
-        if size_block==0: return
-        na_bytes = self._file.read(size_block-2)
-
+        # records are decoded in chunks, read_many returns the rest of the chunk first
         while True:
-            yield self._make_na(na_bytes)
-
-            size_block = int.from_bytes(self._file.read(2), 'big', signed=False)
-            if size_block==0: break
-            na_bytes = self._file.read(size_block-2)
+            if not self._decoded:
+                self._decoded.extend(self._read_chunk(ITER_CHUNK))
+                if not self._decoded:
+                    return
+            yield self._decoded.popleft()
 
         
     def __iter__(self) -> Iterator[NucleicAcid]:
@@ -223,99 +1092,155 @@ class bnaRead:
         return next(self._iterator)
     
     
-    def read_3_bytes(self, barray, idx):
-        i1 = (barray[idx]<<4) + (barray[idx+1]>>4)
-        i2 = barray[idx+1]&15
-        i2 = (i2<<8) + barray[idx+2]
-        return i1, i2
-
+    def read_many(self, n: Optional[int] = None) -> List[NucleicAcid]:
+        """
+        Reads next n records (all remaining records by default) and decodes them at once.
+        """
+        k = len(self._decoded) if n is None else min(n, len(self._decoded))
+        nas = [self._decoded.popleft() for _ in range(k)]
+        if n is None or k<n:
+            nas.extend(self._read_chunk(None if n is None else n-k))
+        return nas
     
-    def read_1_byte(self, barray, idx):
-        return (barray[idx]>>4), (barray[idx]&15)
     
-
-    def parse_name(self, name_str):
-        if META_SEPARATOR not in name_str:
-            return name_str, None
+    def _read_chunk(self, n: Optional[int]) -> List[NucleicAcid]:
+        if n is None and self._version==1:
+            data = self._file.read()
+            return _decode_records(data, _scan_offsets(data) + 2)
+        
+        chunks = []
+        while (n is None or len(chunks)<n) and (na_bytes:=self._read_record()):
+            chunks.append(na_bytes)
+            
+        if self._version==2:
+            return _decode_records_v2(chunks)
         
-        name, meta_str = name_str.split(META_SEPARATOR)
-        meta = {}
-        for kv in meta_str.split(','):
-            k, v = kv.split(':')
-            meta[k] = v
+        starts = np.cumsum([len(c) for c in chunks], dtype=np.int64) - [len(c) for c in chunks]
+        return _decode_records(b''.join(chunks), starts)
+    
 
-        return name, meta
+    def parse_name(self, name_str):
+        return _parse_name(name_str)
     
 
     def _make_na(self, na_bytes: bytes) -> NucleicAcid:
-        pointer = 0
-        namelen, slen = self.read_3_bytes(na_bytes, pointer)
-        pointer += 3
-
-        # name
-        if namelen:
-            name_str = []
-            for _ in range(namelen):
-                name_str.append(chr(na_bytes[pointer]))
-                pointer += 1
-            name_str = ''.join(name_str)
-            name, meta = self.parse_name(name_str)
-        else:
-            name, meta = None, None
+        if self._version==2:
+            return _decode_record_v2(na_bytes)
+        return _decode_record(na_bytes, 0)
+    
 
-        # seq
-        seq = []
-        paired_nbs = []
-        for i in range(0, 2*(slen//2), 2):
-            i1, i2 = self.read_1_byte(na_bytes, pointer)
+class bnaIndexedRead(bnaRead):
+    
+    def __init__(self, file, *, save_index: bool = False):
+        """
+        :param file: path to bna file or buffer protocol object (bytes, memoryview, mmap, SharedMemory.buf). 
+            Buffer is not copied and must not be released while reader is used.
+        :param save_index: save built index to sidecar file, only for file path. Default - False.
+        """
+        self._path = self._file = None
+        if isinstance(file, (str, Path)):
+            self._path = file
+            self._file = open(file, 'rb')
+            if os.path.getsize(file)==0:
+                self._buffer = b''
+            else:
+                self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        elif (buffer:=_as_buffer(file)) is not None:
+            self._buffer = buffer
+        else:
+            raise TypeError(f"Invalid file type. Accepted - string, Path, buffer protocol object. Got {type(file)}")
+        self._version = _buffer_version(self._buffer)
             
-            seq.append(INV_NB_DICT[(i1&7)])
-            seq.append(INV_NB_DICT[(i2&7)])
-
-            if (i1&8): paired_nbs.append(i)
-            if (i2&8): paired_nbs.append(i+1)
-
-            pointer += 1
-
-        if slen%2!=0:
-            i1 = na_bytes[pointer]>>4
-            seq.append(INV_NB_DICT[(i1&7)])
-            pointer += 1
-
-        seq = ''.join(seq)
-
-        # pairs
-        compl_nbs = []
-        plen = len(paired_nbs)
-        for i in range(0, 2*(plen//2), 2):
-            i1, i2 = self.read_3_bytes(na_bytes, pointer)
-
-            compl_nbs.append(i1)
-            compl_nbs.append(i2)
-            pointer+=3
-
-        if plen%2!=0:
-            i1 = (na_bytes[pointer+1]>>4) + (na_bytes[pointer]<<4)
-            compl_nbs.append(i1)
-
-        pairs = tuple(zip(paired_nbs, compl_nbs))
-
-        # na
-        na = NucleicAcid()
-        if name: na.name = name
-        if meta: na.meta.update(meta)
+        offsets = None if self._path is None else _read_index(file, self._version)
+        if offsets is None:
+            offsets = _scan_offsets(self._buffer, self._version, _data_start(self._version))
+            if save_index and self._path is not None:
+                _write_index(file, offsets, len(self._buffer))
+        self._offsets = offsets
+        self._cached_block = (None, None) # offset and data of the last decompressed version 2 block
         
-        for i, nb in enumerate(seq):
-            _ = na._add_node(nb)
-                
-        if len(pairs):
-            for o, e in pairs:
-                na._add_bond(o, e)
-        else:
-            na.__dict__['struct'] = None
-
-        return na
+        self._pointer = 0 # next record for iteration and read_many
+        self._iterator = self._iterate()
+        
+        
+    def close(self):
+        self._cached_block = (None, None)
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        elif isinstance(self._buffer, memoryview):
+            self._buffer.release()
+        if self._file is not None:
+            self._file.close()
+        
+        
+    def __len__(self):
+        return len(self._offsets)
+    
+    
+    def _decode(self, offsets: numpy.array) -> List[NucleicAcid]:
+        if self._version==1:
+            return _decode_records(self._buffer, offsets.astype(np.int64) + 2)
+        
+        # every block is decompressed once per call, the last one is kept for sequential reads
+        blocks = dict([self._cached_block])
+        bodies = []
+        for block, pos in offsets.tolist():
+            if block not in blocks:
+                blocks[block] = _read_block(self._buffer, block)[0]
+            bodies.append(_record_body(blocks[block], pos))
+            
+        if bodies:
+            self._cached_block = (block, blocks[block])
+        return _decode_records_v2(bodies)
+    
+    
+    def _record(self, i: int) -> NucleicAcid:
+        if self._version==1:
+            return _decode_record(self._buffer, int(self._offsets[i]) + 2)
+        
+        block, pos = self._offsets[i].tolist()
+        if self._cached_block[0]!=block:
+            self._cached_block = (block, _read_block(self._buffer, block)[0])
+        return _decode_record_v2(_record_body(self._cached_block[1], pos))
+    
     
+    def __getitem__(self, key: Union[int, slice, Sequence[int]]) -> Union[NucleicAcid, List[NucleicAcid]]:
+        if isinstance(key, slice):
+            return self._decode(self._offsets[key])
+        
+        if isinstance(key, (int, np.integer)):
+            if key<0: key += len(self)
+            if not 0<=key<len(self):
+                raise IndexError(f"Record index is out of range")
+            return self._record(key)
+        
+        idx = np.asarray(key, dtype=np.int64)
+        idx = np.where(idx<0, idx+len(self), idx)
+        if len(idx) and (idx.min()<0 or idx.max()>=len(self)):
+            raise IndexError(f"Record index is out of range")
+        return self._decode(self._offsets[idx])
+    
+    
+    def read_many(self, n: Optional[int] = None) -> List[NucleicAcid]:
+        """
+        Decodes next n records (all remaining records by default) at once.
+        """
+        end = len(self) if n is None else min(len(self), self._pointer + n)
+        nas = self._decode(self._offsets[self._pointer:end])
+        self._pointer = max(end, self._pointer)
+        return nas
+    
+    
+    def _iterate(self):
+        # records are decoded in chunks, the rest of the chunk is dropped if read_many moved the pointer
+        while self._pointer<len(self):
+            start = self._pointer
+            for i, na in enumerate(self._decode(self._offsets[start:start+ITER_CHUNK])):
+                if self._pointer!=start+i: 
+                    break
+                self._pointer += 1
+                yield na
+
 
 bnaWrite.__doc__ = format_doc
-bnaRead.__doc__ = format_doc
\ No newline at end of file
+bnaRead.__doc__ = format_doc
@@ -1,11 +1,17 @@
-from typing import Iterator, Optional, Union
+from typing import Iterator, Iterable, Optional, Union, List
+from functools import partial
 import os
 from pathlib import Path
 from io import TextIOWrapper
 from tempfile import _TemporaryFileWrapper
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from fnmatch import fnmatch
+import numpy as np
 
 from ..containers import NucleicAcid
 from ..exceptions import InvalidStructure
+from .compression import open_text, strip_compression_extension
+from .dotLines import _map_bounded, _pack_nas, _unpack_nas, _write_chunks, WRITE_CHUNK
 
 
 
@@ -20,7 +26,7 @@ class bpseqRead:
                 ):
         
         if isinstance(file, (str, Path)):
-            self._file = open(file)
+            self._file = open_text(file)
         elif isinstance(file, (TextIOWrapper, _TemporaryFileWrapper)):
             self._file = file
         else:
@@ -43,42 +49,85 @@ class bpseqRead:
         
         
     def read(self) -> Optional[NucleicAcid]:
+        lines = self._file.read().split('\n')
+        
+        # pairs block is parsed at once, meta lines are expected around it
+        start, end = 0, len(lines)
+        while start<end and not lines[start].strip()[:1].isnumeric(): start += 1
+        while end>start and not lines[end-1].strip()[:1].isnumeric(): end -= 1
+        
+        tokens = '\n'.join(lines[start:end]).split()
+        idx_tokens = tokens[0::3]
+        n = len(idx_tokens)
+        if len(tokens)!=3*(end-start) or not all(map(str.isdigit, idx_tokens)):
+            return self._read_lines(lines)
+        try:
+            idx = np.array(list(map(int, idx_tokens)), dtype=np.int64)
+            compl = np.array(list(map(int, tokens[2::3])), dtype=np.int64)
+        except ValueError:
+            return self._read_lines(lines)
+        
+        o = np.flatnonzero(compl)
+        e = compl[o] - 1
+        valid = (idx==np.arange(1, n+1)).all() and (idx!=compl).all() and \
+                ((e>=0) & (e<n)).all() and (compl[e]-1==o).all()
+        # invalid structures are parsed line by line to raise the first error in line order
+        if not valid:
+            return self._read_lines(lines)
+            
+        seq = ''.join(tokens[1::3])
+        pt = np.full(len(seq), -1, dtype=np.int32)
+        pt[o] = e
+        return self._make_na(seq, pt, self._read_meta(lines[:start] + lines[end:]))
+    
+    
+    def _read_meta(self, lines: List[str]) -> dict:
         meta = {}
+        for line in map(str.strip, lines):
+            if not line or line[0].isnumeric(): continue
+            toks = line.split(META_SEPARATOR)
+            if len(toks)!=2: continue
+            k, v = toks
+            meta[k] = v
+        return meta
+    
+    
+    def _make_na(self, seq: str, pt: np.array, meta: dict) -> NucleicAcid:
+        na = NucleicAcid()
+        if self.name: na.name = self.name
+        if meta: na.meta.update(meta)
+        na._set_graph(seq, pt)
+        return na
+    
+    
+    def _read_lines(self, lines: List[str]) -> Optional[NucleicAcid]:
         seq = []
         pairs = {}
         prev_idx = 0
         
         # parse
-        for i, l in enumerate(self._file):
-            line = l.strip()
-            if not line: continue
+        for line in map(str.strip, lines):
+            if not line or not line[0].isnumeric(): continue # meta inf
             
-            if line[0].isnumeric(): # pair
-                idx, nb, compl = line.split()
-                idx, compl = int(idx), int(compl)
-                seq.append(nb)
-                
-                if (idx-prev_idx)!=1:
-                    if self.raise_na_errors:
-                        raise InvalidStructure(f"Nucleotide indexes must be sequential, got {idx} after {prev_idx}")
-                    return None
-
-                if idx==compl:
-                    if self.raise_na_errors:
-                        raise InvalidStructure(f"Nucleotide {idx} is self bounded")
-                    return None
+            idx, nb, compl = line.split()
+            idx, compl = int(idx), int(compl)
+            seq.append(nb)
+            
+            if (idx-prev_idx)!=1:
+                if self.raise_na_errors:
+                    raise InvalidStructure(f"Nucleotide indexes must be sequential, got {idx} after {prev_idx}")
+                return None
+
+            if idx==compl:
+                if self.raise_na_errors:
+                    raise InvalidStructure(f"Nucleotide {idx} is self bounded")
+                return None
+            
+            prev_idx = idx
+            if not compl:
+                continue
                 
-                prev_idx = idx
-                if not compl:
-                    continue
-                    
-                pairs[idx-1] = compl-1
-                    
-            else: # meta inf
-                toks = line.split(META_SEPARATOR)
-                if len(toks)!=2: continue
-                k, v = toks
-                meta[k] = v
+            pairs[idx-1] = compl-1
                 
         # validate
         for o, e in pairs.items():
@@ -100,18 +149,21 @@ class bpseqRead:
                     raise InvalidStructure(f"Nucleotide index {e} has two bonds")
                 return None
 
-        # make na
-        na = NucleicAcid()
-        if self.name: na.name = self.name
-        if meta: na.meta.update(meta)
-            
-        for i, nb in enumerate(seq):
-            _ = na._add_node(nb)
-            
+        seq = ''.join(seq)
+        pt = np.full(len(seq), -1, dtype=np.int32)
         for o, e in pairs.items():
-            na._add_bond(o, e)
-            
-        return na
+            pt[o] = e
+            pt[e] = o
+        return self._make_na(seq, pt, self._read_meta(lines))
+    
+    
+def _read_files(paths: List[Path], raise_na_errors: bool, file_as_name: bool, pack: bool):
+    # parses batch of files in worker
+    nas = []
+    for path in paths:
+        with bpseqRead(path, raise_na_errors=raise_na_errors, file_as_name=file_as_name) as f:
+            nas.append(f.read())
+    return _pack_nas(nas) if pack else nas
     
     
 class bpseqDirRead:
@@ -119,13 +171,34 @@ class bpseqDirRead:
     def __init__(self, Dir: Union[str, Path], *, 
                  raise_na_errors: bool = True, 
                  file_as_name: bool = False, 
+                 pattern: str = "*.bpseq",
+                 recursive: bool = False,
+                 sort: bool = True,
+                 workers: int = 1,
+                 processes: bool = True,
+                 batch_size: int = 64
                 ):
+        """
+        :param pattern: file name pattern, compressed files (.gz, .bz2, .xz) are matched without extension. Default - '*.bpseq'.
+        :param recursive: search files in subdirectories. Default - False.
+        :param sort: read files in order of relative paths, otherwise in order of directory scan. Default - True.
+        :param workers: number of workers, 1 - read in current process. Default - 1.
+        :param processes: use process pool, otherwise thread pool. Default - True.
+        :param batch_size: number of files parsed by worker at once. Default - 64.
+        """
             
         self._dir = Path(Dir)
         
         self.raise_na_errors = raise_na_errors
         self.file_as_name = file_as_name
-
+        self.pattern = pattern
+        self.recursive = recursive
+        self.sort = sort
+        self.workers = workers
+        self.processes = processes
+        self.batch_size = batch_size
+        
+        self._paths = None
         self._iterator = self._iterate()
         
         
@@ -135,27 +208,45 @@ class bpseqDirRead:
     
     def __exit__(self, exc_type, exc_value, traceback):
         ...
+        
+        
+    def _scan(self, directory: Path) -> Iterator[Path]:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file() and fnmatch(strip_compression_extension(entry.name), self.pattern):
+                    yield Path(entry.path)
+                elif self.recursive and entry.is_dir():
+                    yield from self._scan(entry.path)
+                    
+                    
+    @property
+    def paths(self) -> List[Path]:
+        if self._paths is None:
+            self._paths = list(self._scan(self._dir))
+            if self.sort:
+                self._paths.sort(key=lambda p: p.relative_to(self._dir).parts)
+        return self._paths
 
 
     def __len__(self):
-        count = 0
-        for file in os.listdir(self._dir):
-            if file.endswith(".bpseq"):
-                count += 1
-        return count
+        return len(self.paths)
     
 
     def _iterate(self):
-        for file in os.listdir(self._dir):
-            if not file.endswith(".bpseq"):
-                continue
-            
-            path = self._dir/file
-            with bpseqRead(path, 
-                           raise_na_errors=self.raise_na_errors, 
-                           file_as_name=self.file_as_name, 
-                          ) as f:
-                yield f.read()
+        paths = self.paths
+        batches = [paths[i:i+self.batch_size] for i in range(0, len(paths), self.batch_size)]
+        
+        if self.workers==1 or len(batches)<2:
+            for batch in batches:
+                yield from _read_files(batch, self.raise_na_errors, self.file_as_name, False)
+            return
+        
+        # NucleicAcids are transferred from processes in compact form
+        executor_cls = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+        with executor_cls(self.workers) as executor:
+            tasks = [(batch, self.raise_na_errors, self.file_as_name, self.processes) for batch in batches]
+            for result in _map_bounded(executor, _read_files, tasks, 2*self.workers):
+                yield from (_unpack_nas(result, False) if self.processes else result)
         
     
     def __iter__(self) ->  Iterator[Optional[NucleicAcid]]:
@@ -170,7 +261,7 @@ class bpseqWrite:
     
     def __init__(self, file: Union[str, Path, TextIOWrapper, _TemporaryFileWrapper]):
         if isinstance(file, (str, Path)):
-            self._file = open(file, 'w')
+            self._file = open_text(file, 'w')
         elif isinstance(file, (TextIOWrapper, _TemporaryFileWrapper)):
             self._file = file
         else:
@@ -189,20 +280,45 @@ class bpseqWrite:
         self.close()
         
         
-    def write(self, na: NucleicAcid, *,
-              write_meta: bool = True
-             ):
+    def _format(self, na: NucleicAcid, *,
+                write_meta: bool = True
+               ) -> str:
         
         if not isinstance(na, NucleicAcid):
             raise TypeError("Can write only NucleicAcid graph")
             
+        lines = []
         if write_meta and na.meta:
             for k, v in na.meta.items():
-                self._file.write(f"{k}{META_SEPARATOR}{str(v)}\n")
+                lines.append(f"{k}{META_SEPARATOR}{str(v)}\n")
                 
-        for i, nb in enumerate(na.seq):
-            compl = c+1 if (c:=na.complnb(i)) is not None else 0
-            self._file.write(f"{i+1} {nb} {compl}\n")
+        # 1-based index of complementary nb, unpaired -1 becomes 0
+        compl = (na.pair_table + 1).tolist()
+        lines.extend([f"{i} {nb} {c}\n" for i, nb, c in zip(range(1, len(compl)+1), na.seq, compl)])
+        return ''.join(lines)
+    
+    
+    def write(self, na: NucleicAcid, *,
+              write_meta: bool = True
+             ):
+        
+        self._file.write(self._format(na, write_meta=write_meta))
+        
+        
+    def write_many(self, data: Iterable[NucleicAcid], *, 
+                   chunk_size: int = WRITE_CHUNK, 
+                   threaded: bool = False, 
+                   write_meta: bool = True
+                  ):
+        """
+        Writes NucleicAcids by chunks, each chunk is formatted to a single string and written at once.
+        
+        :param data: iterable of NucleicAcids.
+        :param chunk_size: number of NucleicAcids in chunk. Default - 4096.
+        :param threaded: write chunks in background thread, so formatting overlaps with writing and compression. Default - False.
+        :param write_meta: write meta lines before each NucleicAcid. Default - True.
+        """
+        _write_chunks(self._file, data, partial(self._format, write_meta=write_meta), chunk_size, threaded)
+            
             
             
-            
\ No newline at end of file
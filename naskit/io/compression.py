@@ -0,0 +1,142 @@
+from typing import Optional, Union
+from pathlib import Path
+from io import TextIOWrapper, BufferedReader, BufferedWriter, RawIOBase
+import threading
+import queue
+import gzip
+import bz2
+import lzma
+
+
+
+BUFFER_SIZE = 1<<20 # bytes of compressed stream buffers
+COMPRESSION_MAGIC = {b'\x1f\x8b': 'gzip', b'BZh': 'bz2', b'\xfd7zXZ\x00': 'xz'}
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz'}
+COMPRESSION_OPEN = {'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+
+
+def detect_compression(path: Union[str, Path]) -> Optional[str]:
+    """
+    Detects compression of existing file by magic bytes.
+
+    :param path: path to file.
+
+    :return: 'gzip', 'bz2', 'xz' or None for uncompressed file.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(6)
+
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def compression_from_extension(path: Union[str, Path]) -> Optional[str]:
+    return COMPRESSION_EXTENSIONS.get(Path(path).suffix.lower())
+
+
+def strip_compression_extension(name: str) -> str:
+    suffix = Path(name).suffix
+    return name[:-len(suffix)] if suffix.lower() in COMPRESSION_EXTENSIONS else name
+
+
+def open_text(path: Union[str, Path], mode: str = 'r', *,
+              compression: Optional[str] = 'infer',
+              threaded: bool = False
+             ) -> TextIOWrapper:
+    """
+    Opens plain or compressed text file.
+
+    :param path: path to file.
+    :param mode: 'r', 'w' or 'a'.
+    :param compression: 'gzip', 'bz2', 'xz', None or 'infer' - from magic bytes for reading and from extension for writing. Default - 'infer'.
+    :param threaded: decompress in background thread, so parsing and decompression overlap. Only for reading. Default - False.
+
+    :return: text file object.
+    """
+    if mode not in ('r', 'w', 'a'):
+        raise ValueError(f"Invalid mode {mode}, accepted - 'r', 'w', 'a'")
+
+    if compression=='infer':
+        compression = detect_compression(path) if mode=='r' else compression_from_extension(path)
+    if compression is None:
+        return open(path, mode)
+    if compression not in COMPRESSION_OPEN:
+        raise ValueError(f"Unsupported compression {compression}, supported - {', '.join(COMPRESSION_OPEN)}")
+
+    stream = COMPRESSION_OPEN[compression](path, mode+'b')
+    if mode!='r':
+        return TextIOWrapper(BufferedWriter(stream, BUFFER_SIZE))
+    if threaded:
+        stream = _ThreadedReader(stream)
+    return TextIOWrapper(BufferedReader(stream, BUFFER_SIZE))
+
+
+def is_compressed(file) -> bool:
+    # text file object opened by open_text over compressed stream
+    buffer = getattr(file, 'buffer', None)
+    raw = getattr(buffer, 'raw', None)
+    return isinstance(raw, (_ThreadedReader, gzip.GzipFile, bz2.BZ2File, lzma.LZMAFile))
+
+
+class _ThreadedReader(RawIOBase):
+    """
+    Reads decompressed chunks of stream in background thread.
+    Decompressors release GIL, so decompression runs in parallel with parsing.
+    """
+
+    def __init__(self, stream, *, chunk_size: int = BUFFER_SIZE, depth: int = 4):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._queue = queue.Queue(depth)
+        self._stop = threading.Event()
+        self._chunk = memoryview(b'')
+        self._eof = False
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                chunk = self._stream.read(self._chunk_size)
+                self._queue.put(chunk)
+                if not chunk: break
+        except Exception as e:
+            self._queue.put(e)
+
+
+    def readable(self) -> bool:
+        return True
+
+
+    def readinto(self, b) -> int:
+        if not self._chunk and not self._eof:
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                self._eof = True
+                raise item
+            self._eof = not item
+            self._chunk = memoryview(item)
+
+        n = min(len(b), len(self._chunk))
+        b[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+        return n
+
+
+    def close(self):
+        if self.closed:
+            return
+
+        # unblock producer waiting on full queue
+        self._stop.set()
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.01)
+            except queue.Empty:
+                pass
+        self._stream.close()
+        super().close()
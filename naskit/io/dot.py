@@ -3,7 +3,7 @@ from pathlib import Path
 from io import TextIOWrapper
 from tempfile import _TemporaryFileWrapper
 
-from .dotLines import dotLinesRead, dotLinesWrite
+from .dotLines import dotLinesRead, dotLinesWrite, _pack_nas, _unpack_nas
 from ..parse_na import NA
 from ..containers import NucleicAcid
 from ..exceptions import InvalidFasta, InvalidDotBracket, InvalidSequence, InvalidStructure
@@ -43,13 +43,19 @@ class dotRead(dotLinesRead):
                     
     def __next__(self) -> Optional[NucleicAcid]:
         return next(self._na_iterator)
+    
+    
+    _name_chars = " >"
+    _multiline_sequence = False
+    _pack_chunk = staticmethod(_pack_nas)
+    _unpack_chunk = staticmethod(_unpack_nas)
         
         
     def _make_na(self, lines: List[str], last_na_idx: int) -> Optional[NucleicAcid]:
         if len(lines)<2:
             raise InvalidFasta(f"Empty structure at index {last_na_idx}")
             
-        name = lines[0].strip(" >")
+        name = lines[0].strip(self._name_chars)
         seq = lines[1]
         
         if len(lines)==2:
@@ -110,24 +116,33 @@ class dotWrite(dotLinesWrite):
         self.meta_separator = meta_separator
         
         
-    def write(self, na: NucleicAcid, *, 
-              write_struct: bool = True, 
-              write_meta: bool = True
-             ):
+    def _format(self, na: NucleicAcid, *, 
+                write_struct: bool = True, 
+                write_meta: bool = True
+               ) -> str:
         
         if not isinstance(na, NucleicAcid):
             raise ValueError(f"Data must be NucleicAcid container, got {type(na)}")
         
         name = f">{na.name}" or '>Seq'
         lines = [name, na.seq]
-        if na.struct is not None:
-            lines.append(na.struct)
+        if write_struct and (struct:=na.struct) is not None:
+            lines.append(struct)
         
         if na.meta and write_meta:
             for k, v in na.meta.items():
                 lines.append(f"{k}{self.meta_separator}{str(v)}")
         
-        super().write(lines)
+        lines.append('')
+        return '\n'.join(lines)
+    
+    
+    def write(self, na: NucleicAcid, *, 
+              write_struct: bool = True, 
+              write_meta: bool = True
+             ):
+        
+        self._file.write(self._format(na, write_struct=write_struct, write_meta=write_meta))
                 
                 
                 
@@ -1,18 +1,241 @@
-from typing import Iterator, Iterable, Optional, Union, List
+from typing import Iterator, Iterable, Optional, Union, List, Tuple, Sequence
+from functools import partial
 from pathlib import Path
-from io import TextIOWrapper
+from io import TextIOWrapper, BytesIO
 from tempfile import _TemporaryFileWrapper
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
+from itertools import islice
+from queue import Queue
+import threading
+import mmap
+import os
+import numpy as np
 
 from ..containers import NucleicAcid
+from ..parse_na import _make_na
 from ..exceptions import InvalidFasta
+from .compression import open_text, is_compressed, detect_compression
+
+
+
+BLOCK_SIZE = 1<<20 # characters read at once
+WRITE_CHUNK = 1<<12 # records formatted for one write call
+INDEX_SUFFIX = '.nai'
+
+index_doc = \
+"""
+Records index is stored in sidecar tab separated file <file>.nai. 
+First line is '#' and size of indexed file in bytes, index is stale and ignored if file size differs.
+Then a line for every record, first five columns are the same as in samtools .fai:
+
+    NAME - record name as parsed by reader
+    LENGTH - sequence length
+    OFFSET - offset of the first sequence byte
+    LINEBASES - number of nbs in sequence line, 0 if sequence lines have different lengths
+    LINEWIDTH - number of bytes in sequence line with new line characters
+    RECORD_OFFSET - offset of record name line
+    RECORD_SIZE - size of record in bytes
+"""
+
+
+def _chunk_ranges(path: Union[str, Path], chunk_size: int) -> List[Tuple[int, int]]:
+    # byte ranges of file split at lines starting with '>'
+    size = os.path.getsize(path)
+    if size==0:
+        return []
+    
+    bounds = [0]
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        while bounds[-1] + chunk_size < size:
+            pos = buffer.find(b'\n>', bounds[-1] + chunk_size - 1)
+            if pos<0: break
+            bounds.append(pos + 1)
+            
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _index_path(path: Union[str, Path]) -> Path:
+    return Path(f"{path}{INDEX_SUFFIX}")
+
+
+def _record_layout(record: bytes, name_chars: str, multiline: bool) -> Tuple[str, int, int, int, int]:
+    # name, sequence length, sequence offset in record, nbs and bytes in sequence line
+    lines = record.split(b'\n')
+    name = lines[0].decode().strip().strip(name_chars)
+    
+    offsets = np.cumsum([0]+[len(l)+1 for l in lines]).tolist()
+    rows = [k for k in range(1, len(lines)) if lines[k].strip()]
+    if multiline:
+        rows = [k for k in rows if not lines[k].strip().startswith(b';')]
+    else:
+        rows = rows[:1]
+    if not rows:
+        return name, 0, offsets[1], 0, 0
+    
+    seqs = [lines[k].strip() for k in rows]
+    if multiline:
+        seqs = [l.strip(b'*') for l in seqs]
+    length = sum([len(l) for l in seqs])
+    
+    first = lines[rows[0]]
+    lead = len(first) - len(first.lstrip())
+    linebases, linewidth = len(seqs[0]), len(first) + 1 - lead
+    
+    # contiguous fixed width lines without spaces, comments and '*' inside sequence
+    raw = [lines[k].rstrip(b'\r') for k in rows]
+    regular = rows[-1]-rows[0]==len(rows)-1 and len(seqs[-1])<=linebases and \
+              raw[-1].strip().rstrip(b'*')==seqs[-1]
+    if len(rows)>1:
+        regular = regular and raw[:-1]==seqs[:-1] and raw[-1].lstrip()==raw[-1] and \
+                  len(set([len(lines[k]) for k in rows[:-1]]))==1
+    if not regular:
+        linebases = linewidth = 0
+        
+    return name, length, offsets[rows[0]] + lead, linebases, linewidth
+
+
+def _build_index(buffer, name_chars: str, multiline: bool) -> List[tuple]:
+    # records start at lines beginning with '>'
+    first = buffer.find(b'\n')
+    if not bytes(buffer[:first if first>=0 else len(buffer)]).strip().startswith(b'>'):
+        raise InvalidFasta(f"First line name without '>'")
+    
+    rows, start, size = [], 0, len(buffer)
+    while start<size:
+        end = buffer.find(b'\n>', start)
+        end = size if end<0 else end + 1
+        name, length, offset, linebases, linewidth = _record_layout(buffer[start:end], name_chars, multiline)
+        rows.append((name, length, start + offset, linebases, linewidth, start, end - start))
+        start = end
+        
+    return rows
+
+
+def _write_index(path: Union[str, Path], rows: List[tuple], file_size: int):
+    with open(_index_path(path), 'w') as f:
+        f.write(f"#{file_size}\n")
+        f.writelines(['\t'.join(map(str, row)) + '\n' for row in rows])
+        
+        
+def _read_index(path: Union[str, Path]) -> Optional[List[tuple]]:
+    # None if index is missing or stale
+    index_path = _index_path(path)
+    if not index_path.exists():
+        return None
+    
+    with open(index_path) as f:
+        if f.readline().strip()!=f"#{os.path.getsize(path)}":
+            return None
+        return [(name, *map(int, values)) for name, *values in [l.rstrip('\n').split('\t') for l in f]]
+
+
+def _read_chunk(cls, path: Union[str, Path], start: int, end: int, kwargs: dict):
+    # parses byte range of file in worker process with the same reader class
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+        
+    with cls(TextIOWrapper(BytesIO(data)), **kwargs) as reader:
+        return cls._pack_chunk(list(reader))
+    
+    
+def _map_bounded(executor, fn, tasks: Iterable[tuple], limit: int, ordered: bool = True) -> Iterator:
+    # executor.map with limited number of tasks in flight to keep memory bounded
+    tasks = iter(tasks)
+    pending = deque()
+    while True:
+        while len(pending)<limit and (args:=next(tasks, None)) is not None:
+            pending.append(executor.submit(fn, *args))
+        if not pending:
+            break
+        
+        if ordered:
+            future = pending.popleft()
+        else:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            future = done.pop()
+            pending.remove(future)
+        yield future.result()
+        
+        
+def _pack_nas(nas: List[Optional[NucleicAcid]]) -> tuple:
+    # compact chunk of NucleicAcids for transfer between processes, None for invalid records
+    valid = [na for na in nas if na is not None]
+    return ([na is not None for na in nas],
+            [na.name for na in valid], 
+            [dict(na.meta) for na in valid], 
+            [na.__dict__.get('struct', '') is None for na in valid], 
+            np.array([len(na) for na in valid], dtype=np.int64), 
+            b''.join([bytes(na._seq) for na in valid]), 
+            b''.join([na._pt.tobytes() for na in valid]))
+
+
+def _unpack_nas(packed: tuple, arrays: bool):
+    is_valid, names, metas, no_struct, lengths, seqs, pts = packed
+    if arrays:
+        offsets = np.zeros(len(lengths)+1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return names, seqs.decode('ascii'), offsets, np.frombuffer(pts, dtype=np.int32)
+    
+    nas, k, o = [], 0, 0
+    for valid in is_valid:
+        if not valid:
+            nas.append(None)
+            continue
+            
+        n = int(lengths[k])
+        nas.append(_make_na(seqs[o:o+n].decode('ascii'), None if no_struct[k] else pts[4*o:4*(o+n)], names[k], metas[k]))
+        k += 1
+        o += n
+        
+    return nas
+
+
+
+def _write_chunks(file, records: Iterable, format, chunk_size: int, threaded: bool):
+    # formats records by chunks, each chunk is written by single call
+    records = iter(records)
+    chunks = iter(lambda: ''.join(map(format, islice(records, chunk_size))), '')
+    if not threaded:
+        for chunk in chunks:
+            file.write(chunk)
+        return
+    
+    # writing (and compression) of chunk in background thread overlaps with formatting of the next one
+    queue, errors = Queue(2), []
+    def run():
+        while (chunk:=queue.get()) is not None:
+            if errors: continue
+            try:
+                file.write(chunk)
+            except Exception as e:
+                errors.append(e)
+    
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        for chunk in chunks:
+            if errors: break
+            queue.put(chunk)
+    finally:
+        queue.put(None)
+        thread.join()
+        
+    if errors:
+        raise errors[0]
 
 
 
 class dotLinesRead:
 
     def __init__(self, file: Union[str, Path, TextIOWrapper, _TemporaryFileWrapper]):
+        self._path = None
         if isinstance(file, (str, Path)):
-            self._file = open(file)
+            self._file = open_text(file)
+            if not is_compressed(self._file):
+                self._path = file
         elif isinstance(file, (TextIOWrapper, _TemporaryFileWrapper)):
             self._file = file
         else:
@@ -34,39 +257,64 @@ class dotLinesRead:
         
         
     def __len__(self):
+        # number of lines starting with '>'
+        if self._path is not None and os.path.getsize(self._path):
+            with open(self._path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                # blocks overlap by one byte, every match is counted once by its start
+                return (buffer[:1]==b'>') + sum([buffer[i:i+BLOCK_SIZE+1].count(b'\n>') 
+                                                 for i in range(0, len(buffer), BLOCK_SIZE)])
+        
+        if not self._file.seekable():
+            raise TypeError("Number of records in not seekable stream is unknown")
+        
         tell = self._file.tell()
         self._file.seek(0)
-        count = 0
-        for l in self._file:
-            if l.startswith(">"):
-                count+=1
+        count, prev = 0, '\n'
+        while block:=self._file.read(BLOCK_SIZE):
+            count += block.count('\n>') + (prev=='\n' and block[0]=='>')
+            prev = block[-1]
                 
         self._file.seek(tell)
         return count
         
         
+    def _blocks(self) -> Iterator[str]:
+        # large text blocks of complete lines, the last block is the rest of file
+        parts = []
+        while block:=self._file.read(BLOCK_SIZE):
+            end = block.rfind('\n')
+            if end<0: # long line
+                parts.append(block)
+                continue
+                
+            parts.append(block[:end+1])
+            yield ''.join(parts)
+            parts = [block[end+1:]]
+            
+        yield ''.join(parts)
+        
+        
     def _iterate(self):
-        line = self._file.readline().strip()
-        if not line.startswith(">"):
+        blocks = self._blocks()
+        text = next(blocks)
+        if not text.split('\n', 1)[0].strip().startswith(">"):
             raise InvalidFasta(f"First line name without '>'")
         
-        lines = [line]
-        i = 0
-        
-        while True:
-            line = self._file.readline()
-            if not line: break # EOF
+        lines = []
+        while text is not None:
+            rows = [l for l in map(str.strip, text.split('\n')) if l] # without empty lines
+            names = [i for i, l in enumerate(rows) if l[0]==">"]
             
-            i += 1
-            line = line.strip()
-            if not line: continue # empty line
-            
-            if line.startswith(">"): # new na
-                yield tuple(lines)
-                lines = [line]
-                continue
-            
-            lines.append(line)
+            if names:
+                lines.extend(rows[:names[0]])
+                if lines: yield tuple(lines)
+                for i, j in zip(names, names[1:]):
+                    yield tuple(rows[i:j])
+                lines = rows[names[-1]:]
+            else:
+                lines.extend(rows)
+                
+            text = next(blocks, None)
             
         yield tuple(lines)
 
@@ -77,8 +325,225 @@ class dotLinesRead:
                     
     def __next__(self) -> Iterable[str]:
         return next(self._iterator)
+    
+    
+    _name_chars = ">" # stripped from name line
+    _multiline_sequence = False
+    
+    
+    @staticmethod
+    def _pack_chunk(items: list):
+        return items
+    
+    
+    @staticmethod
+    def _unpack_chunk(packed, arrays: bool) -> list:
+        if arrays:
+            raise ValueError("Arrays output is supported only for NucleicAcid readers")
+        return packed
+    
+    
+    @classmethod
+    def read_parallel(cls, file: Union[str, Path], *, 
+                      workers: Optional[int] = None, 
+                      chunk_size: int = 1<<24, 
+                      ordered: bool = True, 
+                      arrays: bool = False, 
+                      **kwargs
+                     ) -> Iterator:
+        """
+        Splits file into byte ranges at records boundaries (lines starting with '>') 
+        and parses them in process pool. Every chunk is parsed with the same rules as serial reader.
+
+        :param file: path to file.
+        :param workers: number of processes, 1 - parse in current process. Default - number of cpus.
+        :param chunk_size: approximate chunk size in bytes. Default - 16 MiB.
+        :param ordered: yield records in file order, otherwise in order of chunks completion. Default - True.
+        :param arrays: yield one tuple per chunk instead of records: names, concatenated sequences, 
+            int64 offsets of sequences and concatenated int32 pair tables with local indexes.
+            Invalid records are skipped. Only for NucleicAcid readers. Default - False.
+        :param kwargs: reader parameters, e.g. raise_na_errors.
+
+        :return: iterator over records or chunk arrays.
+        """
+        if not isinstance(file, (str, Path)):
+            raise TypeError(f"Invalid file type. Accepted - string, Path. Got {type(file)}")
+        if chunk_size<1:
+            raise ValueError(f"Chunk size must be positive, got {chunk_size}")
+        if detect_compression(file) is not None:
+            raise ValueError("Parallel reading of compressed file is not supported")
+        if arrays and cls._unpack_chunk is dotLinesRead._unpack_chunk:
+            raise ValueError("Arrays output is supported only for NucleicAcid readers")
+            
+        if workers is not None and workers<1:
+            raise ValueError(f"Number of workers must be positive, got {workers}")
+            
+        # arguments are checked on call, records are parsed on iteration
+        ranges = _chunk_ranges(file, chunk_size)
+        workers = workers or os.cpu_count() or 1
+        return cls._iterate_parallel(file, ranges, workers, ordered, arrays, kwargs)
+    
+    
+    @classmethod
+    def _iterate_parallel(cls, 
+                          file: Union[str, Path], 
+                          ranges: List[Tuple[int, int]], 
+                          workers: int, 
+                          ordered: bool, 
+                          arrays: bool, 
+                          kwargs: dict
+                         ) -> Iterator:
+        if workers==1 or len(ranges)<2:
+            for start, end in ranges:
+                chunk = cls._unpack_chunk(_read_chunk(cls, file, start, end, kwargs), arrays)
+                yield from ([chunk] if arrays else chunk)
+            return
+        
+        with ProcessPoolExecutor(workers) as executor:
+            tasks = [(cls, file, start, end, kwargs) for start, end in ranges]
+            for packed in _map_bounded(executor, _read_chunk, tasks, 2*workers, ordered):
+                chunk = cls._unpack_chunk(packed, arrays)
+                yield from ([chunk] if arrays else chunk)
+            
+
+    @classmethod
+    def build_index(cls, file: Union[str, Path], *, save: bool = True) -> List[tuple]:
+        """
+        Scans file and builds records index.
+
+        :param file: path to file.
+        :param save: save index to sidecar file <file>.nai. Default - True.
+
+        :return: list of index rows.
+        """
+        if detect_compression(file) is not None:
+            raise ValueError("Index of compressed file is not supported")
+        
+        with open(file, 'rb') as f:
+            if os.path.getsize(file)==0:
+                rows = []
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    rows = _build_index(buffer, cls._name_chars, cls._multiline_sequence)
+                
+        if save:
+            _write_index(file, rows, os.path.getsize(file))
+        return rows
+    
+    
+    @classmethod
+    def open_indexed(cls, file: Union[str, Path], *, save_index: bool = False, **kwargs) -> "dotLinesIndexedRead":
+        """
+        Opens file with random access to records by name: reader[name], reader[[name1, name2]], 
+        and to sub-sequences without parsing whole records: reader.fetch(name, start, end).
+        Index is loaded from sidecar file <file>.nai or built by scanning file if it is missing or stale.
+
+        :param file: path to file.
+        :param save_index: save built index to sidecar file. Default - False.
+        :param kwargs: reader parameters, e.g. raise_na_errors.
+
+        :return: dotLinesIndexedRead object.
+        """
+        return dotLinesIndexedRead(cls, file, save_index=save_index, **kwargs)
             
 
+class dotLinesIndexedRead:
+    
+    def __init__(self, reader_cls: type, file: Union[str, Path], *, save_index: bool = False, **kwargs):
+        if not isinstance(file, (str, Path)):
+            raise TypeError(f"Invalid file type. Accepted - string, Path. Got {type(file)}")
+            
+        self._reader_cls = reader_cls
+        self._kwargs = kwargs
+        self._file = open(file, 'rb')
+        
+        rows = _read_index(file)
+        if rows is None:
+            rows = reader_cls.build_index(file, save=save_index)
+        self._rows = rows
+        
+        self._names = {}
+        for i, row in enumerate(rows):
+            self._names.setdefault(row[0], i) # the first record for repeated names
+        
+        
+    def __enter__(self):
+        return self
+
+    
+    def close(self):
+        self._file.close()
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        
+        
+    def __len__(self):
+        return len(self._rows)
+    
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+    
+    
+    def keys(self) -> List[str]:
+        return [row[0] for row in self._rows]
+    
+    
+    def _row(self, key: Union[str, int]) -> tuple:
+        if isinstance(key, str):
+            if key not in self._names:
+                raise KeyError(f"Record {key} is not found")
+            return self._rows[self._names[key]]
+        return self._rows[key]
+    
+    
+    def _read(self, offset: int, size: int) -> bytes:
+        self._file.seek(offset)
+        return self._file.read(size)
+    
+    
+    def __getitem__(self, key: Union[str, int, Sequence[Union[str, int]]]):
+        if isinstance(key, (str, int, np.integer)):
+            return self[[key]][0]
+        
+        # records are parsed at once by the reader in requested order
+        records = [self._read(*self._row(k)[5:]).rstrip(b'\n') + b'\n' for k in key]
+        if not records:
+            return []
+        with self._reader_cls(TextIOWrapper(BytesIO(b''.join(records))), **self._kwargs) as reader:
+            return list(reader)
+    
+    
+    def fetch(self, key: Union[str, int], start: int = 0, end: Optional[int] = None) -> str:
+        """
+        Reads sub-sequence [start, end) of record without parsing it.
+
+        :param key: record name or index.
+        :param start: 0-based start position. Default - 0.
+        :param end: end position (exclusive). Default - sequence length.
+
+        :return: sub-sequence string.
+        """
+        name, length, offset, linebases, linewidth, *_ = self._row(key)
+        end = length if end is None else min(end, length)
+        start = max(start, 0)
+        if start>=end:
+            return ''
+        
+        if linebases==0: # irregular lines
+            record = self[key]
+            if record is None:
+                raise InvalidFasta(f"Record {name} is invalid")
+            return (record[1] if isinstance(record, tuple) else record.seq)[start:end]
+            
+        a = offset + (start//linebases)*linewidth + start%linebases
+        b = offset + ((end-1)//linebases)*linewidth + (end-1)%linebases + 1
+        seq = self._read(a, b-a).decode().replace('\n', '').replace('\r', '')
+        return seq.upper() if self._kwargs.get('upper_sequence') else seq
+        
+
 class dotLinesWrite:
     
     def __init__(self, file: Union[str, Path, TextIOWrapper, _TemporaryFileWrapper], *, 
@@ -86,7 +551,7 @@ class dotLinesWrite:
                 ):
         
         if isinstance(file, (str, Path)):
-            self._file = open(file, 'a' if append else 'w')
+            self._file = open_text(file, 'a' if append else 'w')
         elif isinstance(file, (TextIOWrapper, _TemporaryFileWrapper)):
             self._file = file
         else:
@@ -105,22 +570,34 @@ class dotLinesWrite:
         self.close()
 
 
-    def write(self, data: Iterable[str], **kwargs):
+    def _format(self, data: Iterable[str], **kwargs) -> str:
         if len(data)<2:
             raise ValueError(f"At least two lines required")
             
         if not all([isinstance(d, str) for d in data]):
             raise ValueError(f"All passed data must be strings")
             
-        for i in range(0, len(data)):
-            self._file.write(f"{data[i]}\n")
-        
-        
-        
-        
-        
-        
+        return ''.join([f"{d}\n" for d in data])
+    
+    
+    def write(self, data: Iterable[str], **kwargs):
+        self._file.write(self._format(data, **kwargs))
         
         
+    def write_many(self, data: Iterable, *, 
+                   chunk_size: int = WRITE_CHUNK, 
+                   threaded: bool = False, 
+                   **kwargs
+                  ):
+        """
+        Writes records by chunks, each chunk is formatted to a single string and written at once.
         
-        
\ No newline at end of file
+        :param data: iterable of records accepted by write.
+        :param chunk_size: number of records in chunk. Default - 4096.
+        :param threaded: write chunks in background thread, so formatting overlaps with writing and compression. Default - False.
+        :param kwargs: arguments of write.
+        """
+        _write_chunks(self._file, data, partial(self._format, **kwargs), chunk_size, threaded)
+
+
+dotLinesIndexedRead.__doc__ = index_doc
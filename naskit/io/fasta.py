@@ -3,7 +3,7 @@ from pathlib import Path
 from io import TextIOWrapper
 from tempfile import _TemporaryFileWrapper
 
-from .dotLines import dotLinesRead, dotLinesWrite
+from .dotLines import dotLinesRead, dotLinesWrite, _pack_nas, _unpack_nas
 from ..parse_na import NA
 from ..containers import NucleicAcid
 from ..exceptions import *
@@ -38,11 +38,17 @@ class fastaRead(dotLinesRead):
         return next(self._na_iterator)
     
     
+    _name_chars = ">"
+    _multiline_sequence = True
+    _pack_chunk = staticmethod(_pack_nas)
+    _unpack_chunk = staticmethod(_unpack_nas)
+    
+    
     def _make_na(self, lines: List[str], last_na_idx: int) -> Optional[NucleicAcid]:
         if len(lines)<2:
             raise InvalidFasta(f"Empty structure (structure at line {last_na_idx})")
             
-        name = lines[0].strip(">")
+        name = lines[0].strip(self._name_chars)
         seq = ''.join([l.strip("*") for l in lines[1:] if not l.startswith(";")])
         
         # make NA
@@ -71,7 +77,7 @@ class fastaWrite(dotLinesWrite):
         super().__init__(file, append=append)
         
         
-    def write(self, na: NucleicAcid):
+    def _format(self, na: NucleicAcid) -> str:
         
         if not isinstance(na, NucleicAcid):
             raise ValueError(f"Data must be NucleicAcid container, got {type(na)}")
@@ -81,14 +87,13 @@ class fastaWrite(dotLinesWrite):
         
         # split seq to chunks of 80 nb
         lines = [name]
-        i=0
-        for i in range(len(seq)//80):
-            lines.append(seq[i*80 : (i+1)*80])
-
-        if len(seq)%80!=0:
-            lines.append(seq[(i+1)*80:])
-
-        super().write(lines)
+        lines.extend([seq[i:i+80] for i in range(0, len(seq), 80)])
+        lines.append('')
+        return '\n'.join(lines)
+    
+    
+    def write(self, na: NucleicAcid):
+        self._file.write(self._format(na))
                 
                 
                 
@@ -1,4 +1,4 @@
-from typing import Union, List, Dict, Optional
+from typing import Union, List, Dict, Optional, Iterable, Iterator, Tuple
 from pathlib import Path
 from io import TextIOWrapper
 from tempfile import _TemporaryFileWrapper
@@ -7,10 +7,12 @@ import tempfile
 import numpy as np
 
 from ..containers.pdb.pdbAtom import PdbAtom
+from ..containers.pdb.atomTable import AtomTable
 from ..containers.pdb.pdbMolecule import PdbMolecule
 from ..containers.pdb.pdbResidue import PdbResidue, NucleicAcidResidue, AminoacidResidue
 from ..containers.pdb.pdbContainer import PDB, PDBModels, NucleicAcidChain, ProteinChain
 from ..exceptions import InvalidPDB
+from .compression import open_text
 
 
 
@@ -25,15 +27,198 @@ AMINOACID_NAMES = {'ALA', 'CYS', 'ASP', 'GLU',
                    'HIS', 'HID', 'HIE', 'HIP',
                           'HSD', 'HSE', 'HSP'}
 
+LINE_WIDTH = 80
 
+
+def _molecule_class(mname: str):
+    if mname in NA_NAMES:
+        return NucleicAcidResidue
+    elif mname in AMINOACID_NAMES:
+        return AminoacidResidue
+    return PdbMolecule
+
+
+def _column(raw: np.ndarray, start: int, end: int) -> np.ndarray:
+    # fixed width field of every row as bytes array
+    return np.ndarray(shape=(raw.shape[0],), dtype=f"S{end-start}", 
+                      buffer=raw, offset=start, strides=(raw.shape[1],))
+
+
+def _line_heads(buf: np.ndarray, starts: np.ndarray, width: int = 6) -> np.ndarray:
+    # first bytes of every line, bytes after the end of short line start with newline and do not match record names
+    return buf.take(starts[:, None] + np.arange(width), mode='clip')
+
+
+def _atom_rows(buf: np.ndarray, starts: np.ndarray, lengths: np.ndarray, lines: np.ndarray) -> np.ndarray:
+    """
+    Copies lines of data buffer to rows of LINE_WIDTH bytes padded by spaces.
+    Consecutive lines of the same length are copied as one block.
+    """
+    starts, lengths = starts[lines], lengths[lines]
+    breaks = np.flatnonzero((np.diff(lines)!=1) | (np.diff(lengths)!=0)) + 1
+    if len(breaks)>len(lines)//16: # lines of different lengths
+        rows = np.array([buf[s:s+l].tobytes() for s, l in zip(starts.tolist(), lengths.tolist())], 
+                        dtype=f"S{LINE_WIDTH}").view(np.uint8).reshape(-1, LINE_WIDTH)
+        rows[rows==0] = 32
+        return rows
+        
+    rows = np.full((len(lines), LINE_WIDTH), 32, dtype=np.uint8)
+    bounds = [0, *breaks.tolist(), len(lines)]
+    for i, j in zip(bounds[:-1], bounds[1:]):
+        start, length = int(starts[i]), int(lengths[i])
+        width = min(length, LINE_WIDTH)
+        rows[i:j, :width] = buf[start:start+(j-i)*(length+1)].reshape(-1, length+1)[:, :width]
+    return rows
+
+
+def _fixed_point(raw: np.ndarray, start: int, end: int, decimals: int = 0, fields: int = 1) -> Optional[np.ndarray]:
+    """
+    Parses right aligned numbers [-]ddd.ddd from digits of consecutive fixed width fields.
+    Returns None if any field has other layout.
+    """
+    width = (end - start)//fields
+    # character positions of all fields are rows, so every step is an operation on contiguous rows
+    block = raw[:, start:end].reshape(-1, width).T.copy()
+    digits = block - np.uint8(48)
+    is_digit = digits<10
+    
+    dot = width - decimals - 1 if decimals else None
+    if decimals:
+        if not (block[dot]==46).all():
+            return None
+        is_digit[dot] = True # dot is checked as digit and skipped in sum
+        
+    # spaces, minus before the first digit, digits up to the end of field
+    minus = block==45
+    if not ((is_digit | minus | (block==32)).all() 
+            and is_digit[-1].all() 
+            and (is_digit[:-1]<=is_digit[1:]).all() 
+            and not (minus[:-1] & ~is_digit[1:]).any()):
+        return None
+    
+    # integer of up to 9 digits, exact float division gives the same value as float(str)
+    digits *= is_digit
+    values = np.zeros(block.shape[1], dtype=np.int32 if width - bool(decimals)<=9 else np.int64)
+    for j in range(width):
+        if j!=dot:
+            values *= 10
+            values += digits[j]
+            
+    if decimals:
+        values = values/10**decimals
+        values[minus.any(axis=0)] *= -1 # -0.0 as float
+    else:
+        values[minus.any(axis=0)] *= -1
+    return values.reshape(-1, fields) if fields>1 else values
+
+
+def _number_column(raw: np.ndarray, start: int, end: int, 
+                   decimals: int = 0, 
+                   blank: bytes = None, 
+                   dtype = np.float64
+                  ) -> np.ndarray:
+    # other layouts and blank fields are converted by NumPy, ValueError for invalid fields
+    values = _fixed_point(raw, start, end, decimals)
+    if values is None:
+        values = np.char.strip(_column(raw, start, end))
+        if blank is not None:
+            values = np.where(values==b'', blank, values)
+        values = values.astype(dtype)
+    return values
+
+
+def _parse_atom_columns(raw: np.ndarray, 
+                        is_hetatm: np.ndarray, 
+                        derive_element: bool, 
+                        element_derive_func
+                       ) -> Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+    """
+    Decodes fixed width fields of ATOM/HETATM lines (same fields as PdbAtom.from_pdb_line).
+    Numbers are parsed from digits, text fields are kept as bytes for AtomTable.
+    Returns coords and columns or None if any field can not be decoded in bulk.
+    """
+    try:
+        anum = _number_column(raw, 6, 11, dtype=np.int64)
+        # residue insertion codes are not supported by bulk parsing
+        mnum = _number_column(raw, 22, 26, dtype=np.int64) if (raw[:, 26]==32).all() else _column(raw, 22, 27).astype(np.int64)
+        coords = _fixed_point(raw, 30, 54, 3, fields=3)
+        if coords is None:
+            coords = np.stack([_column(raw, s, s+8).astype(np.float64) for s in (30, 38, 46)], axis=1)
+        occupancy = _number_column(raw, 54, 60, 2, blank=b'1')
+        temp = _number_column(raw, 60, 66, 2, blank=b'0')
+    except ValueError:
+        return None
+    
+    aname = np.char.strip(_column(raw, 12, 16))
+    mname = np.char.strip(_column(raw, 17, 21))
+    chain = _column(raw, 21, 22)
+    
+    element = np.char.strip(_column(raw, 76, 78))
+    if (no_element:=(element==b'')).any():
+        if not derive_element:
+            return None
+        if element_derive_func is None:
+            element_derive_func = PdbAtom._default_element_derive_func
+            
+        element = element.astype(str).tolist()
+        for i in np.flatnonzero(no_element).tolist():
+            element[i] = element_derive_func(bool(is_hetatm[i]), aname[i].decode(), mname[i].decode(), chain[i].decode())
+        element = np.array(element, dtype=str)
+    
+    # few distinct charges are parsed as in PdbAtom
+    if (raw[:, 78:80]==32).all():
+        charge = np.zeros(len(raw), dtype=np.int8)
+    else:
+        charges, charge_idx = np.unique(np.char.strip(_column(raw, 78, 80)), return_inverse=True)
+        try:
+            charges = np.array([PdbAtom._parse_charge(c.decode(), 0, '') for c in charges.tolist()], dtype=np.int8)
+        except InvalidPDB:
+            return None
+        charge = charges[charge_idx.ravel()]
+    
+    return coords.astype(np.float32), dict(is_hetatm=is_hetatm, anum=anum.astype(np.int32), 
+                                           aname=aname, altloc=_column(raw, 16, 17), 
+                                           mname=mname, chain=chain, mnum=mnum.astype(np.int32), 
+                                           occupancy=occupancy, temp=temp, 
+                                           segment=_column(raw, 72, 76), 
+                                           element=element, charge=charge)
+    
+
+class _MoleculeRows:
+    """
+    Lazy molecules of atom table with fields of their first atoms.
+    """
+    __slots__ = ("mols", "classes", "chains", "mnums")
+    
+    def __init__(self, mols: list, classes: list, chains: list, mnums: list):
+        self.mols = mols
+        self.classes = classes
+        self.chains = chains
+        self.mnums = mnums
+        
+    def make_chain(self, idx: List[int]) -> Union[NucleicAcidChain, ProteinChain]:
+        residues = [self.mols[k] for k in idx]
+        first = self.classes[idx[0]]
+        chain = NucleicAcidChain() if first is NucleicAcidResidue else ProteinChain()
+        
+        if all([self.classes[k] is first for k in idx]) and len(set([self.mnums[k] for k in idx]))==len(idx):
+            chain._extend(residues)
+        else: # chain raises error for invalid residue
+            for r in residues:
+                chain.add(r)
+        return chain
+    
+    
 class pdbRead:
     def __init__(self, file: Union[str, Path, TextIOWrapper, _TemporaryFileWrapper]):
         if isinstance(file, (str, Path)):
-            self._file = open(file)
+            self._file = open_text(file)
         elif isinstance(file, (TextIOWrapper, _TemporaryFileWrapper)):
             self._file = file
         else:
             raise TypeError(f"Invalid file type. Accepted - string, Path, TextIOWrapper. Got {type(file)}")
+        # nothing is read from text layer of opened file yet, so read can take bytes of the file
+        self._binary = isinstance(file, (str, Path))
         
     def __enter__(self):
         return self
@@ -51,7 +236,291 @@ class pdbRead:
              skip_HETATM: bool = False
             ):
         
-        lines = self._file.readlines()
+        if self._binary:
+            data = self._file.buffer.read()
+            if b'\r' in data: # newlines of text mode
+                data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        else:
+            data = self._file.read()
+            
+        return self._read_text(data, 
+                               derive_element=derive_element, 
+                               element_derive_func=element_derive_func, 
+                               skip_HETATM=skip_HETATM)
+    
+    
+    def iter_models(self, 
+                    models: Union[int, slice, Iterable[int], None] = None,
+                    derive_element: bool = False, 
+                    element_derive_func = None,
+                    skip_HETATM: bool = False
+                   ) -> Iterator[PDB]:
+        """
+        Streams the file and yields models one by one as PDB. 
+        Lines of one model are kept at a time, atoms of not selected models are not parsed.
+        File without MODEL lines is a single model.
+        
+        :param models: index, slice or indices of yielded models (from 0). 
+                       Negative indices are not supported, reading stops after the last selected model.
+                       Default - None, all models.
+        :param derive_element: derive missing elements, see PdbAtom.from_pdb_line.
+        :param element_derive_func: function for element deriving.
+        :param skip_HETATM: skip HETATM lines.
+        
+        :return: iterator of PDB.
+        """
+        if models is None:
+            selected, last = None, None
+        elif isinstance(models, slice):
+            if any([(v is not None and v<0) for v in (models.start, models.stop, models.step)]):
+                raise ValueError(f"Negative slice of models is not supported in streaming, got {models}.")
+            start = models.start or 0
+            step = models.step or 1
+            selected = lambda i: i>=start and (i-start)%step==0
+            last = None if models.stop is None else models.stop-1
+        else:
+            indices = {models} if isinstance(models, int) else set(models)
+            if any([i<0 for i in indices]):
+                raise ValueError(f"Negative model indices are not supported in streaming, got {models}.")
+            selected = indices.__contains__
+            last = max(indices, default=-1)
+        
+        if last is not None and last<0:
+            return
+        self._binary = False
+            
+        kwargs = dict(derive_element=derive_element, element_derive_func=element_derive_func, skip_HETATM=skip_HETATM)
+        model_state = 0 # 0 - undefined, 1 - opened (after MODEL), 2 - closed (ENDMDL)
+        model_idx = 0
+        block = []
+        keep = selected is None or selected(0)
+        has_atoms = False # atoms or TER lines in current block
+        
+        for l in self._file:
+            if l.startswith("MODEL"):
+                if model_state==1:
+                    raise InvalidPDB(f"PDB contains second MODEL line ({l.strip()}) without closing ENDMDL before.")
+                if has_atoms:
+                    raise InvalidPDB(f"PDB contains atom or TER lines before opening ({l.strip()}) line.")
+                    
+                model_state = 1
+                keep = selected is None or selected(model_idx)
+                block = [l] if keep else []
+                
+            elif l.startswith("ENDMDL"):
+                if model_state!=1:
+                    raise InvalidPDB(f"PDB contains closing ({l.strip()}) line without opening MODEL line before.")
+                if not has_atoms:
+                    raise InvalidPDB(f"PDB contains empty model. Closed at line ({l.strip()}).")
+                    
+                if keep:
+                    block.append(l)
+                    yield self._read_text("".join(block), **kwargs)[0]
+                if model_idx==last:
+                    return
+                    
+                model_state = 2
+                model_idx += 1
+                keep = False
+                block = []
+                has_atoms = False
+                
+            else:
+                if l.startswith("ATOM") or l.startswith("HETATM") or l.startswith("TER"):
+                    has_atoms = True
+                if keep:
+                    block.append(l)
+        
+        if has_atoms:
+            if model_state!=0:
+                raise InvalidPDB(f"The last PDB model is not closed by ENDMDL.")
+            if keep: # single model without MODEL and ENDMDL in pdb file
+                yield self._read_text("".join(block), **kwargs)[0]
+    
+    
+    def _read_text(self, 
+                   text: Union[str, bytes], 
+                   derive_element: bool = False, 
+                   element_derive_func = None,
+                   skip_HETATM: bool = False
+                  ) -> PDBModels:
+        
+        models = self._read_columns(text, 
+                                    derive_element=derive_element, 
+                                    element_derive_func=element_derive_func, 
+                                    skip_HETATM=skip_HETATM)
+        if models is not None:
+            return models
+        
+        # files which can not be decoded in bulk are parsed line by line
+        if isinstance(text, bytes):
+            text = text.decode(self._file.encoding)
+        lines = text.split('\n') if text else []
+        if text.endswith('\n'):
+            lines.pop()
+        return self._read_lines(lines, 
+                                derive_element=derive_element, 
+                                element_derive_func=element_derive_func, 
+                                skip_HETATM=skip_HETATM)
+    
+    
+    def _read_columns(self, 
+                      text: Union[str, bytes], 
+                      derive_element: bool = False, 
+                      element_derive_func = None,
+                      skip_HETATM: bool = False
+                     ) -> Optional[PDBModels]:
+        """
+        Parses fixed width columns of all atoms at once with NumPy.
+        Molecules are made directly from rows of atom table, atoms are created on access.
+        Returns None for files which need line by line parsing, errors are raised by it.
+        Lines are located in bytes of the file, only ATOM and HETATM rows are copied to the table.
+        Reading of 110 000 atoms from file is about 9.5x faster than by line parser (0.08 s against 0.75 s),
+        see benchmarks/bench_pdb_read.py.
+        """
+        # bytes are read from file, header and events are decoded as text of the file
+        encoding = self._file.encoding if isinstance(text, bytes) else 'utf-8'
+        data = text.encode(encoding) if isinstance(text, str) else text
+        if not data.endswith(b'\n'):
+            data += b'\n'
+            
+        # lines are located in data buffer, only atom lines are copied to rows
+        buf = np.frombuffer(data, dtype=np.uint8)
+        ends = np.flatnonzero(buf==10)
+        starts = np.zeros(len(ends), dtype=np.int64)
+        starts[1:] = ends[:-1] + 1
+        lengths = ends - starts
+        heads = _line_heads(buf, starts)
+        
+        is_atom = (_column(heads, 0, 4)==b'ATOM') | (is_hetatm:=(_column(heads, 0, 6)==b'HETATM'))
+        is_model = _column(heads, 0, 5)==b'MODEL'
+        
+        # header - lines before the first atom or model
+        first = np.flatnonzero(is_atom | is_model)
+        if len(first)==0:
+            return None
+        first = first[0]
+        header = "\n".join([l.rstrip() for l in data[:starts[first]].decode(encoding).split('\n')[:first]])
+        
+        if skip_HETATM:
+            is_atom &= ~is_hetatm
+        is_atom[:first] = False
+        is_event = (_column(heads, 0, 3)==b'TER') | is_model | (_column(heads, 0, 6)==b'ENDMDL')
+        is_event[:first] = False
+        
+        atom_lines = np.flatnonzero(is_atom)
+        if len(atom_lines)==0:
+            return None
+        raw = _atom_rows(buf, starts, lengths, atom_lines)
+        if not data.isascii() and (raw>=128).any(): # non ascii characters shift columns of atom lines
+            return None
+        parsed = _parse_atom_columns(raw, is_hetatm[atom_lines], derive_element, element_derive_func)
+        if parsed is None:
+            return None
+        coords, columns = parsed
+        
+        # anisotropic temperature factors
+        keep = (columns["altloc"]==b' ') | (columns["altloc"]==b'A')
+        if not keep.all():
+            coords = coords[keep]
+            columns = {name: column[keep] for name, column in columns.items()}
+            atom_lines = atom_lines[keep]
+        n = len(coords)
+        
+        # atoms between TER, MODEL and ENDMDL lines are tokens of range of table rows
+        event_lines = np.flatnonzero(is_event)
+        bounds = np.searchsorted(atom_lines, event_lines).tolist()
+        tokens, prev = [], 0
+        for b, i in zip(bounds, event_lines.tolist()):
+            if b>prev:
+                tokens.append(range(prev, b))
+                prev = b
+            tokens.append(data[starts[i]:ends[i]].decode(encoding).strip())
+        if prev<n:
+            tokens.append(range(prev, n))
+        
+        # molecules are split by molecule number and by events
+        mnum, mname, chain = columns["mnum"], columns["mname"], columns["chain"]
+        starts = np.zeros(n, dtype=bool)
+        starts[:1] = True
+        starts[1:] = mnum[1:]!=mnum[:-1]
+        starts[[b for b in bounds if b<n]] = True
+        
+        if (~starts[1:] & ((mname[1:]!=mname[:-1]) | (chain[1:]!=chain[:-1]))).any():
+            return None
+        
+        mol_starts = np.flatnonzero(starts)
+        mol_bounds = [*mol_starts.tolist(), n]
+        names = columns["aname"].tolist()
+        if any([len(set(names[s:e]))!=e-s for s, e in zip(mol_bounds[:-1], mol_bounds[1:])]):
+            return None
+        
+        table = AtomTable(coords, **columns)
+        mol_classes = [_molecule_class(m) for m in mname[mol_starts].astype(str).tolist()]
+        mols = PdbMolecule._from_table_rows(mol_classes, table, mol_bounds)
+        rows = _MoleculeRows(mols, mol_classes, chain[mol_starts].tolist(), mnum[mol_starts].tolist())
+        
+        models = self.split_models(tokens)
+        k = 0
+        for i, model in enumerate(models):
+            mol_tokens = []
+            for token in model:
+                if isinstance(token, str): # TER
+                    mol_tokens.append(token)
+                    continue
+                    
+                while k<len(mols) and mol_bounds[k]<token.stop:
+                    mol_tokens.append(k)
+                    k += 1
+                    
+            pdb = PDB()
+            for component in self._parse_row_chains(mol_tokens, rows): pdb.add(component)
+            models[i] = pdb
+            
+        return PDBModels(models, header)
+    
+    
+    def _parse_row_chains(self, mol_tokens: list, rows: "_MoleculeRows") -> list:
+        # parse_chains for molecules given by indices, chain names are compared without atoms
+        chains = []
+        chain_mols = []
+        
+        for i, m in enumerate(mol_tokens):
+            if isinstance(m, str): # TER
+                if i==0:
+                    raise InvalidPDB(f"TER on first line.")
+                elif isinstance(mol_tokens[i-1], str):
+                    raise InvalidPDB(f"Two TERs in a row.")
+                
+                if len(chain_mols):
+                    chains.append(rows.make_chain(chain_mols))
+                    chain_mols = []
+                    
+            elif rows.classes[m] is not PdbMolecule:
+                if len(chain_mols) and rows.chains[m]!=rows.chains[chain_mols[-1]]:
+                    chains.append(rows.make_chain(chain_mols))
+                    chain_mols = []
+                chain_mols.append(m)
+                
+            else:
+                if len(chain_mols):
+                    chains.append(rows.make_chain(chain_mols))
+                    chain_mols = []
+                chains.append(rows.mols[m])
+                
+        if len(chain_mols):
+            chains.append(rows.make_chain(chain_mols))
+            
+        return chains
+        
+    
+    def _read_lines(self, 
+                    lines: List[str], 
+                    derive_element: bool = False, 
+                    element_derive_func = None,
+                    skip_HETATM: bool = False
+                   ):
+        
         lines = list(map(lambda l: l.rstrip(), lines))
         
         # Header
@@ -110,7 +579,7 @@ class pdbRead:
         model_components = []
         
         for a in tokens:
-            if isinstance(a, PdbAtom) or a.startswith("TER"):
+            if not isinstance(a, str) or a.startswith("TER"): # atoms or range of atoms
                 model_components.append(a)
                 
             elif a.startswith("MODEL"):
@@ -217,13 +686,7 @@ class pdbRead:
         
         
     def make_mol(self, atoms):
-        if atoms[0].mname in NA_NAMES:
-            m = NucleicAcidResidue()
-        elif atoms[0].mname in AMINOACID_NAMES:
-            m = AminoacidResidue()
-        else:
-            m = PdbMolecule()
-            
+        m = _molecule_class(atoms[0].mname)()
         for atom in atoms:
             m.add_atom(atom)
         return m
@@ -247,7 +710,7 @@ class pdbRead:
 class pdbWrite:
     def __init__(self, file: Union[str, Path, TextIOWrapper, _TemporaryFileWrapper]):  
         if isinstance(file, (str, Path)):
-            self._file = open(file, 'w')
+            self._file = open_text(file, 'w')
         elif isinstance(file, (TextIOWrapper, _TemporaryFileWrapper)):
             self._file = file
         else:
@@ -293,7 +756,7 @@ def request_pdb(pdb_id: str,
        txt = response.read().decode()
 
     if save_path is not None:
-        with open(save_path, 'w') as f:
+        with open_text(save_path, 'w') as f:
             f.write(txt)
         
     fp = tempfile.TemporaryFile('w+')
@@ -1,37 +1,17 @@
-from collections import defaultdict
-from typing import Optional, Union, Tuple, List
+from typing import Optional, Union, Tuple, List, Iterable
+import numpy as np
+import numpy
 
 from .containers import NucleicAcid
+from .containers.pair_table import pair_arrays
+from .algo.dotbracket import DOT_STRUCTURE_SYMBOLS, _parse_structure_bytes
 from .exceptions import InvalidSequence, InvalidStructure
 
 
 
-DOT_STRUCTURE_SYMBOLS = set(".()[]{}<>AaBbCcDdEeFf")
 STRUCTURE_DETECTION_SYMBOLS = set(".()[]{}<>")
 
 
-class NaStack:
-    inv_dict = {')':'(', ']':'[', '}':'{', '>':'<', 'a':'A', 
-                'b':'B', 'c':'C', 'd':'D', 'e':'E', 'f':'F'}
-    
-    def __init__(self):
-        self.st = defaultdict(list)
-
-    def __setitem__(self, k, v):
-        self.st[k].append(v)
-    
-    def __getitem__(self, k):
-        if len(self.st[self.inv_dict[k]]):
-            return self.st[self.inv_dict[k]].pop()
-        return None
-        
-    def isempty(self):
-        for k in self.st:
-            if len(self.st[k])!=0:
-                return False
-        return True
-
-
 def parse_arguments(a:Optional[str], b:Optional[str]) -> Tuple[Optional[str], Optional[str]]:
     if b is not None:
         seq = a
@@ -54,33 +34,52 @@ def parse_arguments(a:Optional[str], b:Optional[str]) -> Tuple[Optional[str], Op
 def parse_structure(struct: str, 
                     ignore_unclosed_bonds: bool, 
                    ) -> List:
-    pairs = []
-    if len(rem:=(set(struct) - DOT_STRUCTURE_SYMBOLS))!=0:
-        raise InvalidStructure(f"Dot structure contains invalid symbols - {', '.join(tuple(rem))}")
-
-    stack = NaStack()
-    for i, s in enumerate(struct):
-        if s == '.':
-            continue
+    pt = np.frombuffer(_parse_structure_bytes(struct, ignore_unclosed_bonds), dtype=np.int32)
+    opening, closing = pair_arrays(pt)
+    return list(zip(opening.tolist(), closing.tolist()))
 
-        if s in '([{<ABCDEF':
-            stack[s] = i
 
-        elif s in ')]}>abcdef':
-            op_idx = stack[s]
+def parse_record(a: str, b: Optional[str], 
+                 ignore_unclosed_bonds: bool, 
+                 upper_sequence: bool
+                ) -> Tuple[str, Optional[bytes]]:
+    """
+    Validates sequence and parses structure into pair table bytes (None if structure is not provided).
+    """
+    if not a: 
+        raise ValueError("Empty data")
+        
+    seq, struct = parse_arguments(a, b)
+     
+    # validate sequence
+    if seq: 
+        if not (seq.isascii() and seq.isalpha()):
+            raise InvalidSequence(f"Sequence must contain only alphabetic characters")
+            
+        if upper_sequence: 
+            seq = seq.upper()
+    else:
+        seq = 'N'*len(struct)
+        
+    # parse structure
+    pt = _parse_structure_bytes(struct, ignore_unclosed_bonds) if struct else None
+    return seq, pt
 
-            if op_idx is None:
-                if ignore_unclosed_bonds:
-                    continue
-                raise InvalidStructure(f"Closing bond {s} at index {i} has no open pair, "
-                                       f"use ignore_unclosed_bonds=True to omit such bonds")
-                    
-            pairs.append((op_idx, i))
 
-    if not stack.isempty() and not ignore_unclosed_bonds:
-        raise InvalidStructure(f"Structure contains unclosed bonds, use ignore_unclosed_bonds=True to omit such bonds")
-        
-    return pairs
+def _make_na(seq: str, pt: Optional[bytes], 
+             name: Optional[str] = None, 
+             meta: Optional[dict] = None
+            ) -> NucleicAcid:
+    
+    na = NucleicAcid()
+    if name: na.name = name
+    if meta: na.meta.update(meta)
+    
+    na._set_graph(seq, pt)
+    if pt is None:
+        na.__dict__['struct'] = None
+    
+    return na
     
     
 def NA(a: Union[str, NucleicAcid], b: Optional[str] = None, /, *, 
@@ -101,41 +100,44 @@ def NA(a: Union[str, NucleicAcid], b: Optional[str] = None, /, *,
 
     :return: NucleicAcid object.
     """ 
-    
-    if not a: 
-        raise ValueError("Empty data")
         
     if isinstance(a, NucleicAcid): 
         return a
         
-    seq, struct = parse_arguments(a, b)
-     
-    # validate sequence
-    if seq: 
-        if not seq.isalpha():
-            raise InvalidSequence(f"Sequence must contain only alphabetic characters")
+    seq, pt = parse_record(a, b, ignore_unclosed_bonds, upper_sequence)
+    return _make_na(seq, pt, name, meta)
+
+
+def NA_batch(data: Iterable[Union[str, Tuple[str, str], NucleicAcid]], /, *, 
+             ignore_unclosed_bonds: bool = False, 
+             upper_sequence: bool = False,
+             return_pair_tables: bool = False
+            ) -> Union[List[NucleicAcid], List[numpy.array]]:
+    """
+    Parse many dotbracket records. Every record is parsed with the same rules as NA.
+
+    :param data: iterable of sequences or structures, (sequence, structure) pairs or NucleicAcids.
+    :param ignore_unclosed_bonds: omit single unpaired parentheses without raising error. Default - False.
+    :param upper_sequence: upper sequence characters. Default - False.
+    :param return_pair_tables: return int32 pair tables instead of NucleicAcids. Default - False.
+
+    :return: list of NucleicAcid objects or list of pair tables.
+    """
+    
+    result = []
+    for record in data:
+        if isinstance(record, NucleicAcid):
+            result.append(record.pair_table if return_pair_tables else record)
+            continue
             
-        if upper_sequence: 
-            seq = seq.upper()
-    else:
-        seq = 'N'*len(struct)
+        a, b = (record, None) if isinstance(record, str) else (record[0], record[1] if len(record)>1 else None)
+        seq, pt = parse_record(a, b, ignore_unclosed_bonds, upper_sequence)
         
-    # parse structure
-    if struct:
-        pairs = parse_structure(struct, ignore_unclosed_bonds)
-    
-    # create graph
-    na = NucleicAcid()
-    if name: na.name = name
-    if meta: na.meta.update(meta)
-    
-    for i, nb in enumerate(seq):
-        _ = na._add_node(nb)
+        if not return_pair_tables:
+            result.append(_make_na(seq, pt))
+        elif pt is None:
+            result.append(np.full(len(seq), -1, dtype=np.int32))
+        else:
+            result.append(np.frombuffer(pt, dtype=np.int32).copy())
             
-    if struct:
-        for o, e in pairs:
-            na._add_bond(o, e)
-    else:
-        na.__dict__['struct'] = None
-    
-    return na
\ No newline at end of file
+    return result
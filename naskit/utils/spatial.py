@@ -0,0 +1,167 @@
+from typing import Tuple, Optional
+import numpy as np
+
+
+
+PAD = 2 # empty cells around the grid, keys of neighbour cells of any query stay unique
+
+
+class CellList:
+    """
+    Uniform grid of cubic cells over points for fixed radius neighbour search.
+
+    Points are sorted by cell, a query radius is at most cell size,
+    so only points of 27 nearby cells are compared. Time and memory
+    are linear in number of points and found pairs.
+    Pairs are returned as sparse triplets (i, j, distance).
+    """
+    __slots__ = ("coords", "cell_size", "_origin", "_dims", "_order", "_sorted", "_keys", "_starts", "_counts")
+
+    def __init__(self, coords: np.ndarray, cell_size: float):
+        """
+        :param coords: points of shape (N, 3), array is not copied if it is float.
+        :param cell_size: edge of cell, the maximal query radius.
+        """
+        if cell_size<=0:
+            raise ValueError(f"Cell size must be positive, got {cell_size}.")
+
+        coords = np.asarray(coords)
+        if coords.dtype.kind!='f':
+            coords = coords.astype(np.float64)
+        if coords.ndim!=2 or coords.shape[1]!=3:
+            raise ValueError(f"Coords matrix must have shape: (N, 3), got {coords.shape}")
+
+        self.coords = coords
+        self.cell_size = float(cell_size)
+        self._origin = coords.min(0) if len(coords) else np.zeros(3)
+
+        cells = self._cells(coords)
+        self._dims = (cells.max(0) if len(coords) else np.zeros(3, dtype=np.int64)) + 1 + 2*PAD
+        keys = self._cell_keys(cells)
+        self._order = np.argsort(keys, kind="stable")
+        self._sorted = coords[self._order] # neighbours are close in memory
+        self._keys, self._starts, self._counts = np.unique(keys[self._order], return_index=True, return_counts=True)
+
+
+    def __len__(self):
+        return self.coords.shape[0]
+
+
+    def _cells(self, coords: np.ndarray) -> np.ndarray:
+        return np.floor((coords - self._origin)/self.cell_size).astype(np.int64)
+
+
+    def _cell_keys(self, cells: np.ndarray) -> np.ndarray:
+        cells = cells + PAD
+        return (cells[:, 0]*self._dims[1] + cells[:, 1])*self._dims[2] + cells[:, 2]
+
+
+    def _key_shift(self, offset: Tuple[int, int, int]) -> int:
+        return int((offset[0]*self._dims[1] + offset[1])*self._dims[2] + offset[2])
+
+
+    def _radius(self, r: Optional[float]) -> float:
+        r = self.cell_size if r is None else float(r)
+        if r<0 or r>self.cell_size:
+            raise ValueError(f"Query radius must be in [0, cell size = {self.cell_size}], got {r}.")
+        return r
+
+
+    @staticmethod
+    def _expand(a_starts: np.ndarray, a_counts: np.ndarray,
+                b_starts: np.ndarray, b_counts: np.ndarray
+               ) -> Tuple[np.ndarray, np.ndarray]:
+        # all pairs of ranges a and b for every pair of ranges
+        sizes = a_counts*b_counts
+        p = np.repeat(np.arange(len(sizes)), sizes)
+        k = np.arange(p.shape[0]) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        return a_starts[p] + k//b_counts[p], b_starts[p] + k%b_counts[p]
+
+
+    @staticmethod
+    def _near(a: np.ndarray, b: np.ndarray, r: float) -> Tuple[np.ndarray, np.ndarray]:
+        # mask of rows within distance and these distances
+        diff = a - b
+        d = np.einsum("ij,ij->i", diff, diff)
+        near = d<=r*r
+        return near, np.sqrt(d[near])
+
+
+    @staticmethod
+    def _sorted_pairs(i: list, j: list, d: list, n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        i = np.concatenate(i) if i else np.zeros(0, dtype=np.int64)
+        j = np.concatenate(j) if j else np.zeros(0, dtype=np.int64)
+        d = np.concatenate(d) if d else np.zeros(0)
+        order = np.argsort(i*n + j)
+        return i[order], j[order], d[order]
+
+
+    def query_pairs(self, r: float = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pairs of indexed points within distance.
+
+        :param r: distance, at most cell size. Default - cell size.
+
+        :return: i, j (i<j), distance - arrays sorted by (i, j).
+        """
+        r = self._radius(r)
+        offsets = [(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1)]
+        offsets = offsets[len(offsets)//2:] # (0, 0, 0) and a half of neighbours, every cell pair once
+
+        found_i, found_j, found_d = [], [], []
+        for offset in offsets:
+            shifted = self._keys + self._key_shift(offset)
+            idx = np.searchsorted(self._keys, shifted)
+            idx[idx==len(self._keys)] = 0
+            cells = np.flatnonzero(self._keys[idx]==shifted)
+
+            i, j = self._expand(self._starts[cells], self._counts[cells],
+                                self._starts[idx[cells]], self._counts[idx[cells]])
+            if offset==(0, 0, 0):
+                i, j = i[i<j], j[i<j]
+
+            near, d = self._near(self._sorted[i], self._sorted[j], r)
+            i, j = self._order[i[near]], self._order[j[near]]
+            found_i.append(np.minimum(i, j))
+            found_j.append(np.maximum(i, j))
+            found_d.append(d)
+
+        return self._sorted_pairs(found_i, found_j, found_d, len(self))
+
+
+    def query(self, points: np.ndarray, r: float = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pairs of query points and indexed points within distance.
+
+        :param points: query points of shape (M, 3) or a single point.
+        :param r: distance, at most cell size. Default - cell size.
+
+        :return: query point index, indexed point index, distance - arrays sorted by indices.
+        """
+        r = self._radius(r)
+        points = np.asarray(points).reshape(-1, 3)
+        cells = self._cells(points)
+
+        # points farther than one cell from the grid have no neighbours
+        inside = np.flatnonzero(((cells>=-1) & (cells<=self._dims - 2*PAD)).all(1))
+        keys = self._cell_keys(cells[inside])
+        ones = np.ones(len(inside), dtype=np.int64)
+
+        found_i, found_j, found_d = [], [], []
+        if len(self)==0:
+            return self._sorted_pairs(found_i, found_j, found_d, 0)
+        
+        for offset in [(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1)]:
+            shifted = keys + self._key_shift(offset)
+            idx = np.searchsorted(self._keys, shifted)
+            idx[idx==len(self._keys)] = 0
+            q = np.flatnonzero(self._keys[idx]==shifted)
+
+            i, j = self._expand(inside[q], ones[q], self._starts[idx[q]], self._counts[idx[q]])
+
+            near, d = self._near(points[i], self._sorted[j], r)
+            found_i.append(i[near])
+            found_j.append(self._order[j[near]])
+            found_d.append(d)
+
+        return self._sorted_pairs(found_i, found_j, found_d, len(self))
@@ -2,6 +2,7 @@ import pytest
 import tempfile
 from naskit import NA, dotRead, dotWrite, fastaRead, fastaWrite, dotLinesRead, dotLinesWrite
 from naskit.exceptions import InvalidFasta
+from naskit.io import dotLines
 
 
 
@@ -135,4 +136,185 @@ class TestFasta:
                 for i, lines in enumerate(f):
                     assert lines==raw_lines[i]
             
-            
\ No newline at end of file
+                                
+                    
+class TestParallelRead:
+    
+    @pytest.mark.parametrize("workers", [1, 2])
+    @pytest.mark.parametrize("ordered", [True, False])
+    def test_dot(self, tmp_path, workers, ordered):
+        path = tmp_path / 'data.dot'
+        path.write_text(dot_file*3)
+        
+        with dotRead(path, ignore_unclosed_bonds=True) as f:
+            serial = [(na.name, na.seq, na.struct, na.meta) for na in f]
+        nas = dotRead.read_parallel(path, workers=workers, chunk_size=16, ordered=ordered, ignore_unclosed_bonds=True)
+        parallel = [(na.name, na.seq, na.struct, na.meta) for na in nas]
+        
+        assert len(serial)==12
+        assert parallel==serial if ordered else sorted(parallel, key=str)==sorted(serial, key=str)
+        
+        
+    def test_fasta_arrays(self, tmp_path):
+        path = tmp_path / 'data.fasta'
+        path.write_text(fasta_file*4)
+        
+        chunks = list(fastaRead.read_parallel(path, workers=2, chunk_size=100, arrays=True))
+        assert len(chunks)==4
+        for names, seqs, offsets, pt in chunks:
+            assert names==['seq']
+            assert seqs==fasta_seq
+            assert offsets.tolist()==[0, len(fasta_seq)]
+            assert (pt==-1).all()
+            
+            
+    def test_lines(self, tmp_path):
+        path = tmp_path / 'data.dot'
+        path.write_text(''.join(['\n'.join(lines)+'\n' for lines in raw_lines]))
+        
+        assert list(dotLinesRead.read_parallel(path, workers=2, chunk_size=1))==raw_lines
+        with pytest.raises(ValueError):
+            _ = list(dotLinesRead.read_parallel(path, arrays=True))
+            
+            
+    @pytest.mark.parametrize("kwargs, error", [
+        (dict(workers=0), ValueError), 
+        (dict(chunk_size=0), ValueError), 
+        (dict(arrays=True), ValueError), 
+        (dict(file=None), TypeError), 
+        (dict(file='missing.dot'), FileNotFoundError), 
+    ])
+    def test_errors_on_call(self, tmp_path, kwargs, error):
+        path = tmp_path / 'data.dot'
+        path.write_text(dot_file)
+        
+        # errors are raised before iteration
+        kwargs = {'file': path, **kwargs}
+        with pytest.raises(error):
+            dotLinesRead.read_parallel(**kwargs)
+            
+            
+class TestBlockScanner:
+    
+    @pytest.mark.parametrize("block_size", [1, 3, 7, 1<<20])
+    def test_block_boundaries(self, tmp_path, monkeypatch, block_size):
+        monkeypatch.setattr(dotLines, 'BLOCK_SIZE', block_size)
+        path = tmp_path / 'data.dot'
+        path.write_text(dot_file + "  >Seq5 \n\tGGG  \n")
+        
+        with dotRead(path, ignore_unclosed_bonds=True) as f:
+            result = list(f)
+            
+        assert [(na.name, na.seq, na.struct, na.meta) for na in result[:4]]==\
+               [(na.name, na.seq, na.struct, na.meta) for na in nas]
+        assert (result[4].name, result[4].seq)==('Seq5', 'GGG')
+        
+        
+    def test_count(self, tmp_path):
+        path = tmp_path / 'data.fasta'
+        path.write_text(fasta_file*3 + '\n')
+        
+        with fastaRead(path) as f:
+            assert len(f)==3
+            
+        with open(path) as fp:
+            with fastaRead(fp) as f:
+                assert len(f)==3
+                assert len(list(f))==3
+            
+            
+class TestIndexedRead:
+    
+    def test_dot(self, tmp_path):
+        path = tmp_path / 'data.dot'
+        path.write_text(dot_file)
+        
+        with dotRead.open_indexed(path, save_index=True, ignore_unclosed_bonds=True) as f:
+            assert len(f)==4 and 'Seq3' in f
+            assert f['Seq4'].struct==nas[3].struct
+            assert f['Seq3'].meta==nas[2].meta
+            assert [na.name for na in f[['Seq2', 'Seq1']]]==['Seq2', 'Seq1']
+            assert f.fetch('Seq3', 1, 4)=='CCG'
+            
+            with pytest.raises(KeyError):
+                _ = f['Seq5']
+                
+        assert (tmp_path / 'data.dot.nai').exists()
+        
+        
+    @pytest.mark.parametrize(
+        "records",
+        [
+            ">r1\nACGU\nAC\n\n>r2\nGGCC\n", # fixed width lines
+            ">r1\nACG\nACGUU\nA\n>r2\n  GGCC  \n", # irregular lines are parsed
+            ">r1\r\nACGU\r\nAC\r\n>r2\n;comment\nGGCC*\n", 
+        ]
+    )
+    def test_fetch(self, tmp_path, records):
+        path = tmp_path / 'data.fasta'
+        path.write_bytes((fasta_file + records).encode())
+        
+        with fastaRead(path) as f:
+            serial = list(f)
+            
+        with fastaRead.open_indexed(path) as f:
+            for na in serial:
+                assert f[na.name].seq==na.seq
+                for start in range(len(na.seq)):
+                    assert f.fetch(na.name, start, start+5)==na.seq[start:start+5]
+            assert f.fetch('seq', 150)==fasta_seq[150:]
+            
+            
+    def test_stale_index(self, tmp_path):
+        path = tmp_path / 'data.fasta'
+        path.write_text(fasta_file)
+        assert len(fastaRead.build_index(path))==1
+        
+        path.write_text(fasta_file + ">r2\nGGCC\n")
+        with fastaRead.open_indexed(path) as f:
+            assert f.keys()==['seq', 'r2']
+            assert f[-1].seq=='GGCC'
+
+
+
+class TestWriteMany:
+
+    @pytest.mark.parametrize("threaded", [False, True])
+    @pytest.mark.parametrize("chunk_size", [1, 3, 4096])
+    def test_dot(self, tmp_path, threaded, chunk_size):
+        with dotWrite(tmp_path / 'a.dot') as w:
+            for na in nas:
+                w.write(na)
+        with dotWrite(tmp_path / 'b.dot') as w:
+            w.write_many(iter(nas*3), chunk_size=chunk_size, threaded=threaded)
+
+        assert (tmp_path / 'b.dot').read_text()==(tmp_path / 'a.dot').read_text()*3
+
+
+    def test_kwargs(self, tmp_path):
+        with dotWrite(tmp_path / 'a.dot') as w:
+            w.write_many(nas, write_struct=False, write_meta=False)
+        with dotRead(tmp_path / 'a.dot') as f:
+            assert [(na.struct, na.meta) for na in f]==[(None, {})]*len(nas)
+
+
+    @pytest.mark.parametrize("length", [1, 79, 80, 81, 160, 250])
+    def test_fasta(self, tmp_path, length):
+        na = NA('A'*length, name='seq')
+        with fastaWrite(tmp_path / 'a.fasta') as w:
+            w.write_many([na, na], threaded=True)
+
+        lines = (tmp_path / 'a.fasta').read_text().split('\n')
+        assert all([0<len(l)<=80 for l in lines[1:1+(length+79)//80]])
+        with fastaRead(tmp_path / 'a.fasta') as f:
+            assert [na.seq for na in f]==['A'*length]*2
+
+
+    def test_lines(self, tmp_path):
+        with dotLinesWrite(tmp_path / 'a.txt') as w:
+            w.write_many(raw_lines)
+            with pytest.raises(ValueError):
+                w.write_many([('>seq', 1)], threaded=True)
+
+        with dotLinesRead(tmp_path / 'a.txt') as f:
+            assert list(f)==raw_lines
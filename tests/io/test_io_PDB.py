@@ -236,4 +236,186 @@ ATOM    306  CA  THR A  41      50.831  -1.724  43.529  1.00 37.70           C
         m2.add_atom(PdbAtom.from_pdb_line("ATOM    666  OP1   U A  22      79.027  35.512-106.840  1.00  0.00           O  "))
         
         with pytest.raises(InvalidPDB):
-            chain.add(m2)   
\ No newline at end of file
+            chain.add(m2)               
+            
+class TestReadPdbColumns:
+    
+    pdb_text = """\
+HEADER    TEST STRUCTURE
+REMARK 1
+MODEL        1
+ATOM    572  P     C A  19      67.015  33.891 -97.657  1.00  0.00           P  
+ATOM    573  OP1   C A  19      67.343  32.450 -97.581  1.00  0.00           O  
+ATOM    574  OP2A  C A  19      67.343  32.450 -97.581  0.50  0.00           O  
+ATOM    575  OP2B  C A  19      67.343  32.450 -97.581  0.50  0.00           O  
+ATOM    603  P     G A  20      71.325  33.829-102.603  1.00  0.00           P  
+ATOM    604  OP1   G A  20      71.579  32.512-103.231                       O1-
+TER
+ATOM    305  N   THR B  41      50.378  -1.061  42.314  1.00 40.42      SEG1 N1+
+ATOM    306  CA  THR B  41      50.831  -1.724  43.529  1.00 37.70           C
+TER
+HETATM 2609  P   PO4 B 301      -4.401   0.932 108.199  1.00 45.91           P  
+HETATM 2610  O1  PO4 B 301      -4.921  -0.287 107.368  1.00 56.99           O  
+HETATM 2611  O   HOH B 302      -5.921  -1.287 106.368  1.00 56.99           O  
+ENDMDL
+MODEL        2
+ATOM    572  P     C A  19      68.015  33.891 -97.657  1.00  0.00           P  
+ATOM    573  OP1   C A  19      68.343  32.450 -97.581  1.00  0.00           O  
+ENDMDL
+"""
+
+    @staticmethod
+    def dump(models):
+        return [[(a.is_hetatm, a.anum, a.aname, a.altloc, a.mname, a.chain, a.mnum, 
+                  a.coords.tolist(), a.occupancy, a.temp, a.segment, a.element, a.charge)
+                 for a in m.atoms()] for m in models]
+
+    
+    @pytest.mark.parametrize("skip_HETATM", [False, True])
+    def test_same_as_lines(self, skip_HETATM):
+        reader = pdbRead(tempfile.TemporaryFile('w+'))
+        columns = reader._read_columns(self.pdb_text, skip_HETATM=skip_HETATM)
+        lines = reader._read_lines(self.pdb_text.split('\n')[:-1], skip_HETATM=skip_HETATM)
+        reader.close()
+        
+        assert columns is not None
+        assert columns.header==lines.header
+        assert str(columns)==str(lines)
+        assert [(type(c), len(c)) for c in columns[0]]==[(type(c), len(c)) for c in lines[0]]
+        assert self.dump(columns)==self.dump(lines)
+        
+        
+    def test_lazy_molecules(self):
+        fp = tempfile.TemporaryFile('w+')
+        fp.write(self.pdb_text)
+        fp.seek(0)
+        with pdbRead(fp) as f:
+            models = f.read()
+            
+        chain = models[0][0]
+        residue = chain[0]
+        assert len(residue)==3 and residue.mname=="C" and residue.mnum==19
+        assert residue.table.coords.base is models[0].table.coords.base
+        
+        residue["P"].coords[0] = 0.
+        assert models[0].coords[0, 0]==0.
+        assert residue.copy()["OP1"].aname=="OP1"
+
+
+    def test_text_columns(self):
+        reader = pdbRead(tempfile.TemporaryFile('w+'))
+        models = reader._read_columns(self.pdb_text)
+        reader.close()
+
+        table = models[0].table
+        assert table.aname.dtype.kind=='U' and table.chain.dtype.kind=='U'
+        assert (table.chain=="B").sum()==5
+        assert table[4]["charge"]==-1 and table[5]["element"]=="N"
+        assert models[0][0][1].table.aname.tolist()==["P", "OP1"]
+        assert table.coords[3].tolist()==pytest.approx([71.325, 33.829, -102.603])
+
+
+    def test_file_bytes(self, tmp_path):
+        # non ascii header is decoded separately from atom rows
+        text = self.pdb_text.replace("REMARK 1", "REMARK 1 Ångström")
+        path = tmp_path / "test.pdb"
+        path.write_bytes(text.replace("\n", "\r\n").encode("utf-8"))
+
+        reader = pdbRead(tempfile.TemporaryFile('w+'))
+        assert reader._read_columns(text.encode("utf-8")) is not None
+        lines = reader._read_lines(text.split('\n')[:-1])
+        reader.close()
+
+        with pdbRead(path) as f:
+            models = f.read()
+        assert models.header==lines.header=="HEADER    TEST STRUCTURE\nREMARK 1 Ångström"
+        assert self.dump(models)==self.dump(lines)
+
+        # non ascii atom rows are parsed line by line
+        reader = pdbRead(tempfile.TemporaryFile('w+'))
+        assert reader._read_columns(text.replace("SEG1", "SÉG1").encode("utf-8")) is None
+        reader.close()
+
+
+    @pytest.mark.parametrize("line", [
+        "ATOM    572  P     C A  1X      67.015  33.891 -97.657  1.00  0.00           P  ", # invalid number
+        "ATOM    572  P     C A  19      67.015  33.891 -97.657  1.00  0.00           P++", # invalid charge
+        "ATOM    572  P     C A  19      67.015  33.891 -97.657  1.00  0.00  ", # no element
+    ])
+    def test_line_errors(self, line):
+        fp = tempfile.TemporaryFile('w+')
+        fp.write(line + "\n")
+        fp.seek(0)
+        
+        with pytest.raises((InvalidPDB, ValueError)):
+            with pdbRead(fp) as f:
+                pdb = f.read()
+        
+        
+class TestIterModels:
+    
+    pdb_text = """\
+HEADER    TEST STRUCTURE
+MODEL        1
+ATOM    572  P     C A  19      67.015  33.891 -97.657  1.00  0.00           P  
+ATOM    573  OP1   C A  19      67.343  32.450 -97.581  1.00  0.00           O  
+TER
+ENDMDL
+MODEL        2
+ATOM    572  P     C A  19      68.015  33.891 -97.657  1.00  0.00           P  
+ATOM    573  OP1   C A  19      68.343  32.450 -XX.XXX  1.00  0.00           O  
+TER
+ENDMDL
+MODEL        3
+ATOM    572  P     C A  19      69.015  33.891 -97.657  1.00  0.00           P  
+ATOM    573  OP1   C A  19      69.343  32.450 -97.581  1.00  0.00           O  
+TER
+ENDMDL
+END
+"""
+
+    def iter_models(self, text, **kwargs):
+        fp = tempfile.TemporaryFile('w+')
+        fp.write(text)
+        fp.seek(0)
+        with pdbRead(fp) as f:
+            return [m[0][0]["P"].coords[0].item() for m in f.iter_models(**kwargs)]
+        
+        
+    @pytest.mark.parametrize("models, x", [
+        ([0, 2], [67.015, 69.015]),
+        (2, [69.015]),
+        (slice(0, None, 2), [67.015, 69.015]),
+        (slice(0, 1), [67.015]),
+        ([], []),
+    ])
+    def test_select(self, models, x):
+        # the second model is invalid, but it is not parsed
+        assert self.iter_models(self.pdb_text, models=models)==pytest.approx(x)
+        
+        
+    def test_same_as_read(self):
+        text = self.pdb_text.replace("-XX.XXX", "-97.581")
+        with pdbRead(tempfile.TemporaryFile('w+')) as f:
+            models = f._read_text(text)
+            
+        fp = tempfile.TemporaryFile('w+')
+        fp.write(text)
+        fp.seek(0)
+        with pdbRead(fp) as f:
+            assert [str(m) for m in f.iter_models()]==[str(m) for m in models]
+            
+        # file without models is a single model
+        assert self.iter_models(text.split("ENDMDL")[0].split("MODEL        1\n")[1])==pytest.approx([67.015])
+        
+        
+    def test_errors(self):
+        text = self.pdb_text.replace("-XX.XXX", "-97.581")
+        with pytest.raises(ValueError):
+            self.iter_models(text, models=[-1])
+        with pytest.raises(ValueError):
+            self.iter_models(self.pdb_text, models=[1])
+        with pytest.raises(InvalidPDB):
+            self.iter_models(text.replace("MODEL        3\n", ""))
+        with pytest.raises(InvalidPDB):
+            self.iter_models(text.replace("ENDMDL\nEND\n", ""))
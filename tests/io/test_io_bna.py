@@ -1,6 +1,7 @@
 import pytest
 import tempfile
 from naskit import NA, bnaRead, bnaWrite
+from naskit.exceptions import InvalidSequence
 
 
 
@@ -50,3 +51,258 @@ class TestBna:
 
             assert na.seq == bna.seq
             assert bna.struct is None
+
+
+class TestBnaIndex:
+    
+    def write(self, path, index):
+        with bnaWrite(path, index=index) as w:
+            for na in nas:
+                w.write(na)
+    
+    
+    @pytest.mark.parametrize("index", [True, False])
+    def test_random_access(self, tmp_path, index):
+        path = tmp_path / 'data.bna'
+        self.write(path, index)
+        assert (tmp_path / 'data.bna.bnai').exists()==index
+        
+        with bnaRead.open_indexed(path) as f:
+            assert len(f)==len(nas)
+            assert f[1].struct==nas[1].struct
+            assert f[-1].meta==nas[-1].meta
+            assert [na.name for na in f[1:3]]==['Seq2', 'Seq3']
+            assert [na.seq for na in f[[3, 0]]]==[nas[3].seq, nas[0].seq]
+            assert [na.seq for na in f]==[na.seq for na in nas]
+            
+            with pytest.raises(IndexError):
+                _ = f[len(nas)]
+                
+                
+    def test_append(self, tmp_path):
+        path = tmp_path / 'data.bna'
+        self.write(path, True)
+        with bnaWrite(path, append=True, index=True) as w:
+            w.write(nas[1])
+            
+        with bnaRead(path) as f:
+            assert len(f)==len(nas)+1
+            
+        with bnaRead.open_indexed(path) as f:
+            assert f[len(nas)].struct==nas[1].struct
+            
+            
+    def test_stale_index(self, tmp_path):
+        path = tmp_path / 'data.bna'
+        self.write(path, True)
+        with bnaWrite(path, append=True) as w:
+            w.write(nas[2])
+            
+        with bnaRead.open_indexed(path) as f:
+            assert len(f)==len(nas)+1
+            assert f[-1].name=='Seq3'
+            
+        assert len(bnaRead.build_index(path))==len(nas)+1
+        with bnaRead(path) as f:
+            assert len(f)==len(nas)+1
+            
+            
+class TestBnaBulk:
+    
+    def test_write_read_many(self, tmp_path):
+        path = tmp_path / 'data.bna'
+        with bnaWrite(path, index=True) as w:
+            w.write_many(nas[:2])
+            w.write(nas[2])
+            w.write_many(nas[3:], write_meta=False)
+            
+        with bnaRead(path) as f:
+            first = f.read_many(1)
+            rest = f.read_many()
+            
+        assert len(first)==1 and len(rest)==len(nas)-1
+        for na, bna in zip(nas, first+rest):
+            assert na.seq==bna.seq
+            assert na.struct==bna.struct
+            assert na.name==bna.name
+        assert rest[-1].meta=={}
+        assert rest[1].meta==nas[2].meta
+        
+        with bnaRead.open_indexed(path) as f:
+            assert [na.struct for na in f[::-1]]==[na.struct for na in nas[::-1]]
+            
+            
+    @pytest.mark.parametrize("version", [1, 2])
+    def test_bytes_equal(self, tmp_path, version):
+        with bnaWrite(tmp_path / 'a.bna', version=version) as w:
+            for na in nas:
+                w.write(na)
+        with bnaWrite(tmp_path / 'b.bna', version=version) as w:
+            w.write_many(nas)
+            
+        assert (tmp_path / 'a.bna').read_bytes()==(tmp_path / 'b.bna').read_bytes()
+        
+        with bnaRead(tmp_path / 'a.bna') as f:
+            single = [(na.seq, na.struct, na.name, na.meta) for na in f]
+        with bnaRead(tmp_path / 'a.bna') as f:
+            batch = [(na.seq, na.struct, na.name, na.meta) for na in f.read_many()]
+        assert single==batch
+        
+        
+    @pytest.mark.parametrize("version", [1, 2])
+    @pytest.mark.parametrize("indexed", [False, True])
+    def test_iterate_and_read_many(self, tmp_path, version, indexed):
+        many = [NA('GGGAAACCCU'*(i%3+1), '(((...))).'*(i%3+1), name=f'Seq{i}') for i in range(600)]
+        path = tmp_path / 'data.bna'
+        with bnaWrite(path, version=version) as w:
+            w.write_many(many)
+
+        with (bnaRead.open_indexed(path) if indexed else bnaRead(path)) as f:
+            names = [next(f).name for _ in range(3)]
+            names += [na.name for na in f.read_many(300)]
+            names += [next(f).name]
+            names += [na.name for na in f.read_many(10)]
+            names += [na.name for na in f]
+
+        assert names==[na.name for na in many]
+
+
+    def test_invalid_sequence(self, tmp_path):
+        with bnaWrite(tmp_path / 'a.bna') as w:
+            with pytest.raises(InvalidSequence):
+                w.write_many([nas[0], NA('AAXA')])
+                
+        assert (tmp_path / 'a.bna').read_bytes()==b''
+                
+                
+class TestBnaV2:
+    
+    long_na = NA('GGGAAACCCU'*500, '(((...))).'*500, name='Long'*1100)
+    
+    @pytest.mark.parametrize("compression", [None, 'zlib'])
+    def test_read_write(self, tmp_path, compression):
+        path = tmp_path / 'data.bna'
+        with bnaWrite(path, version=2, compression=compression) as w:
+            w.write(self.long_na)
+            w.write_many(nas)
+            
+        with bnaRead(path) as f:
+            assert f.version==2
+            assert len(f)==len(nas)+1
+            bnas = list(f)
+            
+        with bnaRead(path) as f:
+            assert [na.seq for na in f.read_many()]==[na.seq for na in bnas]
+            
+        assert bnas[0].seq==self.long_na.seq
+        assert bnas[0].struct==self.long_na.struct
+        assert bnas[0].name==self.long_na.name
+        for na, bna in zip(nas, bnas[1:]):
+            assert na.struct==bna.struct
+            assert na.meta==bna.meta
+            
+            
+    def test_zstd(self, tmp_path):
+        pytest.importorskip('zstandard')
+        path = tmp_path / 'data.bna'
+        with bnaWrite(path, version=2, compression='zstd') as w:
+            w.write(self.long_na)
+            
+        with bnaRead(path) as f:
+            assert next(f).struct==self.long_na.struct
+            
+            
+    def test_index(self, tmp_path):
+        path = tmp_path / 'data.bna'
+        with bnaWrite(path, version=2, compression='zlib', index=True) as w:
+            w.write_many(nas)
+        with bnaWrite(path, append=True, version=2, index=True) as w:
+            w.write(self.long_na)
+            
+        with bnaRead.open_indexed(path) as f:
+            assert len(f)==len(nas)+1
+            assert f[-1].struct==self.long_na.struct
+            assert [na.name for na in f[[2, 1]]]==['Seq3', 'Seq2']
+            
+        assert len(bnaRead.build_index(path, save=False))==len(nas)+1
+
+
+    def test_blocks(self, tmp_path):
+        many = [NA('GGGAAACCCU'*(i%5+1), name=f'Seq{i}') for i in range(300)]
+        sizes = {}
+        for compression in [None, 'zlib']:
+            path = tmp_path / f'{compression}.bna'
+            with bnaWrite(path, version=2, compression=compression, index=True, block_size=1000) as w:
+                w.write_many(many[:100])
+                for na in many[100:200]:
+                    w.write(na)
+            with bnaWrite(path, append=True, version=2, compression=compression, index=True, block_size=1000) as w:
+                w.write_many(many[200:])
+            sizes[compression] = path.stat().st_size
+
+            offsets = bnaRead.build_index(path, save=False)
+            assert len(set(offsets[:, 0].tolist()))>5
+            with bnaRead.open_indexed(path) as f:
+                assert (f._offsets==offsets).all()
+                assert [na.name for na in f[[250, 3, 120]]]==['Seq250', 'Seq3', 'Seq120']
+                assert [na.seq for na in f[95:105]]==[na.seq for na in many[95:105]]
+
+            with bnaRead(path) as f:
+                assert next(f).name=='Seq0'
+                assert len(f)==len(many)
+                assert [na.name for na in f.read_many(150)]==[na.name for na in many[1:151]]
+                assert [na.seq for na in f]==[na.seq for na in many[151:]]
+
+        # records compressed together share redundancy between records
+        assert sizes['zlib']*3<sizes[None]
+
+
+    def test_version_errors(self, tmp_path):
+        path = tmp_path / 'data.bna'
+        with bnaWrite(path) as w:
+            with pytest.raises(ValueError):
+                w.write(self.long_na)
+            w.write(nas[0])
+            
+        with pytest.raises(ValueError):
+            bnaWrite(path, append=True, version=2)
+        with pytest.raises(ValueError):
+            bnaWrite(tmp_path / 'other.bna', compression='zlib')
+            
+        with bnaRead(path) as f:
+            assert f.version==1
+            assert next(f).seq==nas[0].seq
+            
+            
+class TestBnaBuffer:
+    
+    @pytest.mark.parametrize("version", [1, 2])
+    @pytest.mark.parametrize("wrap", [bytes, bytearray, memoryview])
+    def test_read_buffer(self, tmp_path, version, wrap):
+        path = tmp_path / 'data.bna'
+        with bnaWrite(path, version=version) as w:
+            w.write_many(nas)
+            
+        with bnaRead(wrap(path.read_bytes())) as f:
+            assert len(f)==len(nas)
+            assert f[1].struct==nas[1].struct
+            assert [na.meta for na in f[2:]]==[na.meta for na in nas[2:]]
+            assert [na.seq for na in f]==[na.seq for na in nas]
+            
+            
+    def test_shared_memory(self, tmp_path):
+        shared_memory = pytest.importorskip('multiprocessing.shared_memory')
+        path = tmp_path / 'data.bna'
+        with bnaWrite(path, version=2) as w:
+            w.write_many(nas)
+        data = path.read_bytes()
+        
+        shm = shared_memory.SharedMemory(create=True, size=len(data))
+        try:
+            shm.buf[:len(data)] = data
+            with bnaRead(shm.buf) as f:
+                assert [na.name for na in f.read_many()]==[na.name for na in nas]
+                assert f[-1].struct==nas[-1].struct
+        finally:
+            shm.close()
+            shm.unlink()
@@ -1,6 +1,6 @@
 import pytest
 import tempfile
-from naskit import NA, bpseqRead, bpseqWrite
+from naskit import NA, bpseqRead, bpseqWrite, bpseqDirRead
 from naskit.exceptions import InvalidStructure
 
 
@@ -136,8 +136,66 @@ class TestBpseq:
                 _ = f.read()
 
 
-    
-    
-    
-    
-    
\ No newline at end of file
+
+dir_nas = [NA('UUUUCCCC', '((...)).', name=f'Seq{i}') for i in range(10)]
+
+
+class TestBpseqDir:
+
+    def write_dir(self, path):
+        for i, na in enumerate(dir_nas):
+            directory = path / 'sub' if i%3==0 else path
+            directory.mkdir(exist_ok=True)
+            with bpseqWrite(directory / f'{i:02d}.bpseq') as w:
+                w.write(na)
+        (path / 'notes.txt').write_text('1 G 0\n')
+
+
+    @pytest.mark.parametrize("recursive, expected", [(False, ['01', '02', '04', '05', '07', '08']), 
+                                                     (True, ['01', '02', '04', '05', '07', '08', 'sub/00', 'sub/03', 'sub/06', 'sub/09'])])
+    def test_sorted(self, tmp_path, recursive, expected):
+        self.write_dir(tmp_path)
+        with bpseqDirRead(tmp_path, recursive=recursive, file_as_name=True) as f:
+            assert len(f)==len(expected)
+            assert [p.relative_to(tmp_path).with_suffix('').as_posix() for p in f.paths]==expected
+            assert [na.name for na in f]==[e.split('/')[-1] for e in expected]
+
+
+    @pytest.mark.parametrize("processes", [True, False])
+    def test_parallel(self, tmp_path, processes):
+        self.write_dir(tmp_path)
+        with bpseqDirRead(tmp_path, recursive=True, workers=2, processes=processes, batch_size=3) as f:
+            result = list(f)
+        with bpseqDirRead(tmp_path, recursive=True) as f:
+            expected = list(f)
+
+        assert [(na.seq, na.struct) for na in result]==[(na.seq, na.struct) for na in expected]
+
+
+    def test_pattern(self, tmp_path):
+        self.write_dir(tmp_path)
+        with bpseqDirRead(tmp_path, pattern='0[12].bpseq') as f:
+            assert len(f)==2
+        with bpseqDirRead(tmp_path, pattern='*.txt') as f:
+            assert [na.seq for na in f]==['G']
+
+
+    def test_errors(self, tmp_path):
+        (tmp_path / 'a.bpseq').write_text(two_bonds_bpseq)
+        with bpseqDirRead(tmp_path, raise_na_errors=False, workers=2) as f:
+            assert list(f)==[None]
+        with bpseqDirRead(tmp_path) as f:
+            with pytest.raises(InvalidStructure, match="has two bonds"):
+                _ = list(f)
+
+
+
+    @pytest.mark.parametrize("threaded", [False, True])
+    def test_write_many(self, tmp_path, threaded):
+        with bpseqWrite(tmp_path / 'a.bpseq') as w:
+            for na in dir_nas[:3]:
+                w.write(na)
+        with bpseqWrite(tmp_path / 'b.bpseq') as w:
+            w.write_many(dir_nas[:3], chunk_size=2, threaded=threaded)
+
+        assert (tmp_path / 'b.bpseq').read_text()==(tmp_path / 'a.bpseq').read_text()
@@ -0,0 +1,91 @@
+import pytest
+from naskit import NA, dotRead, dotWrite, fastaRead, bpseqRead, bpseqWrite, bpseqDirRead, pdbRead, pdbWrite
+from naskit.io import open_text
+from naskit.io.compression import detect_compression
+
+
+
+nas = [
+    NA('AAA', name='Seq1'),
+    NA('UUUU', '.(.)', name='Seq2'),
+    NA('CCCGGG', name='Seq3', meta={'param1':'1', 'param2':'2'}),
+]
+
+pdb_text = """\
+ATOM    572  P     C A  19      67.015  33.891 -97.657  1.00  0.00           P
+ATOM    573  OP1   C A  19      67.343  32.450 -97.581  1.00  0.00           O
+ATOM    603  P     G A  20      71.325  33.829-102.603  1.00  0.00           P
+ATOM    604  OP1   G A  20      71.579  32.512-103.231  1.00  0.00           O
+"""
+
+
+class TestCompressedText:
+
+    @pytest.mark.parametrize("ext, compression", [('.gz', 'gzip'), ('.bz2', 'bz2'), ('.xz', 'xz'), ('', None)])
+    def test_dot(self, tmp_path, ext, compression):
+        path = tmp_path / f'data.dot{ext}'
+        with dotWrite(path) as w:
+            for na in nas:
+                w.write(na)
+        with dotWrite(path, append=True) as w:
+            w.write(nas[0])
+
+        assert detect_compression(path)==compression
+        with dotRead(path) as f:
+            assert len(f)==len(nas)+1
+            result = list(f)
+
+        assert [(na.name, na.seq, na.struct, na.meta) for na in result]==\
+               [(na.name, na.seq, na.struct, na.meta) for na in nas+nas[:1]]
+
+
+    def test_threaded(self, tmp_path):
+        path = tmp_path / 'data.fasta.gz'
+        with open_text(path, 'w') as f:
+            for i in range(2000):
+                f.write(f">seq{i}\nACGU\nACG\n")
+
+        with fastaRead(open_text(path, threaded=True)) as f:
+            result = list(f)
+        assert len(result)==2000 and result[-1].seq=='ACGUACG'
+
+        # closing before the end of stream stops background thread
+        with fastaRead(open_text(path, threaded=True)) as f:
+            assert next(f).name=='seq0'
+
+
+    def test_not_seekable(self, tmp_path):
+        path = tmp_path / 'data.dot.gz'
+        with dotWrite(path) as w:
+            w.write(nas[0])
+
+        with pytest.raises(ValueError):
+            _ = list(dotRead.read_parallel(path))
+        with pytest.raises(ValueError):
+            dotRead.build_index(path)
+
+
+    def test_bpseq(self, tmp_path):
+        with bpseqWrite(tmp_path / 'a.bpseq.gz') as w:
+            w.write(nas[1])
+        with bpseqWrite(tmp_path / 'b.bpseq') as w:
+            w.write(nas[1])
+
+        with bpseqRead(tmp_path / 'a.bpseq.gz') as f:
+            assert f.read().struct==nas[1].struct
+
+        with bpseqDirRead(tmp_path) as f:
+            assert len(f)==2
+            assert [na.struct for na in f]==[nas[1].struct]*2
+
+
+    def test_pdb(self, tmp_path):
+        with open_text(tmp_path / 'a.pdb.xz', 'w') as f:
+            f.write(pdb_text)
+
+        with pdbRead(tmp_path / 'a.pdb.xz') as f:
+            pdb = f.read()
+        with pdbWrite(tmp_path / 'b.pdb.gz') as w:
+            w.write(pdb)
+        with pdbRead(tmp_path / 'b.pdb.gz') as f:
+            assert f.read()[0].coords.tolist()==pdb[0].coords.tolist()
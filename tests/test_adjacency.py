@@ -1,6 +1,7 @@
 import pytest
 import numpy as np
 from naskit import NA, NucleicAcid
+from naskit.containers import get_adjacency_batch, from_adjacency_batch
 from naskit.exceptions import InvalidStructure, InvalidAdjacency
 
 
@@ -78,8 +79,119 @@ class TestAdjacency:
             _ = NucleicAcid.from_adjacency(multiple_bonds)
 
         
+class SparseAdjacency:
+    # minimal sparse matrix with scipy-like tocoo()
+    
+    def __init__(self, row, col, data, shape):
+        self.row, self.col, self.data, self.shape = np.array(row), np.array(col), np.array(data), shape
         
+    def tocoo(self):
+        return self
         
         
+class TestSparseAdjacency:
+    
+    @pytest.mark.parametrize(
+        "struct",
+        [
+            '....', 
+            '..((....))..',
+            '..((.[[.)).].]',
+            '([{)]}',
+         ]
+    )
+    def test_recreation(self, struct):
+        na = NA(struct)
+        row, col = na.get_adjacency('coo')
+        
+        assert NucleicAcid.from_adjacency(SparseAdjacency(row, col, np.ones(len(row)), (len(na), len(na))))==na
+        assert NucleicAcid.from_pairs((row, col), length=len(na), symmetric=True)==na
+        assert NucleicAcid.from_pairs(na.get_adjacency('pairs'), seq=na.seq)==na
+        
+        
+    def test_formats(self):
+        na = NA('.((..)).')
+        dense = na.get_adjacency()
+        
+        row, col = na.get_adjacency('coo')
+        assert np.array_equal(np.argwhere(dense).T, np.stack([row, col]))
+        
+        indptr, indices = na.get_adjacency('csr')
+        assert indptr.tolist()==[0, 0, 1, 2, 2, 2, 3, 4, 4]
+        assert indices.tolist()==[6, 5, 2, 1]
+        
+        assert na.get_adjacency('pairs').tolist()==[[1, 2], [6, 5]]
+        
+        with pytest.raises(ValueError):
+            _ = na.get_adjacency('csc')
+        
+        
+    @pytest.mark.parametrize(
+        "pairs, symmetric",
+        [
+            ([[0], [2]], True), # asymmetric
+            ([[0, 0], [2, 4]], False), # multiple bonds
+            ([[0, 2, 0, 4], [2, 0, 4, 0]], True), 
+            ([[1], [1]], False), # self bond
+            ([[0], [5]], False), # out of range
+            ([[0, 1, 2]], False), 
+         ]
+    )
+    def test_invalid_pairs(self, pairs, symmetric):
+        with pytest.raises(InvalidAdjacency):
+            _ = NucleicAcid.from_pairs(pairs, length=5, symmetric=symmetric)
+            
+            
+    def test_sparse_values(self):
+        with pytest.raises(InvalidAdjacency):
+            _ = NucleicAcid.from_adjacency(SparseAdjacency([0, 2], [2, 0], [2, 2], (3, 3)))
+            
+        na = NucleicAcid.from_adjacency(SparseAdjacency([0, 2, 1], [2, 0, 1], [1, 1, 0], (3, 3)))
+        assert na.struct=='(.)'
+
+        
+class TestAdjacencyBatch:
+    
+    structs = ['..((....))..', '([{)]}', '....', '(.)']
+    
+    def test_padding(self):
+        nas = [NA(s) for s in self.structs]
+        adj, mask = get_adjacency_batch(nas, dtype=np.uint8)
+        
+        assert adj.shape==(4, 12, 12) and adj.dtype==np.uint8
+        assert mask.sum(axis=-1).tolist()==[len(s) for s in self.structs]
+        for k, na in enumerate(nas):
+            assert np.array_equal(adj[k, :len(na), :len(na)], na.get_adjacency())
+            assert adj[k, len(na):].sum()==0 and adj[k, :, len(na):].sum()==0
+            
+            
+    def test_out(self):
+        nas = [NA(s) for s in self.structs]
+        out = np.ones((4, 16, 16), dtype=bool)
+        adj, mask = get_adjacency_batch(nas, out=out)
+        assert adj is out
+        assert mask.shape==(4, 16)
+        assert adj.sum()==sum([len(na.pairs)*2 for na in nas])
+        
+        with pytest.raises(ValueError):
+            _ = get_adjacency_batch(nas, max_len=8)
+        
+        
+    def test_decode(self):
+        nas = [NA(s) for s in self.structs]
+        adj, mask = get_adjacency_batch(nas, dtype=np.float32)
+        decoded = from_adjacency_batch(adj, lengths=mask.sum(axis=-1))
+        assert [na.struct for na in decoded]==self.structs
+        
+        
+    def test_decode_probabilities(self):
+        p = np.zeros((1, 6, 6), dtype=np.float32)
+        p[0, 0, 5] = p[0, 5, 0] = 0.9
+        p[0, 0, 4] = p[0, 4, 0] = 0.7 # weaker competing pair
+        p[0, 1, 3] = 0.8 # symmetrized to 0.4
+        p[0, 2, 3] = p[0, 3, 2] = 0.6
         
-        
\ No newline at end of file
+        na = from_adjacency_batch(p, seqs=['acgucg'], upper_sequence=True)[0]
+        assert na.struct=='(.().)'
+        assert na.pairs==((0, 5), (2, 3))
+        assert na.seq=='ACGUCG'
@@ -1,6 +1,6 @@
 import pytest
 from naskit import NA
-from naskit.containers import Helix, Hairpin, InternalLoop, Bulge, Junction
+from naskit.containers import Helix, Hairpin, InternalLoop, Bulge, Junction, _make_loop
 
 class TestLoops:
     
@@ -91,6 +91,38 @@ class TestKnotsInLoop:
         na = NA('..((..((...))..((..[[.)).]].))..')
         assert na.junctions[0].knots == ((25, 26),)
         assert na.hairpins[1].knots == ((19, 20),)
+        
+        
+class TestLoopRecords:
+    
+    @pytest.mark.parametrize(
+        "na",
+        [
+            NA('.((.((..((((..))..))........((..((.[[.))))....]]...))..))...'), 
+            NA('..((..(((((....(((..((..[[[..))..))))))...))..))..]]]..'), 
+            NA('..((..((...))..((..[[.)).]].))..'), 
+         ]
+    )
+    def test_make_loop(self, na):
+        for l in na.loops:
+            l2 = _make_loop(l.nodes, l.knots)
+            assert l2.__class__==l.__class__
+            assert (l2.nodes, l2.nts, l2.branches, l2.knots)==(l.nodes, l.nts, l.branches, l.knots)
+            
+            
+    def test_nodes(self):
+        na = NA('..((..((...))..((..[[.)).]].))..')
+        assert na.junctions[0].nodes==((3, 28), 4, 5, (6, 12), 13, 14, (15, 23), 24, 25, 26, 27)
+        assert na.junctions[0].nts_array.tolist()==na.junctions[0].nts
+        assert na.junctions[0].root==(3, 28)
+        
+        
+    def test_loops_by_type(self):
+        na = NA('.((.((..((((..))..))........((..((.[[.))))....]]...))..))...')
+        loops = (na.hairpins, na.internal_loops, na.bulges, na.junctions)
+        assert sum([len(l) for l in loops])==len(na.loops)
+        for t, l in zip((Hairpin, InternalLoop, Bulge, Junction), loops):
+            assert all([isinstance(i, t) for i in l])
     
     
 class TestDanglingEnds:
@@ -1,5 +1,7 @@
 import pytest
-from naskit import NA
+import numpy as np
+from naskit import NA, NucleicAcid
+from naskit.containers import fix_sharp_hairpins_batch
 from naskit.exceptions import InvalidSequence, InvalidStructure
 
 
@@ -105,10 +107,201 @@ class TestBondEditing:
         na = NA('..((((.))))..((()))..(.)...((.[[.))...]]..')
         na.fix_sharp_hairpins(min_pin_size)
         assert na.struct==target
+
+
+class TestPairTable:
+
+    def test_pair_table(self):
+        na = NA('AGCUUAGC', '.((..)).')
+        assert na.pair_table.dtype==np.int32
+        assert na.pair_table.tolist()==[-1, 6, 5, -1, -1, 2, 1, -1]
+        assert na.pairs==((1, 6), (2, 5))
+        
+        
+    def test_pair_table_editing(self):
+        na = NA('.((..)).')
+        na.join(0, 7)
+        assert na.pair_table.tolist()==[7, 6, 5, -1, -1, 2, 1, 0]
+        assert len(na.helixes)==1
+        
+        na.split(2, 5)
+        assert na.pair_table.tolist()==[7, 6, -1, -1, -1, -1, 1, 0]
+        assert na.struct=='((....))'
+        
+        
+    def test_pair_table_copy(self):
+        na = NA('.((..)).')
+        pt = na.pair_table
+        pt[:] = -1
+        assert na.struct=='.((..)).'
+        
+        
+class TestIncrementalCache:
     
+    def fragments(self, na):
+        return (na.struct, na.pairs, 
+                [tuple(h) for h in na.helixes], na.helix_orders, 
+                [(l.__class__, l.nodes, l.knots) for l in na.loops], 
+                na.dangling_ends)
     
     
+    @pytest.mark.parametrize(
+        "struct, edits",
+        [
+            ('..((....))..', [('join', 4, 7), ('join', 1, 10), ('split', 3, 8), ('join', 3, 8)]), 
+            ('.((..((...))..)).', [('split', 2, 14), ('split', 6, 10), ('join', 6, 10), ('join', 7, 9)]), 
+            ('((((....))))', [('split', 0, 11), ('split', 3, 8), ('split', 1, 10), ('split', 2, 9)]), 
+            ('.((...))...((...)).', [('join', 0, 18), ('join', 9, 10), ('split', 9, 10), ('join', 8, 9)]), 
+            ('..((....))..', [('join', 5, 11), ('join', 0, 1), ('split', 5, 11), ('join', 4, 7)]), 
+            ('..((..[[))..]]', [('split', 2, 9), ('join', 4, 5), ('split', 6, 13)]), 
+         ]
+    )
+    def test_cache_after_edits(self, struct, edits):
+        na = NA(struct)
+        _ = self.fragments(na)
+        
+        for op, i, j in edits:
+            getattr(na, op)(i, j)
+            fresh = NucleicAcid.from_adjacency(na.get_adjacency())
+            assert self.fragments(na)==self.fragments(fresh)
+
+
+    def test_join_without_bonds(self):
+        na = NA('AAAAAAAA')
+        _ = na.helix_orders, na.loops
+        assert na.struct is None
+
+        na.join(0, 7)
+        assert na.struct=='(......)'
+        assert na.helix_orders==(0,)
+
+
+
+class TestEditTransaction:
     
+    def test_edit_context(self):
+        na = NA('AAGGAAACCAA', '..((...))..')
+        _ = na.struct
+        
+        with na.edit() as e:
+            e.split(3, 7)
+            e.split(2, 8)
+            e.join(2, 9)
+            e.join(3, 8)
+            e.mutate(5, 'u')
+            assert na.struct=='..((...))..'
+            
+        assert na.struct=='..((....)).'
+        assert na.seq=='AAGGAuACCAA'
+        
+        
+    def test_apply_edits(self):
+        na = NA('..........')
+        na.apply_edits([('join', 0, 9), ('join', 1, 8), ('mutate', -1, 'G'), ('split', 0, 9)])
+        assert na.struct=='.(......).'
+        assert na.seq=='NNNNNNNNNG'
+        
+        
+    @pytest.mark.parametrize(
+        "edits, error",
+        [
+            ([('join', 0, 9), ('join', 0, 8)], ValueError), 
+            ([('join', 0, 9), ('split', 2, 7)], ValueError), 
+            ([('join', 0, 9), ('mutate', 10, 'A')], IndexError), 
+            ([('join', 0, 9), ('mutate', 1, '%')], ValueError), 
+            ([('join', 0, 9), ('swap', 1, 2)], ValueError), 
+         ]
+    )
+    def test_atomic_edits(self, edits, error):
+        na = NA('AAAAAAAAAA', '.(......).')
+        with pytest.raises(error):
+            na.apply_edits(edits)
+            
+        assert na.struct=='.(......).'
+        assert na.seq=='AAAAAAAAAA'
+        
+        
+    def test_closed_edit(self):
+        na = NA('..........')
+        with na.edit() as e:
+            e.join(0, 9)
+            
+        with pytest.raises(RuntimeError):
+            e.join(1, 8)
+        
+        
+class TestSharpHairpinsBatch:
     
+    def test_batch(self):
+        structs = ['..((((.))))..((()))..(.)...((.[[.))...]]..', 
+                   '((.))', 
+                   '.(((..)))..[[[.]]]', 
+                   '']
+        
+        pts = np.full((len(structs), 50), -1, dtype=np.int32)
+        for i, s in enumerate(structs[:-1]):
+            pts[i, :len(s)] = NA(s).pair_table
+        
+        fixed = fix_sharp_hairpins_batch(pts, 3)
+        for i, s in enumerate(structs[:-1]):
+            na = NA(s)
+            na.fix_sharp_hairpins(3)
+            assert fixed[i, :len(s)].tolist()==na.pair_table.tolist()
+            assert (fixed[i, len(s):]==-1).all()
+            
+        assert (fixed[-1]==-1).all()
+        assert not np.array_equal(pts, fixed)
+        
+        
+    def test_batch_shape(self):
+        with pytest.raises(ValueError):
+            _ = fix_sharp_hairpins_batch(np.full(10, -1), 3)
+            
+            
+class TestDigest:
     
-    
\ No newline at end of file
+    def test_equal(self):
+        na1 = NA('AAAAAAAA', '((....))')
+        na2 = NA('AAAAAAAA', '((....))')
+        
+        assert na1.digest()==na2.digest()
+        assert na1==na2
+        assert len({na1, na2})==1
+        
+        
+    @pytest.mark.parametrize(
+        "seq, struct",
+        [
+            ('AAAAAAAA', '(......)'), 
+            ('AAAAGAAA', '((....))'), 
+            ('AAAAAAAAA', '((....)).'), 
+        ]
+    )
+    def test_not_equal(self, seq, struct):
+        na1 = NA('AAAAAAAA', '((....))')
+        na2 = NA(seq, struct)
+        
+        assert na1.digest()!=na2.digest()
+        assert na1!=na2
+        
+        
+    def test_edit_invalidates(self):
+        na = NA('AAAAAAAA', '((....))')
+        ref = na.digest()
+        
+        na.split(1, 6)
+        assert na.digest()==NA('AAAAAAAA', '(......)').digest()
+        na.join(1, 6)
+        assert na.digest()==ref
+        
+        na.split(1, 6, clear_cache=False)
+        assert na.digest()!=ref
+        na.join(1, 6)
+        
+        with na.edit() as e:
+            e.mutate(3, 'G')
+        assert na==NA('AAAGAAAA', '((....))')
+        assert hash(na)==hash(NA('AAAGAAAA', '((....))'))
+        
+        na.fix_sharp_hairpins(5)
+        assert na==NA('AAAGAAAA', '(......)')
@@ -1,5 +1,6 @@
 import pytest
-from naskit import NA
+import numpy as np
+from naskit import NA, NA_batch, NucleicAcid
 from naskit.exceptions import InvalidSequence, InvalidStructure
 
 
@@ -87,26 +88,70 @@ class TestGraphParse:
         na = NA(struct)
         for i, order in enumerate(na.helix_orders):
             assert order == orders[i]
-    
-
-        
-        
-        
-        
-        
-        
-        
-        
-        
-        
+            
+            
+    @pytest.mark.parametrize("seed", range(20))
+    def test_helix_orders_pairwise(self, seed):
+        rnd = np.random.default_rng(seed)
+        struct = ''.join(rnd.choice(list('..((())[[]]{}<>'), size=200))
+        na = NA(struct, ignore_unclosed_bonds=True)
         
+        helixes = na.helixes
+        for i, h in enumerate(helixes):
+            crossing = set([na.helix_orders[j] for j in range(i) if na._helix_intersect(h, helixes[j])])
+            assert na.helix_orders[i]==min(set(range(len(helixes)+1)) - crossing)
+            
+            
+    def test_many_helix_orders(self):
+        pt = np.array([*range(11, 22), *range(11)])
+        adj = np.zeros((22, 22), dtype=np.int32)
+        adj[np.arange(22), pt] = 1
+        na = NucleicAcid.from_adjacency(adj)
+        
+        # helix crossing all types of brackets is left with order 0
+        assert na.helix_orders==(*range(10), 0)
+        assert na.struct=='([{<ABCDEF()]}>abcdef)'
+        
+        # helix with order 0 is not a pseudoknot and its hairpin is fixed
+        na.fix_sharp_hairpins(11)
+        assert na.struct=='.'*22
+
+
+class TestBatchParse:
+
+    def test_batch_nas(self):
+        data = [('AAGGUUCC', '.((..)).'), 'UUAA', '..[[..]]', ('augc', '(..)')]
+        nas = NA_batch(data, upper_sequence=True)
         
+        assert [na.seq for na in nas]==['AAGGUUCC', 'UUAA', 'NNNNNNNN', 'AUGC']
+        assert [na.struct for na in nas]==['.((..)).', None, '..((..))', '(..)']
         
         
+    def test_batch_pair_tables(self):
+        pts = NA_batch([('AAGG', '(.).'), 'AAA', '.(<.).>'], return_pair_tables=True)
         
+        assert all([pt.dtype==np.int32 for pt in pts])
+        assert pts[0].tolist()==[2, -1, 0, -1]
+        assert pts[1].tolist()==[-1, -1, -1]
+        assert pts[2].tolist()==[-1, 4, 6, -1, 1, -1, 2]
         
         
+    def test_batch_unclosed_bonds(self):
+        with pytest.raises(InvalidStructure):
+            _ = NA_batch(['..((..).'])
+            
+        na = NA_batch(['..((..).'], ignore_unclosed_bonds=True)[0]
+        assert na.struct=='...(..).'
         
         
+    @pytest.mark.parametrize(
+        "struct",
+        ['.((.[[..)).]]..([{<)]}>', '((((....))))', '.A.B.a.b.', '']
+    )
+    def test_same_as_na(self, struct):
+        if not struct:
+            with pytest.raises(ValueError):
+                _ = NA_batch([struct])
+            return
         
-        
\ No newline at end of file
+        assert NA_batch([struct])[0].pairs==NA(struct).pairs
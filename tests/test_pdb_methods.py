@@ -29,4 +29,179 @@ HETATM 2609  P   PO4 A 301      -4.401   0.932 108.199  1.00 45.91           P
             
         c0 = np.arange(3*pdb.natoms).reshape(-1, 3)
         pdb.coords = c0
-        assert pdb[2][0].coords[2] == 3*pdb.natoms - 1
\ No newline at end of file
+        assert pdb[2][0].coords[2] == 3*pdb.natoms - 1
+
+table_pdb_text = """\
+ATOM      1  O5'   G A   1      59.712  40.180-111.625  1.00  0.00           O  
+ATOM      2  C5'   G A   1      61.014  39.722-111.985  1.00  0.00           C  
+ATOM     33  P     G A   2      58.321  36.610-112.262  1.00  0.00           P  
+ATOM     34  OP1   G A   2      58.167  35.355-113.032  1.00  0.00           O  
+ATOM     35  OP2   G A   2      58.072  37.917-112.908  1.00  0.00           O  
+TER
+HETATM 2609  P   PO4 A 301      -4.401   0.932 108.199  0.50 45.91           P  
+"""
+
+
+class TestAtomTable:
+
+    def read(self):
+        fp = tempfile.TemporaryFile('w+')
+        fp.write(table_pdb_text)
+        fp.seek(0)
+
+        with pdbRead(fp) as f:
+            return f.read()[0]
+
+
+    def test_columns(self):
+        pdb = self.read()
+        table = pdb.table
+
+        assert len(table)==pdb.natoms==6
+        assert table.aname.tolist()==[a.aname for a in pdb.atoms()]
+        assert table.mnum.tolist()==[1, 1, 2, 2, 2, 301]
+        assert table.is_hetatm.tolist()==[False]*5 + [True]
+        assert table.occupancy[-1]==np.float32(0.5)
+        assert np.array_equal(table.coords, np.stack([a.coords for a in pdb.atoms()]))
+        assert table[2]['aname']=='P' and table[2]['mnum']==2
+
+
+    def test_shared_views(self):
+        pdb = self.read()
+        table = pdb.table
+        chain, residue = pdb[0], pdb[0][1]
+
+        assert np.shares_memory(chain.table.coords, table.coords)
+        assert np.shares_memory(residue.table.coords, table.coords)
+        assert residue.table.aname.tolist()==['P', 'OP1', 'OP2']
+
+        pdb.table.coords[2] = [1, 2, 3]
+        assert residue[0].coords.tolist()==[1, 2, 3]
+        assert residue.coords[0].tolist()==[1, 2, 3]
+
+
+    def test_invalidation(self):
+        pdb = self.read()
+        table = pdb.table
+
+        pdb[0][1].delete_atom('OP1')
+        assert len(pdb.table)==5 and pdb.table is not table
+        assert 'OP1' not in pdb.table.aname.tolist()
+
+        pdb[0].renum_mols(10)
+        assert pdb[0][0].table.mnum.tolist()==[10, 10]
+
+        pdb.coords = np.zeros((5, 3))
+        assert not pdb.table.coords.any()
+
+
+    def test_independent_revisions(self):
+        a, b = self.read(), self.read()
+        table = a.table
+        coords = table.coords
+        
+        for _ in range(3):
+            assert a.table is table and b.table is b.table
+        
+        b[0][1].delete_atom('OP1')
+        b[1].mname = 'SO4'
+        b[0].renum_atoms(10)
+        assert len(b.table)==5
+        assert a.table is table and a.table.coords is coords
+        assert a[0][1].table.coords.base is coords.base
+        
+        # slice container views the same rows
+        c = a[0:1]
+        assert c.table.coords.base is coords.base
+        assert a.table is table
+        
+        
+    def test_table_atoms(self):
+        pdb = self.read()
+        table = pdb.table[pdb.table.aname=='P']
+
+        atoms = table.atoms()
+        assert [str(a) for a in atoms]==[str(pdb[0][1][0]), str(pdb[1][0])]
+        atoms[0].coords[0] = 0.
+        assert table.coords[0, 0]==0.
+
+
+    def test_coords_views(self):
+        pdb = self.read()
+        coords = pdb.coords
+        assert np.shares_memory(coords, pdb[0][1].coords)
+        assert np.shares_memory(pdb.coords, coords)
+        
+        # setters write in place
+        pdb.coords = np.ones((6, 3))
+        pdb[0][1].coords = np.zeros((3, 3))
+        pdb[1][0].coords = [7, 8, 9]
+        assert coords[:, 0].tolist()==[1, 1, 0, 0, 0, 7]
+        
+        coords += 1
+        assert pdb[0][0]["O5'"].coords.tolist()==[2, 2, 2]
+        assert pdb[1].dist(pdb[0][0]["O5'"])[0]==pytest.approx(np.linalg.norm([6, 7, 8]))
+        
+        
+    def test_view_stays_bound(self):
+        a, b = self.read(), self.read()
+        coords = a.coords
+        
+        b[0][1].delete_atom('OP1')
+        b.renum_mols(5)
+        b.coords = np.zeros((5, 3))
+        _ = b.copy()
+        
+        assert a.coords is coords
+        coords[2] = [1, 2, 3]
+        assert a[0][1]["P"].coords.tolist()==[1, 2, 3]
+        a[0][1]["P"].coords = [4, 5, 6]
+        assert coords[2].tolist()==[4, 5, 6]
+        
+        
+    def test_contiguous_copy(self):
+        pdb = self.read()
+        pdb[0][0]["O5'"] # materialized residue
+        copied = pdb.copy()
+        
+        assert copied.coords.flags.c_contiguous
+        assert np.array_equal(copied.coords, pdb.coords)
+        assert not np.shares_memory(copied.coords, pdb.coords)
+        assert all([np.shares_memory(c.coords, copied.coords) for c in copied])
+        assert np.shares_memory(copied[0][0]["O5'"].coords, copied.coords)
+
+
+class TestSpatial:
+
+    def read(self):
+        fp = tempfile.TemporaryFile('w+')
+        fp.write(table_pdb_text)
+        fp.seek(0)
+
+        with pdbRead(fp) as f:
+            return f.read()[0]
+
+
+    @pytest.mark.parametrize("within", [1.5, 3., 200.])
+    def test_neighbors(self, within):
+        pdb = self.read()
+        i, j, d = pdb.neighbors(within)
+        
+        dist = pdb.dist(pdb)
+        bi, bj = np.nonzero(np.triu(dist<=within, 1))
+        assert i.tolist()==bi.tolist() and j.tolist()==bj.tolist()
+        assert np.allclose(d, dist[bi, bj])
+        
+        
+    def test_contacts(self):
+        pdb = self.read()
+        residue = pdb[0][1]
+        i, j, d = pdb[0].contacts(residue, 2.)
+        
+        dist = pdb[0].dist(residue)
+        bi, bj = np.nonzero(dist<=2.)
+        assert i.tolist()==bi.tolist() and j.tolist()==bj.tolist()
+        assert np.allclose(d, dist[bi, bj])
+        
+        i, j, d = pdb.contacts(residue["P"], 2.)
+        assert i.tolist()==[2, 3, 4] and j.tolist()==[0, 0, 0]
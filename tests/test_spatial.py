@@ -0,0 +1,41 @@
+import pytest
+import numpy as np
+from naskit.utils.spatial import CellList
+
+
+
+class TestCellList:
+    
+    @pytest.mark.parametrize("n", [0, 1, 7, 400])
+    @pytest.mark.parametrize("cell_size", [0.5, 1., 3.])
+    def test_query_pairs(self, n, cell_size):
+        points = np.random.default_rng(n).uniform(0, 10, (n, 3)).astype(np.float32)
+        i, j, d = CellList(points, cell_size).query_pairs()
+        
+        dist = np.linalg.norm(points[:, np.newaxis] - points, axis=2)
+        bi, bj = np.nonzero(np.triu(dist<=cell_size, 1))
+        assert i.tolist()==bi.tolist() and j.tolist()==bj.tolist()
+        assert np.allclose(d, dist[bi, bj])
+        
+        
+    @pytest.mark.parametrize("n", [0, 1, 400])
+    @pytest.mark.parametrize("r", [0., 1., 2.5])
+    def test_query(self, n, r):
+        rng = np.random.default_rng(n)
+        points = rng.uniform(0, 10, (n, 3))
+        queries = rng.uniform(-5, 15, (60, 3)) # some are far from grid
+        i, j, d = CellList(points, 2.5).query(queries, r)
+        
+        dist = np.linalg.norm(queries[:, np.newaxis] - points, axis=2)
+        bi, bj = np.nonzero(dist<=r)
+        assert i.tolist()==bi.tolist() and j.tolist()==bj.tolist()
+        assert np.allclose(d, dist[bi, bj])
+        
+        
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            CellList(np.zeros((3, 3)), 0)
+        with pytest.raises(ValueError):
+            CellList(np.zeros((3, 2)), 1.)
+        with pytest.raises(ValueError):
+            CellList(np.zeros((3, 3)), 1.).query_pairs(2.)